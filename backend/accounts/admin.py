@@ -1,5 +1,6 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
+from content.deletion import schedule_user_deletion
 from .models import User, StudentProfile, OTP # Import all custom models
 
 # 1. Define the StudentProfile as an Inline
@@ -39,6 +40,22 @@ class CustomUserAdmin(UserAdmin):
     
     ordering = ('email',)
 
+    # Accounts are deactivated at once and their content removed in the background
+    # (`manage.py process_deletions`) rather than cascaded inside the request.
+    def get_deleted_objects(self, objs, request):
+        deleted_objects = [
+            f"{obj} (deactivated now; posts, hypes and comments are removed in the background)" for obj in objs
+        ]
+        return deleted_objects, {'users': len(deleted_objects)}, set(), []
+
+    def delete_model(self, request, obj):
+        schedule_user_deletion(obj)
+        self.message_user(request, f"{obj} is deactivated and queued for deletion.", messages.INFO)
+
+    def delete_queryset(self, request, queryset):
+        for user in queryset:
+            schedule_user_deletion(user)
+
 
 # 3. Register the OTP Model for Monitoring
 @admin.register(OTP)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:26
+
+import content.media
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_studentprofile_profile_image'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='studentprofile',
+            name='profile_image',
+            field=models.ImageField(blank=True, null=True, storage=content.media.media_storage, upload_to='profile_pics/'),
+        ),
+    ]
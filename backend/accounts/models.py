@@ -3,6 +3,7 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.contrib.postgres.fields import ArrayField
 from django.utils import timezone
+from content.media import media_storage
 
 # 1. Custom User Model
 class User(AbstractUser):
@@ -46,6 +47,7 @@ class StudentProfile(models.Model):
     # NEW: Profile Image Field
     profile_image = models.ImageField(
         upload_to='profile_pics/', 
+        storage=media_storage,
         null=True, 
         blank=True
     )
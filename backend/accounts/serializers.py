@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from content.media import MediaHashField
 from .models import User, StudentProfile
 
 # ----------------------------------------------------------------------
@@ -20,6 +21,9 @@ class StudentProfileSerializer(serializers.ModelSerializer):
     # Writable fields sourced from the User model (CRITICAL for update)
     first_name = serializers.CharField(source='user.first_name', required=False, allow_null=True)
     last_name = serializers.CharField(source='user.last_name', required=False, allow_null=True)
+
+    # sha256 of profile_image; send it instead of the file when that file is already stored
+    profile_image_sha256 = MediaHashField(source='profile_image', required=False)
     
     class Meta:
         model = StudentProfile
@@ -27,6 +31,7 @@ class StudentProfileSerializer(serializers.ModelSerializer):
             'username', 'email', 'user_is', 
             'first_name', 'last_name',       
             'profile_image', 
+            'profile_image_sha256',
             'college_university', 
             'department', 
             'course', 
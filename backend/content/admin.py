@@ -1,26 +1,94 @@
-from django.contrib import admin
-from .models import Post, Hype, Comment, Feed 
+import uuid
+from django import forms
+from django.contrib import admin, messages
+from django.forms.models import BaseInlineFormSet
+from django.urls import reverse
+from django.utils.html import format_html
+from django.contrib.postgres.search import SearchQuery
+from django.db.models import QuerySet
+from .models import Post, Hype, Comment, Feed, DeletionJob, ArchiveTombstone, POST_SEARCH_VECTOR, COMMENT_SEARCH_VECTOR
+from .archive import find_archived_post, remove_archived_post
+from .deletion import schedule_post_deletion, schedule_posts_deletion
+from .moderation import set_posts_published, delete_comment_trees
+from .paginators import EstimatedCountPaginator
+
+
+def _as_uuid(term):
+    try:
+        return uuid.UUID(term)
+    except ValueError:
+        return None
+
+
+def _full_text(queryset, vector, term):
+    """Filters on a GIN-indexed tsvector expression (see POST_SEARCH_VECTOR)."""
+    return queryset.annotate(search=vector).filter(
+        search=SearchQuery(term, config='simple', search_type='websearch')
+    )
 
 # ----------------------------------------------------------------------
 # 1. Inline Admin for Related Models (Hypes and Comments)
+#
+# A popular post has far too many hypes and comments to render as forms, so
+# the inlines only hold the most recent INLINE_RECENT of each; the post page
+# links to the Hype/Comment changelists filtered to the post for the rest.
 # ----------------------------------------------------------------------
 
-class HypeInline(admin.TabularInline):
-    """Displays Hypes related to a post within the PostAdmin view."""
+INLINE_RECENT = 20
+
+
+class RecentInlineFormSet(BaseInlineFormSet):
+    """Inline formset over the newest `recent_limit` related rows only."""
+    recent_limit = INLINE_RECENT
+
+    def get_queryset(self):
+        if not hasattr(self, '_queryset'):
+            self._queryset = super().get_queryset().order_by('-created_at', '-pk')[:self.recent_limit]
+        return self._queryset
+
+
+class RecentInlineMixin:
+    formset = RecentInlineFormSet
+    recent_limit = INLINE_RECENT
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.recent_limit = self.recent_limit
+        return formset
+
+
+class HypeInline(RecentInlineMixin, admin.TabularInline):
+    """Displays the most recent Hypes of a post within the PostAdmin view."""
     model = Hype
     extra = 0  
     readonly_fields = ('user', 'created_at')
     can_delete = False
+    verbose_name_plural = f"Most recent hypes (up to {INLINE_RECENT})"
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
 
-class CommentInline(admin.StackedInline):
+class CommentInline(RecentInlineMixin, admin.StackedInline):
     """
-    Displays comments related to a post within the PostAdmin view.
+    Displays the most recent comments of a post within the PostAdmin view.
     Includes parent_comment for nesting context.
     """
     model = Comment
     extra = 0
     fields = ('user', 'text', 'parent_comment', 'created_at')
     readonly_fields = ('user', 'created_at')
+    # A select box would list every comment in the table
+    raw_id_fields = ('parent_comment',)
+    verbose_name_plural = f"Most recent comments (up to {INLINE_RECENT})"
+
+    def get_readonly_fields(self, request, obj=None):
+        # path/depth/reply_count are only maintained on insert and delete; existing comments cannot move
+        if obj is not None:
+            return (*self.readonly_fields, 'parent_comment')
+        return self.readonly_fields
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
 
 
 # ----------------------------------------------------------------------
@@ -43,8 +111,16 @@ class PostAdmin(admin.ModelAdmin):
         'updated'
     )
     
-    search_fields = ('content_id', 'creator__username', 'description', 'feed_types')
+    # Each kind of term is answered by an index; see get_search_results()
+    search_fields = ('content_id', 'creator__username', 'description', 'text_content')
+    search_help_text = 'A content id, #TAG, @username, or words from the description/text.'
     list_filter = ('content_type', 'posted_by', 'is_published', 'created_at')
+    list_select_related = ('creator',)
+    autocomplete_fields = ('creator',)
+
+    # No exact COUNT(*) over the whole table per page view
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     
     fieldsets = (
         ('Content Details', {
@@ -56,6 +132,9 @@ class PostAdmin(admin.ModelAdmin):
                 'feed_types',
             )
         }),
+        ('Interactions', {
+            'fields': ('hypes_summary', 'comments_summary'),
+        }),
         ('Status and Dates', {
             'fields': (
                 'is_published',
@@ -69,6 +148,10 @@ class PostAdmin(admin.ModelAdmin):
 
     inlines = [HypeInline, CommentInline] 
 
+    # Set-based (see content/moderation.py); with "select all" they cover every
+    # post matching the current filters/search, e.g. @username or #TAG.
+    actions = ['unpublish_posts', 'republish_posts']
+
     # FIX: Add 'get_hype_count' to readonly_fields to allow it to be displayed
     # and remove any reference to the old, deleted field 'total_hypes'.
     readonly_fields = (
@@ -76,17 +159,77 @@ class PostAdmin(admin.ModelAdmin):
         'created_at', 
         'updated_at', 
         'updated',
-        'get_hype_count' # CORRECTED: Use the method name here.
+        'get_hype_count', # CORRECTED: Use the method name here.
+        'hypes_summary',
+        'comments_summary',
     ) 
     
     def get_hype_count(self, obj):
-        """Custom method to display the count of related Hype objects."""
-        return obj.Hypes.count()
+        """The post's denormalized hype counter (no query per row)."""
+        return obj.hype_count
     get_hype_count.short_description = 'Hypes' 
+    get_hype_count.admin_order_field = 'hype_count'
     
     def get_comment_count(self, obj):
-        return obj.comments.count()
+        return obj.comment_count
     get_comment_count.short_description = 'Comments'
+    get_comment_count.admin_order_field = 'comment_count'
+
+    def _changelist_link(self, obj, model_name, count, noun):
+        if obj is None or obj.pk is None:
+            return '-'
+        url = reverse(f'admin:content_{model_name}_changelist') + f'?post__id__exact={obj.pk}'
+        return format_html('{} {} &mdash; <a href="{}">view all</a>', count, noun, url)
+
+    def hypes_summary(self, obj):
+        return self._changelist_link(obj, 'hype', obj.hype_count, 'hype(s)')
+    hypes_summary.short_description = 'Hypes'
+
+    def comments_summary(self, obj):
+        return self._changelist_link(obj, 'comment', obj.comment_count, 'comment(s)')
+    comments_summary.short_description = 'Comments'
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        content_id = _as_uuid(term)
+        if content_id is not None:
+            return queryset.filter(content_id=content_id), False
+        if term.startswith('#'):
+            return queryset.filter(feed_types__contains=[term[1:].strip().upper()]), False
+        if term.startswith('@'):
+            return queryset.filter(creator__username=term[1:].strip()), False
+        return _full_text(queryset, POST_SEARCH_VECTOR, term), False
+
+    def unpublish_posts(self, request, queryset):
+        changed = set_posts_published(queryset, False)
+        self.message_user(request, f"Unpublished {changed} post(s).", messages.SUCCESS)
+    unpublish_posts.short_description = 'Unpublish selected posts'
+
+    def republish_posts(self, request, queryset):
+        changed = set_posts_published(queryset, True)
+        self.message_user(request, f"Republished {changed} post(s).", messages.SUCCESS)
+    republish_posts.short_description = 'Republish selected posts'
+
+    # --- Deletion is queued (see content/deletion.py) instead of cascading inline ---
+
+    def get_deleted_objects(self, objs, request):
+        """Skips the cascade collector, which would load every hype and comment for the summary."""
+        if isinstance(objs, QuerySet):
+            count = objs.count()
+            return [f"{count} post(s) (unpublished now; their hypes and comments are removed in the background)"], {'posts': count}, set(), []
+        deleted_objects = [
+            f"{obj} (unpublished now; its hypes and comments are removed in the background)" for obj in objs
+        ]
+        return deleted_objects, {'posts': len(deleted_objects)}, set(), []
+
+    def delete_model(self, request, obj):
+        schedule_post_deletion(obj)
+        self.message_user(request, f"Post {obj.content_id} is hidden and queued for deletion.", messages.INFO)
+
+    def delete_queryset(self, request, queryset):
+        schedule_posts_deletion(queryset)
 
 
 # ----------------------------------------------------------------------
@@ -100,9 +243,21 @@ class CommentAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'post_link', 'text_preview', 'created_at')
     list_filter = ('created_at',)
     search_fields = ('user__username', 'post__content_id', 'text')
+    search_help_text = 'A post content id, @username, a comment id, or words from the text.'
+    list_select_related = ('user', 'post')
     raw_id_fields = ('user', 'post', 'parent_comment') 
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Maintained on insert and by signals
+    readonly_fields = ('path', 'depth', 'reply_count')
     ordering = ('-created_at',)
 
+    def get_readonly_fields(self, request, obj=None):
+        # Moving a comment would leave its subtree's path/depth and both parents' counters stale
+        if obj is not None:
+            return (*self.readonly_fields, 'post', 'parent_comment')
+        return self.readonly_fields
+
     def post_link(self, obj):
         """Creates a link to the parent post in the admin list."""
         return obj.post.content_id.hex[:10] + '...'
@@ -113,6 +268,29 @@ class CommentAdmin(admin.ModelAdmin):
         return obj.text[:50] + '...' if len(obj.text) > 50 else obj.text
     text_preview.short_description = 'Text'
 
+    def get_deleted_objects(self, objs, request):
+        """Bulk deletes are one statement (delete_queryset), so the collector's row-by-row summary is skipped."""
+        if not isinstance(objs, QuerySet):
+            return super().get_deleted_objects(objs, request)
+        count = objs.count()
+        return [f"{count} comment(s) and all replies below them"], {'comments': count}, set(), []
+
+    def delete_queryset(self, request, queryset):
+        delete_comment_trees(queryset)
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        content_id = _as_uuid(term)
+        if content_id is not None:
+            return queryset.filter(post__content_id=content_id), False
+        if term.startswith('@'):
+            return queryset.filter(user__username=term[1:].strip()), False
+        if term.isdigit():
+            return queryset.filter(pk=int(term)), False
+        return _full_text(queryset, COMMENT_SEARCH_VECTOR, term), False
+
 
 # ----------------------------------------------------------------------
 # 4. Simple Admin for Hypes and Feed (Unchanged)
@@ -123,7 +301,20 @@ class HypeAdmin(admin.ModelAdmin):
     list_display = ('user', 'post', 'created_at')
     list_filter = ('created_at',)
     search_fields = ('user__username', 'post__content_id')
+    search_help_text = 'A post content id or an exact username.'
+    list_select_related = ('user', 'post__creator')
     raw_id_fields = ('user', 'post') 
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip().lstrip('@')
+        if not term:
+            return queryset, False
+        content_id = _as_uuid(term)
+        if content_id is not None:
+            return queryset.filter(post__content_id=content_id), False
+        return queryset.filter(user__username=term), False
 
 @admin.register(Feed)
 class FeedAdmin(admin.ModelAdmin):
@@ -132,4 +323,72 @@ class FeedAdmin(admin.ModelAdmin):
     list_filter = ('created_at',)
     search_fields = ('tag',)
     readonly_fields = ('created_at', 'last_used_at', 'total_used', 'Rank')
-    ordering = ('-Rank', '-total_used')
\ No newline at end of file
+    ordering = ('-Rank', '-total_used')
+
+
+# ----------------------------------------------------------------------
+# 5. Deletion Job Admin (progress of queued post/account deletions)
+# ----------------------------------------------------------------------
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    """Read-only view of the background deletions run by `manage.py process_deletions`."""
+    list_display = (
+        'target_type', 'target_label', 'status', 'posts_deleted', 'comments_deleted',
+        'hypes_deleted', 'batches', 'created_at', 'finished_at',
+    )
+    list_filter = ('status', 'target_type')
+    search_fields = ('target_label',)
+    readonly_fields = [field.name for field in DeletionJob._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+# ----------------------------------------------------------------------
+# 6. Archive Tombstones (deleting posts that only live in the archive tier)
+# ----------------------------------------------------------------------
+
+class ArchiveTombstoneForm(forms.ModelForm):
+    class Meta:
+        model = ArchiveTombstone
+        fields = ('content_id', 'reason')
+
+    def clean_content_id(self):
+        content_id = self.cleaned_data['content_id']
+        if find_archived_post(content_id) is None:
+            raise forms.ValidationError("No served archived post has this content id.")
+        return content_id
+
+
+@admin.register(ArchiveTombstone)
+class ArchiveTombstoneAdmin(admin.ModelAdmin):
+    """Adding a tombstone removes an archived post; tombstones are final."""
+    form = ArchiveTombstoneForm
+    list_display = ('content_id', 'reason', 'created_at')
+    list_filter = ('reason',)
+    search_fields = ('content_id',)
+    search_help_text = 'A post content id.'
+
+    def get_readonly_fields(self, request, obj=None):
+        return ('content_id', 'reason', 'created_at') if obj else ()
+
+    def get_search_results(self, request, queryset, search_term):
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        content_id = _as_uuid(term)
+        if content_id is None:
+            return queryset.none(), False
+        return queryset.filter(content_id=content_id), False
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            remove_archived_post(obj.content_id, obj.reason)
+
+    def has_delete_permission(self, request, obj=None):
+        # The archived copy's media reference is released with the tombstone
+        return False
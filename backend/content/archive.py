@@ -0,0 +1,408 @@
+import json
+import mmap
+import os
+import struct
+import uuid
+import zlib
+from collections import Counter
+from functools import lru_cache
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils.dateparse import parse_datetime
+from accounts.models import User
+from .models import Post, Hype, Comment, PostScore, ArchiveTombstone
+from .changes import record_post_deletions
+from .media import adjust_blob_refs
+
+# ----------------------------------------------------------------------
+# Archive tier for old posts (`manage.py archive_posts`)
+#
+# Published posts older than CONTENT_ARCHIVE_AFTER_DAYS are written, with
+# their comments and final hype/comment counts, to segment files under
+# CONTENT_ARCHIVE_DIR and then removed from Post, Comment and Hype (hype rows
+# are kept only as the aggregate count). A segment is three files:
+#
+#   <name>.data          zlib blocks of BLOCK_POSTS NDJSON post documents
+#   <name>.creators.idx  (creator pk, -created_at, block, line) sorted records
+#   <name>.posts.idx     (content_id, block, line) sorted records, written last
+#                        (a segment without it is incomplete and ignored)
+#
+# Readers memory-map the index files and binary-search them, so a lookup
+# touches a few pages of the index and decompresses one block. Archived posts
+# are read-only: PostDetailView and PublicUserPostListView fall back to them.
+#
+# Feed.total_used counts the published posts in Post only: delete_archived()
+# releases the tags of the posts it removes, so an archived post no longer
+# counts (recount_feed_tags agrees), and removing it later changes nothing.
+#
+# Segment files are never rewritten. A segment copy is skipped while the post
+# is (still or again) in Post, which takes precedence, and once an
+# ArchiveTombstone names it: deleting a post that also has a segment copy
+# leaves one (signals.py), and remove_archived_post() is the delete and
+# moderation path for posts that only live in the archive.
+# ----------------------------------------------------------------------
+
+# Posts per compressed block (larger compresses better, costs more per read)
+BLOCK_POSTS = 64
+
+# Posts written to one segment by one run
+DEFAULT_SEGMENT_POSTS = 50_000
+
+# Posts removed from the database per transaction after a segment is written
+DEFAULT_DELETE_BATCH = 500
+
+POSTS_MAGIC = b'TIPOST01'
+CREATORS_MAGIC = b'TICRTR01'
+# content_id, block offset, block length, line
+POST_RECORD = struct.Struct('>16sQII')
+# creator pk, -created_at (microseconds), block offset, block length, line
+CREATOR_RECORD = struct.Struct('>QqQII')
+
+POST_FIELDS = (
+    'id', 'content_id', 'creator_id', 'content_type', 'text_content', 'media_file', 'posted_by',
+    'description', 'feed_types', 'created_at', 'updated', 'updated_at', 'hype_count', 'comment_count',
+)
+COMMENT_FIELDS = ('id', 'user_id', 'parent_comment_id', 'text', 'created_at', 'path', 'depth', 'reply_count')
+
+
+def archive_dir():
+    return settings.CONTENT_ARCHIVE_DIR
+
+
+def _micros(moment):
+    return int(moment.timestamp() * 1_000_000)
+
+
+# ----------------------------------------------------------------------
+# 1. Writing a segment and shrinking the tables
+# ----------------------------------------------------------------------
+
+def _next_segment_name(directory):
+    numbers = [
+        int(name.split('.')[0].split('-')[1]) for name in os.listdir(directory)
+        if name.startswith('segment-') and name.endswith('.data')
+    ]
+    return f"segment-{max(numbers, default=0) + 1:06d}"
+
+
+def _write_index(path, magic, record, entries):
+    entries.sort()
+    with open(f"{path}.tmp", 'wb') as fh:
+        fh.write(magic)
+        for entry in entries:
+            fh.write(record.pack(*entry))
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(f"{path}.tmp", path)
+
+
+def _documents(posts):
+    """The archived form of a chunk of post rows: the post fields plus its comment thread."""
+    comments = {}
+    rows = (
+        Comment.objects.filter(post_id__in=[post['id'] for post in posts])
+        .order_by('created_at', 'id').values_list('post_id', *COMMENT_FIELDS)
+    )
+    for post_id, *values in rows:
+        comments.setdefault(post_id, []).append(values)
+    for post in posts:
+        yield {**post, 'comments': comments.get(post['id'], [])}
+
+
+def write_segment(cutoff, max_posts=DEFAULT_SEGMENT_POSTS):
+    """
+    Writes the published posts created before cutoff (at most max_posts, oldest
+    ids first) to a new segment. Returns {post pk: (hype_count, comment_count)}
+    as archived; the database is not changed.
+    """
+    directory = archive_dir()
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, _next_segment_name(directory))
+
+    archived, post_entries, creator_entries = {}, [], []
+    posts = (
+        Post.objects.filter(is_published=True, created_at__lt=cutoff)
+        .order_by('pk').values(*POST_FIELDS)[:max_posts]
+    )
+    with open(f"{base}.data.tmp", 'wb') as data:
+        chunk = []
+        for post in posts.iterator(chunk_size=BLOCK_POSTS * 8):
+            chunk.append(post)
+            if len(chunk) == BLOCK_POSTS:
+                _write_block(data, chunk, archived, post_entries, creator_entries)
+                chunk = []
+        if chunk:
+            _write_block(data, chunk, archived, post_entries, creator_entries)
+        data.flush()
+        os.fsync(data.fileno())
+
+    if not archived:
+        os.remove(f"{base}.data.tmp")
+        return archived
+    os.replace(f"{base}.data.tmp", f"{base}.data")
+    _write_index(f"{base}.creators.idx", CREATORS_MAGIC, CREATOR_RECORD, creator_entries)
+    _write_index(f"{base}.posts.idx", POSTS_MAGIC, POST_RECORD, post_entries)
+    return archived
+
+
+def _write_block(data, chunk, archived, post_entries, creator_entries):
+    lines = [json.dumps(document, default=str) for document in _documents(chunk)]
+    block = zlib.compress('\n'.join(lines).encode(), 6)
+    offset = data.tell()
+    data.write(block)
+    for line, post in enumerate(chunk):
+        archived[post['id']] = (post['hype_count'], post['comment_count'])
+        post_entries.append((post['content_id'].bytes, offset, len(block), line))
+        creator_entries.append((post['creator_id'], -_micros(post['created_at']), offset, len(block), line))
+
+
+def delete_archived(archived, batch_size=DEFAULT_DELETE_BATCH):
+    """
+    Removes archived posts with their comments, hypes and scores, batch by
+    batch, and releases their Feed tag counts. A post whose counters moved
+    since it was written (a late hype or comment) or that was unpublished
+    stays in the database, which takes precedence over the archive. Returns
+    the number of posts removed.
+    """
+    # signals.py imports this module
+    from .signals import adjust_feed_counts, counted_tags
+
+    post_table = Post._meta.db_table
+    items = sorted(archived.items())
+    removed = 0
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH doomed AS (
+                    SELECT p.id FROM {post_table} p
+                    JOIN unnest(%s::bigint[], %s::integer[], %s::integer[]) AS a(id, hypes, comments)
+                      ON p.id = a.id AND p.hype_count = a.hypes AND p.comment_count = a.comments
+                    WHERE p.is_published
+                    FOR UPDATE OF p
+                ), comments AS (
+                    DELETE FROM {Comment._meta.db_table} WHERE post_id IN (SELECT id FROM doomed)
+                ), hypes AS (
+                    DELETE FROM {Hype._meta.db_table} WHERE post_id IN (SELECT id FROM doomed)
+                ), scores AS (
+                    DELETE FROM {PostScore._meta.db_table} WHERE post_id IN (SELECT id FROM doomed)
+                )
+                DELETE FROM {post_table} WHERE id IN (SELECT id FROM doomed)
+                RETURNING feed_types
+                """,
+                [
+                    [pk for pk, _ in batch],
+                    [hypes for _, (hypes, _) in batch],
+                    [comments for _, (_, comments) in batch],
+                ],
+            )
+            released = Counter()
+            for feed_types, in cursor.fetchall():
+                released.update(counted_tags(True, feed_types))
+                removed += 1
+            adjust_feed_counts({tag: -count for tag, count in released.items()})
+    return removed
+
+
+# ----------------------------------------------------------------------
+# 2. Reading segments
+# ----------------------------------------------------------------------
+
+class Segment:
+    """One complete segment; its index files are memory-mapped."""
+
+    def __init__(self, base):
+        self.base = base
+        self.posts = self._map(f"{base}.posts.idx", POSTS_MAGIC)
+        self.creators = self._map(f"{base}.creators.idx", CREATORS_MAGIC)
+
+    @staticmethod
+    def _map(path, magic):
+        with open(path, 'rb') as fh:
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if mapped[:len(magic)] != magic:
+            raise ValueError(f"{path} is not an archive index")
+        return mapped
+
+    @staticmethod
+    def _lower_bound(mapped, record, key):
+        """First record whose leading bytes are >= key (records are sorted)."""
+        header = 8
+        low, high = 0, (len(mapped) - header) // record.size
+        while low < high:
+            middle = (low + high) // 2
+            start = header + middle * record.size
+            if mapped[start:start + len(key)] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _post_record(self, content_id):
+        key = content_id.bytes
+        position = self._lower_bound(self.posts, POST_RECORD, key)
+        start = 8 + position * POST_RECORD.size
+        if start + POST_RECORD.size > len(self.posts):
+            return None
+        found, offset, length, line = POST_RECORD.unpack_from(self.posts, start)
+        return (offset, length, line) if found == key else None
+
+    def contains(self, content_id):
+        """Whether the segment has a copy of the post (reads the index only)."""
+        return self._post_record(content_id) is not None
+
+    def find(self, content_id):
+        record = self._post_record(content_id)
+        if record is None:
+            return None
+        return _read_document(f"{self.base}.data", *record)
+
+    def by_creator(self, creator_id):
+        """The creator's archived posts in this segment, newest first."""
+        key = struct.pack('>Q', creator_id)
+        position = self._lower_bound(self.creators, CREATOR_RECORD, key)
+        documents = []
+        start = 8 + position * CREATOR_RECORD.size
+        while start + CREATOR_RECORD.size <= len(self.creators):
+            found, _, offset, length, line = CREATOR_RECORD.unpack_from(self.creators, start)
+            if found != creator_id:
+                break
+            documents.append(_read_document(f"{self.base}.data", offset, length, line))
+            start += CREATOR_RECORD.size
+        return documents
+
+
+@lru_cache(maxsize=256)
+def _read_block(path, offset, length):
+    with open(path, 'rb') as fh:
+        mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return zlib.decompress(mapped[offset:offset + length]).split(b'\n')
+    finally:
+        mapped.close()
+
+
+def _read_document(path, offset, length, line):
+    return json.loads(_read_block(path, offset, length)[line])
+
+
+_segments = {'key': None, 'segments': []}
+
+
+def segments():
+    """Complete segments, newest first; re-scanned when the directory changes."""
+    directory = archive_dir()
+    try:
+        key = (directory, os.stat(directory).st_mtime_ns)
+    except FileNotFoundError:
+        return []
+    if _segments['key'] != key:
+        names = sorted(
+            (name[:-len('.posts.idx')] for name in os.listdir(directory) if name.endswith('.posts.idx')),
+            reverse=True,
+        )
+        _segments['segments'] = [Segment(os.path.join(directory, name)) for name in names]
+        _segments['key'] = key
+    return _segments['segments']
+
+
+def is_archived(content_id):
+    """Whether any segment has a copy of the post, served or not."""
+    content_id = uuid.UUID(str(content_id))
+    return any(segment.contains(content_id) for segment in segments())
+
+
+def _not_served(content_ids):
+    """
+    The content ids (as strings) whose segment copies must be skipped: the post
+    is in Post (in any state), or tombstoned. One query.
+    """
+    content_ids = list(content_ids)
+    if not content_ids:
+        return set()
+    live = Post.objects.filter(content_id__in=content_ids).values_list('content_id').order_by()
+    buried = ArchiveTombstone.objects.filter(content_id__in=content_ids).values_list('content_id').order_by()
+    return {str(content_id) for content_id, in live.union(buried)}
+
+
+def find_archived_post(content_id):
+    content_id = uuid.UUID(str(content_id))
+    for segment in segments():
+        document = segment.find(content_id)
+        if document is not None:
+            return None if _not_served([document['content_id']]) else document
+    return None
+
+
+def archived_posts_by_creator(creator_id):
+    documents, seen = [], set()
+    for segment in segments():
+        for document in segment.by_creator(creator_id):
+            if document['content_id'] not in seen:
+                seen.add(document['content_id'])
+                documents.append(document)
+    hidden = _not_served(seen)
+    documents = [document for document in documents if document['content_id'] not in hidden]
+    documents.sort(key=lambda document: parse_datetime(document['created_at']), reverse=True)
+    return documents
+
+
+def remove_archived_post(content_id, reason='MODERATED'):
+    """
+    Deletes a post that only lives in the archive: tombstones it, releases its
+    media reference and logs the deletion for delta-sync clients. Returns
+    False if no served archived post has this content id.
+    """
+    document = find_archived_post(content_id)
+    if document is None:
+        return False
+    with transaction.atomic():
+        _, created = ArchiveTombstone.objects.get_or_create(content_id=document['content_id'], defaults={'reason': reason})
+        if created:
+            if document['media_file']:
+                adjust_blob_refs({document['media_file']: -1})
+            record_post_deletions([(document['id'], document['content_id'])])
+    return created
+
+
+# ----------------------------------------------------------------------
+# 3. Turning documents back into (unsaved) model instances
+# ----------------------------------------------------------------------
+
+def hydrate_posts(documents):
+    """
+    Read-only Post instances shaped like views.with_post_relations() output, so
+    PostListSerializer renders them unchanged. Creators and commenters are
+    loaded in one query; posts whose creator is gone or inactive are dropped.
+    """
+    documents = list(documents)
+    user_ids = {document['creator_id'] for document in documents}
+    for document in documents:
+        user_ids.update(comment[1] for comment in document['comments'])
+    users = User.objects.select_related('studentprofile').in_bulk(user_ids)
+
+    posts = []
+    for document in documents:
+        creator = users.get(document['creator_id'])
+        if creator is None or not creator.is_active:
+            continue
+        fields = {name: document[name] for name in POST_FIELDS}
+        fields['content_id'] = uuid.UUID(fields['content_id'])
+        fields['created_at'] = parse_datetime(fields['created_at'])
+        fields['updated_at'] = parse_datetime(fields['updated_at'])
+        post = Post(is_published=True, **fields)
+        post._state.adding = False
+        post.creator = creator
+        post.is_hyped_by_user = False  # individual hypes are not archived
+        post.thread_comments = []
+        for values in document['comments']:
+            comment = Comment(post=post, **dict(zip(COMMENT_FIELDS, values)))
+            if comment.user_id not in users:
+                continue
+            comment.created_at = parse_datetime(comment.created_at)
+            comment.user = users[comment.user_id]
+            comment._state.adding = False
+            post.thread_comments.append(comment)
+        posts.append(post)
+    return posts
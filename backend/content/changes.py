@@ -0,0 +1,134 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core import signing
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+from .models import Post, ContentChange
+from .realtime import publish_counts_changed
+
+# ----------------------------------------------------------------------
+# Post change log (behind GET /api/content/changes/?since=<token>)
+#
+# Every write that changes what a feed client holds calls one of the
+# record_*() helpers below in the same transaction. They upsert the post's
+# single ContentChange row with the next value of content_change_seq, so a
+# client that remembers the last sequence number it saw only needs the rows
+# past it (one range scan on the unique seq index; none when nothing is new).
+# Hype/comment counter changes only move 'seq'; anything else also moves
+# 'content_seq', which tells a full post apart from a counts-only update.
+# ----------------------------------------------------------------------
+
+TOKEN_SALT = 'content.changes'
+
+# Entries returned by one request; the client follows 'next' while 'has_more'
+MAX_CHANGES = 500
+
+
+def _upsert_sql(source_sql):
+    table = ContentChange._meta.db_table
+    return f"""
+        INSERT INTO {table} (post_id, content_id, seq, content_seq, created_seq, state, changed_at)
+        SELECT src.id, src.content_id, src.seq,
+               CASE WHEN %(counts_only)s THEN 0 ELSE src.seq END,
+               CASE WHEN %(created)s THEN src.seq ELSE 0 END,
+               src.state, clock_timestamp()
+        FROM (
+            SELECT s.id, s.content_id, s.state, nextval('content_change_seq') AS seq
+            FROM ({source_sql}) s
+            ORDER BY s.id
+        ) src
+        ON CONFLICT (post_id) DO UPDATE SET
+            seq = EXCLUDED.seq,
+            content_seq = CASE WHEN %(counts_only)s THEN {table}.content_seq ELSE EXCLUDED.seq END,
+            created_seq = GREATEST({table}.created_seq, EXCLUDED.created_seq),
+            state = EXCLUDED.state,
+            changed_at = EXCLUDED.changed_at
+        RETURNING content_id, state
+    """
+
+
+def record_post_changes(post_ids, counts_only=False, created=False):
+    """
+    Moves the given posts to the head of the change log (one statement), with
+    their current published state. counts_only marks hype/comment counter
+    updates (also pushed to real-time subscribers); created marks the posts'
+    first save.
+    """
+    post_ids = list(post_ids)
+    if not post_ids:
+        return
+    source = (
+        f"SELECT id, content_id, CASE WHEN is_published THEN 'LIVE' ELSE 'HIDDEN' END AS state "
+        f"FROM {Post._meta.db_table} WHERE id = ANY(%(ids)s)"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _upsert_sql(source),
+            {'ids': post_ids, 'counts_only': counts_only, 'created': created},
+        )
+        rows = cursor.fetchall()
+    if counts_only:
+        publish_counts_changed(content_id for content_id, state in rows if state == 'LIVE')
+
+
+def record_post_deletions(posts):
+    """Leaves a tombstone for each deleted post, given as (pk, content_id) pairs."""
+    posts = list(posts)
+    if not posts:
+        return
+    source = "SELECT id, content_id, 'DELETED' AS state FROM unnest(%(ids)s::bigint[], %(content_ids)s::uuid[]) AS d(id, content_id)"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            _upsert_sql(source),
+            {
+                'ids': [pk for pk, _ in posts],
+                'content_ids': [str(content_id) for _, content_id in posts],
+                'counts_only': False,
+                'created': False,
+            },
+        )
+
+
+# ----------------------------------------------------------------------
+# Reading the log
+# ----------------------------------------------------------------------
+
+def make_token(seq):
+    return signing.Signer(salt=TOKEN_SALT).sign(str(seq))
+
+
+def read_token(token):
+    """The sequence number inside a token, or None if it was not issued by us."""
+    try:
+        return int(signing.Signer(salt=TOKEN_SALT).unsign(token))
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def current_seq():
+    return ContentChange.objects.aggregate(seq=Max('seq'))['seq'] or 0
+
+
+def changes_since(seq, limit=MAX_CHANGES):
+    """
+    Returns (rows, next_seq, has_more) for the log rows past seq, oldest first.
+    Rows written in the last CONTENT_CHANGES_SETTLE_SECONDS are held back: a
+    transaction that took a lower number may not have committed yet, and
+    handing out a token past it would skip its change for good.
+    """
+    settle = timedelta(seconds=getattr(settings, 'CONTENT_CHANGES_SETTLE_SECONDS', 2))
+    cutoff = timezone.now() - settle
+    rows = list(
+        ContentChange.objects.filter(seq__gt=seq).order_by('seq')
+        .values('post_id', 'content_id', 'seq', 'content_seq', 'created_seq', 'state', 'changed_at')[:limit + 1]
+    )
+
+    settled = []
+    for row in rows[:limit]:
+        if row['changed_at'] > cutoff:
+            break
+        settled.append(row)
+
+    next_seq = settled[-1]['seq'] if settled else seq
+    return settled, next_seq, len(rows) > limit and len(settled) == limit
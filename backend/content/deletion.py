@@ -0,0 +1,364 @@
+import time
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from accounts.models import User
+from .models import Post, Hype, Comment, PostScore, DeletionJob
+from .changes import record_post_changes
+from .signals import adjust_feed_counts, counted_tags
+from .trending import refresh_post_scores
+
+# ----------------------------------------------------------------------
+# Background batched deletion of posts and accounts
+#
+# Deleting a post or user with Model.delete() makes the cascade collector load
+# every Hype/Comment (and every nested reply) into memory and delete them in
+# one long transaction. Instead, schedule_*_deletion() hides the target at
+# once (unpublish / deactivate) and records a DeletionJob; run_deletion_job()
+# (`manage.py process_deletions`) then deletes the dependents newest-first in
+# bounded batches, each in its own short transaction, keeps the counters of
+# surviving posts in step and applies the Feed tag counts at the end.
+# ----------------------------------------------------------------------
+
+DEFAULT_BATCH_SIZE = 500
+
+ACTIVE_STATUSES = ('PENDING', 'RUNNING')
+
+
+# ----------------------------------------------------------------------
+# 1. Scheduling (instant; called from the admin instead of delete())
+# ----------------------------------------------------------------------
+
+def _active_job(target_type, target_id):
+    return DeletionJob.objects.filter(
+        target_type=target_type, target_id=target_id, status__in=ACTIVE_STATUSES
+    ).first()
+
+
+def schedule_post_deletion(post):
+    """Unpublishes the post, drops its hot score and queues a DeletionJob (returned)."""
+    job = _active_job('POST', post.pk)
+    if job is not None:
+        return job
+
+    with transaction.atomic():
+        row = Post.objects.select_for_update().filter(pk=post.pk).values_list('is_published', 'feed_types').first()
+        if row is None:
+            return None
+        was_published, feed_types = row
+
+        Post.objects.filter(pk=post.pk).update(is_published=False)
+        PostScore.objects.filter(post_id=post.pk).delete()
+        record_post_changes([post.pk])
+
+        tag_deltas = {}
+        if was_published:
+            for tag in feed_types:
+                tag = tag.strip().upper()
+                tag_deltas[tag] = tag_deltas.get(tag, 0) - 1
+
+        return DeletionJob.objects.create(
+            target_type='POST',
+            target_id=post.pk,
+            target_label=str(post.content_id),
+            tag_deltas=tag_deltas,
+        )
+
+
+def schedule_posts_deletion(queryset):
+    """
+    Set-based schedule_post_deletion() for admin bulk actions: unpublishes
+    every post in queryset without an active job in one statement and queues
+    one DeletionJob per post. Returns the number of posts queued.
+    """
+    post_table = Post._meta.db_table
+    job_table = DeletionJob._meta.db_table
+    ids_sql, params = queryset.order_by().values('pk').query.sql_with_params()
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH target AS (
+                    SELECT id, is_published FROM {post_table}
+                    WHERE id IN ({ids_sql})
+                      AND id NOT IN (
+                          SELECT target_id FROM {job_table}
+                          WHERE target_type = 'POST' AND status = ANY(%s)
+                      )
+                    FOR UPDATE
+                )
+                UPDATE {post_table} p SET is_published = false
+                FROM target
+                WHERE p.id = target.id
+                RETURNING p.id, p.content_id, target.is_published, p.feed_types
+                """,
+                [*params, list(ACTIVE_STATUSES)],
+            )
+            hidden = cursor.fetchall()
+        if not hidden:
+            return 0
+
+        post_ids = [post_id for post_id, _, _, _ in hidden]
+        PostScore.objects.filter(post_id__in=post_ids).delete()
+        record_post_changes(post_ids)
+        DeletionJob.objects.bulk_create(
+            DeletionJob(
+                target_type='POST',
+                target_id=post_id,
+                target_label=str(content_id),
+                tag_deltas={tag: -count for tag, count in counted_tags(was_published, feed_types).items()},
+            )
+            for post_id, content_id, was_published, feed_types in hidden
+        )
+    return len(hidden)
+
+
+def schedule_user_deletion(user):
+    """
+    Deactivates the account, unpublishes all of its posts (one statement) and
+    queues a DeletionJob (returned).
+    """
+    job = _active_job('USER', user.pk)
+    if job is not None:
+        return job
+
+    post_table = Post._meta.db_table
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH hidden AS (
+                    UPDATE {post_table} SET is_published = false
+                    WHERE creator_id = %s AND is_published
+                    RETURNING feed_types
+                )
+                SELECT UPPER(BTRIM(tag)), COUNT(*)
+                FROM hidden, unnest(hidden.feed_types) AS tag
+                GROUP BY 1
+                """,
+                [user.pk],
+            )
+            tag_deltas = {tag: -count for tag, count in cursor.fetchall()}
+
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        PostScore.objects.filter(post__creator_id=user.pk).delete()
+        record_post_changes(Post.objects.filter(creator_id=user.pk).values_list('pk', flat=True))
+
+        return DeletionJob.objects.create(
+            target_type='USER',
+            target_id=user.pk,
+            target_label=user.email,
+            tag_deltas=tag_deltas,
+        )
+
+
+# ----------------------------------------------------------------------
+# 2. Batches (each runs in its own transaction)
+# ----------------------------------------------------------------------
+
+_DOOMED_COMMENTS = 'deletion_job_comments'
+
+
+def _scopes(job):
+    """(comment roots SQL, hype SQL, params) selecting what the job has to remove."""
+    post_table = Post._meta.db_table
+    if job.target_type == 'POST':
+        return 'post_id = %s', 'post_id = %s', [job.target_id]
+    own_posts = f"post_id IN (SELECT id FROM {post_table} WHERE creator_id = %s)"
+    return f"user_id = %s OR {own_posts}", f"user_id = %s OR {own_posts}", [job.target_id, job.target_id]
+
+
+def _collect_doomed_comments(cursor, job):
+    """
+    (Re)fills a session temp table with the ids of every comment to delete:
+    the scope's comments plus all replies below them, whoever wrote them.
+    Returns how many there are.
+    """
+    comment_table = Comment._meta.db_table
+    comment_scope, _, params = _scopes(job)
+    cursor.execute(f"CREATE TEMP TABLE IF NOT EXISTS {_DOOMED_COMMENTS} (id bigint PRIMARY KEY)")
+    cursor.execute(f"TRUNCATE {_DOOMED_COMMENTS}")
+    cursor.execute(
+        f"""
+        INSERT INTO {_DOOMED_COMMENTS} (id)
+        WITH RECURSIVE doomed(id) AS (
+            SELECT id FROM {comment_table} WHERE {comment_scope}
+            UNION
+            SELECT c.id FROM {comment_table} c JOIN doomed d ON c.parent_comment_id = d.id
+        )
+        SELECT id FROM doomed
+        """,
+        params,
+    )
+    return cursor.rowcount
+
+
+def _apply_counter_deltas(cursor, column, deltas):
+    """Subtracts {post_id: n} from the given counter column of the surviving posts."""
+    if not deltas:
+        return
+    post_table = Post._meta.db_table
+    values_sql = ', '.join(['(%s::bigint, %s::integer)'] * len(deltas))
+    params = [value for item in sorted(deltas.items()) for value in item]
+    cursor.execute(
+        f"""
+        UPDATE {post_table} p SET {column} = GREATEST(p.{column} - d.n, 0)
+        FROM (VALUES {values_sql}) AS d(id, n)
+        WHERE p.id = d.id
+        """,
+        params,
+    )
+
+
+def _delete_comment_batch(cursor, batch_size):
+    """
+    Deletes up to batch_size doomed comments that have no replies left (newest
+    first, so a thread is removed bottom-up) and lowers their parents'
+    reply_count. Returns {post_id: deleted}.
+    """
+    comment_table = Comment._meta.db_table
+    cursor.execute(
+        f"""
+        WITH batch AS (
+            SELECT t.id FROM {_DOOMED_COMMENTS} t
+            WHERE NOT EXISTS (SELECT 1 FROM {comment_table} c WHERE c.parent_comment_id = t.id)
+            ORDER BY t.id DESC
+            LIMIT %s
+        ), gone AS (
+            DELETE FROM {comment_table} c USING batch WHERE c.id = batch.id
+            RETURNING c.post_id, c.parent_comment_id
+        ), parents AS (
+            -- A batch only holds leaves, so no parent is deleted by the same statement
+            UPDATE {comment_table} p SET reply_count = GREATEST(p.reply_count - g.n, 0)
+            FROM (
+                SELECT parent_comment_id, COUNT(*) AS n FROM gone
+                WHERE parent_comment_id IS NOT NULL GROUP BY parent_comment_id
+            ) g
+            WHERE p.id = g.parent_comment_id
+        ), forgotten AS (
+            DELETE FROM {_DOOMED_COMMENTS} t USING batch WHERE t.id = batch.id
+            RETURNING t.id
+        )
+        SELECT post_id, COUNT(*) FROM gone GROUP BY post_id
+        UNION ALL
+        SELECT NULL, COUNT(*) FROM forgotten
+        """,
+        [batch_size],
+    )
+    deleted = {}
+    picked = 0
+    for post_id, count in cursor.fetchall():
+        if post_id is None:
+            picked = count
+        else:
+            deleted[post_id] = count
+    return deleted, picked
+
+
+def _delete_hype_batch(cursor, job, batch_size):
+    """Deletes up to batch_size of the job's hypes, newest first. Returns {post_id: deleted}."""
+    hype_table = Hype._meta.db_table
+    _, hype_scope, params = _scopes(job)
+    cursor.execute(
+        f"""
+        WITH gone AS (
+            DELETE FROM {hype_table}
+            WHERE id IN (
+                SELECT id FROM {hype_table} WHERE {hype_scope} ORDER BY id DESC LIMIT %s
+            )
+            RETURNING post_id
+        )
+        SELECT post_id, COUNT(*) FROM gone GROUP BY post_id
+        """,
+        [*params, batch_size],
+    )
+    return dict(cursor.fetchall())
+
+
+def _record_progress(job, **increments):
+    DeletionJob.objects.filter(pk=job.pk).update(
+        batches=F('batches') + 1,
+        **{field: F(field) + value for field, value in increments.items()},
+    )
+
+
+# ----------------------------------------------------------------------
+# 3. Running a Job (`manage.py process_deletions`)
+# ----------------------------------------------------------------------
+
+def run_deletion_job(job, batch_size=DEFAULT_BATCH_SIZE, pause=0.0, log=None):
+    """
+    Removes the job's comments (whole reply trees), then its hypes, then its
+    posts and finally the user, batch by batch. Counters of posts that survive
+    are decremented with each batch and their hot scores refreshed; the Feed
+    tag deltas are applied when the job finishes. Safe to re-run after a crash.
+    """
+    DeletionJob.objects.filter(pk=job.pk).update(
+        status='RUNNING', started_at=job.started_at or timezone.now(), last_error='',
+    )
+
+    def step(message):
+        if log:
+            log(message)
+        if pause:
+            time.sleep(pause)
+
+    try:
+        # --- Comments (leaves first, so no batch strands a reply) ---
+        with connection.cursor() as cursor:
+            remaining = _collect_doomed_comments(cursor, job)
+        while remaining:
+            with transaction.atomic(), connection.cursor() as cursor:
+                deleted, picked = _delete_comment_batch(cursor, batch_size)
+                _apply_counter_deltas(cursor, 'comment_count', deleted)
+                record_post_changes(deleted, counts_only=True)
+                _record_progress(job, comments_deleted=sum(deleted.values()))
+            refresh_post_scores(deleted)
+            step(f"{job}: deleted {sum(deleted.values())} comment(s)")
+
+            if not picked:
+                # Replies may have been added since the ids were collected
+                with connection.cursor() as cursor:
+                    remaining = _collect_doomed_comments(cursor, job)
+
+        # --- Hypes ---
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                deleted = _delete_hype_batch(cursor, job, batch_size)
+                if not deleted:
+                    break
+                _apply_counter_deltas(cursor, 'hype_count', deleted)
+                record_post_changes(deleted, counts_only=True)
+                _record_progress(job, hypes_deleted=sum(deleted.values()))
+            refresh_post_scores(deleted)
+            step(f"{job}: deleted {sum(deleted.values())} hype(s)")
+
+        # --- Posts (their hypes/comments are gone, so each delete is cheap) ---
+        posts = Post.objects.filter(pk=job.target_id) if job.target_type == 'POST' else Post.objects.filter(creator_id=job.target_id)
+        while True:
+            with transaction.atomic():
+                post_ids = list(posts.order_by('-pk').values_list('pk', flat=True)[:batch_size])
+                if not post_ids:
+                    break
+                PostScore.objects.filter(post_id__in=post_ids).delete()
+                Post.objects.filter(pk__in=post_ids).delete()
+                _record_progress(job, posts_deleted=len(post_ids))
+            step(f"{job}: deleted {len(post_ids)} post(s)")
+
+        # --- The account itself, then the tag counts ---
+        with transaction.atomic():
+            if job.target_type == 'USER':
+                User.objects.filter(pk=job.target_id).delete()
+            adjust_feed_counts(job.tag_deltas)
+            DeletionJob.objects.filter(pk=job.pk).update(status='DONE', finished_at=timezone.now())
+
+    except Exception as exc:
+        DeletionJob.objects.filter(pk=job.pk).update(status='FAILED', last_error=repr(exc))
+        raise
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {_DOOMED_COMMENTS}")
+
+    job.refresh_from_db()
+    return job
@@ -0,0 +1,40 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from content.archive import write_segment, delete_archived, DEFAULT_SEGMENT_POSTS, DEFAULT_DELETE_BATCH
+
+
+class Command(BaseCommand):
+    """
+    Moves published posts older than CONTENT_ARCHIVE_AFTER_DAYS (with their
+    comments and hype counts) into a new compressed segment under
+    CONTENT_ARCHIVE_DIR, then deletes them from the database in small
+    batches. Each run writes at most one segment; run it again (e.g. nightly
+    from cron) until nothing is left to archive.
+    """
+    help = "Archives old posts to compressed segment files and removes them from the database."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=None,
+            help="Archive posts created more than this many days ago (default: CONTENT_ARCHIVE_AFTER_DAYS).",
+        )
+        parser.add_argument('--max-posts', type=int, default=DEFAULT_SEGMENT_POSTS, help="Posts written to the segment.")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_DELETE_BATCH, help="Posts deleted per transaction.")
+
+    def handle(self, *args, **options):
+        days = options['older_than_days']
+        if days is None:
+            days = settings.CONTENT_ARCHIVE_AFTER_DAYS
+        cutoff = timezone.now() - timedelta(days=days)
+
+        archived = write_segment(cutoff, max_posts=options['max_posts'])
+        if not archived:
+            self.stdout.write("Nothing to archive.")
+            return
+        removed = delete_archived(archived, batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {len(archived)} post(s); removed {removed} from the database "
+            f"({len(archived) - removed} changed meanwhile and stay live)."
+        ))
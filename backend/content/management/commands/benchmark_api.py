@@ -0,0 +1,309 @@
+import json
+import math
+import time
+import uuid
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import get_resolver, reverse, URLResolver
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from accounts.models import User, OTP
+from content.changes import make_token
+from content.models import Post, Comment, Feed, ContentChange, MediaBlob
+
+# ----------------------------------------------------------------------
+# Endpoint table: (url name, method, build(ctx) -> (url kwargs, payload))
+#
+# Every named route in content.urls and social_backend.urls should have at
+# least one entry; routes without one are reported as "not covered". A name
+# may carry a variant suffix ('post-list-create[ranked]') to benchmark the
+# same route with different parameters under its own entry. Each
+# request runs inside a transaction that is rolled back, so write endpoints
+# can be hit repeatedly against the same data.
+# ----------------------------------------------------------------------
+
+def _unique_email(ctx):
+    return f"bench_{uuid.uuid4().hex[:12]}@example.com"
+
+
+def _final_register(ctx):
+    email = _unique_email(ctx)
+    OTP.objects.create(email=email, otp_code='123456')
+    return {}, {
+        'email': email,
+        'otp_code': '123456',
+        'username': f"bench_{uuid.uuid4().hex[:12]}",
+        'password': 'Bench-password-123',
+        'password_confirm': 'Bench-password-123',
+    }
+
+
+def _comment_delete(ctx):
+    comment = Comment.objects.create(user=ctx.user, post=ctx.post, text='benchmark')
+    return {'content_id': ctx.post.content_id, 'pk': comment.pk}, {}
+
+
+
+def _sync_batch(ctx):
+    # Fresh client ids every time, so each run applies the batch rather than replaying it
+    prefix = uuid.uuid4().hex[:8]
+    actions = []
+    for n, content_id in enumerate(ctx.batch_ids[:10]):
+        actions.append({'id': f"{prefix}-hype-{n}", 'type': 'hype', 'post': content_id})
+    actions.append({'id': f"{prefix}-comment", 'type': 'comment', 'post': str(ctx.post.content_id), 'text': 'Synced comment'})
+    actions.append({'id': f"{prefix}-reply", 'type': 'comment', 'post': str(ctx.post.content_id), 'text': 'Synced reply', 'parent': f"{prefix}-comment"})
+    actions.append({'id': f"{prefix}-unhype", 'type': 'unhype', 'post': ctx.batch_ids[0]})
+    return {}, {'actions': actions}
+
+ENDPOINTS = [
+    # --- content.urls ---
+    ('post-list-create', 'GET', lambda ctx: ({}, {})),
+    ('post-list-create[ranked]', 'GET', lambda ctx: ({}, {'order': 'ranked'})),
+    ('post-list-create', 'POST', lambda ctx: ({}, {
+        'content_type': 'TEXT', 'text_content': 'Benchmark post #bench', 'feed_types': ctx.tags[:2],
+    })),
+    ('user-post-list', 'GET', lambda ctx: ({}, {})),
+    ('public-user-post-list', 'GET', lambda ctx: ({'user_is': ctx.author.user_is}, {})),
+    ('post-detail', 'GET', lambda ctx: ({'content_id': ctx.post.content_id}, {})),
+    ('media-blob', 'GET', lambda ctx: ({'sha256': ctx.blob_sha256}, {})),
+    ('post-similar', 'GET', lambda ctx: ({'content_id': ctx.post.content_id}, {})),
+    ('post-detail', 'PATCH', lambda ctx: ({'content_id': ctx.own_post.content_id}, {
+        'description': 'Edited by the benchmark', 'feed_types': ctx.tags[1:],
+    })),
+    ('post-batch', 'GET', lambda ctx: ({}, {'ids': ','.join(ctx.batch_ids)})),
+    ('post-changes', 'GET', lambda ctx: ({}, {'since': ctx.changes_token, 'posts': ','.join(ctx.batch_ids)})),
+    ('post-list-by-feed_types', 'GET', lambda ctx: ({}, {'feed_types': ','.join(ctx.tags[:3])})),
+    ('post-trending', 'GET', lambda ctx: ({}, {})),
+    ('post-hype-toggle', 'POST', lambda ctx: ({'content_id': ctx.post.content_id}, {})),
+    ('post-sync', 'POST', _sync_batch),
+    ('comment-list-create', 'GET', lambda ctx: ({'content_id': ctx.post.content_id}, {})),
+    ('comment-list-create', 'POST', lambda ctx: ({'content_id': ctx.post.content_id}, {'text': 'Benchmark comment'})),
+    ('comment-delete', 'DELETE', _comment_delete),
+    ('comment-replies', 'GET', lambda ctx: ({'content_id': ctx.post.content_id, 'pk': ctx.thread_comment.pk}, {})),
+    ('feed-tag-list', 'GET', lambda ctx: ({}, {})),
+    ('feed-tag-trending', 'GET', lambda ctx: ({}, {'window': '24h'})),
+    ('feed-tag-related', 'GET', lambda ctx: ({'tag': (ctx.tags or ['GENERAL'])[0]}, {})),
+
+    # --- social_backend.urls (accounts) ---
+    ('check_username', 'GET', lambda ctx: ({}, {'username': ctx.user.username})),
+    ('request_otp', 'POST', lambda ctx: ({}, {'email': _unique_email(ctx)})),
+    ('final_register', 'POST', _final_register),
+    ('token_obtain_pair', 'POST', lambda ctx: ({}, {'email': ctx.user.email, 'password': ctx.password})),
+    ('token_refresh', 'POST', lambda ctx: ({}, {'refresh': ctx.refresh})),
+    ('token_verify', 'POST', lambda ctx: ({}, {'token': ctx.access})),
+    ('user_profile_update', 'GET', lambda ctx: ({}, {})),
+    ('user_profile_update', 'PATCH', lambda ctx: ({}, {'department': 'CSE'})),
+]
+
+
+class BenchmarkContext:
+    """Sample objects the endpoint table builds its requests from."""
+
+    def __init__(self, user, password):
+        self.user = user
+        self.password = password
+
+        published = Post.objects.filter(is_published=True)
+        # The busiest post makes the per-post endpoints work hardest
+        self.post = published.order_by('-comment_count', '-hype_count').first()
+        author_id = (
+            published.values('creator').order_by().annotate(n=Count('pk')).order_by('-n')
+            .values_list('creator', flat=True).first()
+        )
+        self.author = User.objects.get(pk=author_id)
+        self.own_post = published.filter(creator=user).order_by('-created_at').first()
+        self.thread_comment = Comment.objects.filter(post=self.post, parent_comment__isnull=True).order_by('-reply_count').first()
+        # A full batch: the newest published posts plus one id that does not exist
+        batch_size = 50
+        self.batch_ids = [str(content_id) for content_id in published.values_list('content_id', flat=True)[:batch_size - 1]]
+        self.batch_ids.append(str(uuid.uuid4()))
+        # A poll that is 50 changes behind, holding the batch above
+        recent = list(ContentChange.objects.order_by('-seq').values_list('seq', flat=True)[:50])
+        self.changes_token = make_token(recent[-1] - 1 if recent else 0)
+        self.tags = list(Feed.objects.order_by('-total_used').values_list('tag', flat=True)[:3])
+        # A stored file when there is one (else the lookup misses)
+        self.blob_sha256 = MediaBlob.objects.values_list('sha256', flat=True).first() or '0' * 64
+
+        refresh = RefreshToken.for_user(user)
+        self.refresh = str(refresh)
+        self.access = str(refresh.access_token)
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    # The smallest value with at least q% of the values at or below it
+    index = max(0, min(len(sorted_values) - 1, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def url_name(name):
+    """The route name of an endpoint table entry, without its variant suffix."""
+    return name.split('[')[0]
+
+
+def named_routes(patterns=None, namespace=None):
+    """Yields the names of all routes outside the admin site."""
+    for pattern in patterns if patterns is not None else get_resolver().url_patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace == 'admin':
+                continue
+            yield from named_routes(pattern.url_patterns, pattern.namespace)
+        elif pattern.name:
+            yield f"{namespace}:{pattern.name}" if namespace else pattern.name
+
+
+class SQLRecorder:
+    """connection.execute_wrapper hook counting statements and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+class Command(BaseCommand):
+    """
+    Drives every API endpoint through the Django test client against the
+    current database (seed it first with `manage.py seed_content`) and reports
+    p50/p95/p99 latency, SQL query count and SQL time per endpoint. Results are
+    saved as JSON and can be compared against an earlier run.
+    """
+    help = "Benchmarks every API endpoint and writes latency/SQL statistics as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50, help="Timed requests per endpoint.")
+        parser.add_argument('--warmup', type=int, default=3, help="Untimed requests per endpoint.")
+        parser.add_argument('--user', help="Email of the user to authenticate as (default: the first seeded user with posts).")
+        parser.add_argument('--password', default='password123', help="That user's password (for the login endpoint).")
+        parser.add_argument('--only', nargs='+', help="Only run these url names.")
+        parser.add_argument('--output', default='bench_output.json', help="Where to write the JSON results.")
+        parser.add_argument('--compare', help="Earlier results file to compare against.")
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = User.objects.filter(email=options['user']).first()
+        else:
+            active = User.objects.filter(is_active=True, created_posts__isnull=False, studentprofile__isnull=False)
+            user = (
+                active.filter(username__startswith='seed_').order_by('pk').first()
+                or active.order_by('pk').first()
+            )
+        if user is None or not Post.objects.filter(is_published=True).exists():
+            raise CommandError("No data to benchmark against; run `manage.py seed_content` first.")
+
+        ctx = BenchmarkContext(user, options['password'])
+        client = Client(
+            headers={'Authorization': f"Bearer {ctx.access}"},
+            raise_request_exception=False,  # report a 500 instead of aborting the run
+        )
+
+        setup_test_environment()  # locmem email backend, 'testserver' allowed
+        try:
+            with override_settings(DEBUG=False):
+                results = self.run_endpoints(client, ctx, options)
+        finally:
+            teardown_test_environment()
+
+        covered = {url_name(name) for name, _, _ in ENDPOINTS}
+        uncovered = sorted(set(named_routes()) - covered)
+
+        report = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'iterations': options['iterations'],
+                'database': settings.DATABASES['default']['NAME'],
+                'rows': {
+                    'users': User.objects.count(),
+                    'posts': Post.objects.count(),
+                    'comments': Comment.objects.count(),
+                },
+                'uncovered_routes': uncovered,
+            },
+            'results': results,
+        }
+
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+        previous = None
+        if options['compare']:
+            with open(options['compare']) as fh:
+                previous = json.load(fh)['results']
+
+        self.print_report(results, previous)
+        for name in uncovered:
+            self.stdout.write(self.style.WARNING(f"Not covered by the endpoint table: {name}"))
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def run_endpoints(self, client, ctx, options):
+        results = {}
+        for name, method, build in ENDPOINTS:
+            if options['only'] and not {name, url_name(name)} & set(options['only']):
+                continue
+
+            latencies, query_counts, sql_times, statuses = [], [], [], set()
+            for i in range(options['warmup'] + options['iterations']):
+                recorder = SQLRecorder()
+                with transaction.atomic():
+                    kwargs, payload = build(ctx)
+                    url = reverse(url_name(name), kwargs=kwargs)
+                    with connection.execute_wrapper(recorder):
+                        start = time.perf_counter()
+                        response = self.send(client, method, url, payload)
+                        elapsed = time.perf_counter() - start
+                    transaction.set_rollback(True)
+
+                if i < options['warmup']:
+                    continue
+                statuses.add(response.status_code)
+                latencies.append(elapsed * 1000)
+                query_counts.append(recorder.count)
+                sql_times.append(recorder.seconds * 1000)
+
+            latencies.sort()
+            results[f"{method} {name}"] = {
+                'url': url,
+                'status': sorted(statuses),
+                'p50_ms': percentile(latencies, 50),
+                'p95_ms': percentile(latencies, 95),
+                'p99_ms': percentile(latencies, 99),
+                'queries': max(query_counts),
+                'sql_ms_mean': sum(sql_times) / len(sql_times),
+            }
+        return results
+
+    def send(self, client, method, url, payload):
+        if method == 'GET':
+            return client.get(url, payload)
+        return getattr(client, method.lower())(url, data=payload, content_type='application/json')
+
+    def print_report(self, results, previous):
+        header = f"{'endpoint':<36} {'status':<10} {'p50':>8} {'p95':>8} {'p99':>8} {'queries':>8} {'sql ms':>8}"
+        if previous:
+            header += f" {'p95 vs prev':>12}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+
+        for key, row in results.items():
+            line = (
+                f"{key:<36} {','.join(map(str, row['status'])):<10} "
+                f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} "
+                f"{row['queries']:>8} {row['sql_ms_mean']:>8.2f}"
+            )
+            if previous and key in previous and previous[key]['p95_ms']:
+                change = (row['p95_ms'] - previous[key]['p95_ms']) / previous[key]['p95_ms'] * 100
+                line += f" {change:>+11.1f}%"
+            self.stdout.write(line)
@@ -0,0 +1,154 @@
+import json
+import random
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils import timezone
+from accounts.models import User
+from content.models import Post, Hype
+from .benchmark_api import percentile
+
+# ----------------------------------------------------------------------
+# Hype table micro-benchmark
+#
+# Times the statements behind the hype toggle and the hype counts directly
+# through the ORM, each inside a transaction that is rolled back. Run it
+# before and after a change to the Hype table (e.g. migration 0018, which
+# partitions it) and pass the first output to --compare.
+# ----------------------------------------------------------------------
+
+
+def _toggle_on(sample):
+    user_id, post_id = sample['free']
+    Hype.objects.create(user_id=user_id, post_id=post_id)
+
+
+def _toggle_off(sample):
+    user_id, post_id = sample['hyped']
+    Hype.objects.filter(user_id=user_id, post_id=post_id).delete()
+
+
+def _is_hyped(sample):
+    user_id, post_id = sample['hyped']
+    Hype.objects.filter(user_id=user_id, post_id=post_id).exists()
+
+
+def _count_post(sample):
+    Hype.objects.filter(post_id=sample['hyped'][1]).count()
+
+
+def _count_popular_post(sample):
+    Hype.objects.filter(post_id=sample['popular']).count()
+
+
+def _count_user(sample):
+    Hype.objects.filter(user_id=sample['hyped'][0]).count()
+
+
+OPERATIONS = [
+    ('toggle on', _toggle_on),
+    ('toggle off', _toggle_off),
+    ('is hyped', _is_hyped),
+    ('count per post', _count_post),
+    ('count most hyped post', _count_popular_post),
+    ('count per user', _count_user),
+]
+
+
+class Command(BaseCommand):
+    """
+    Reports p50/p95/p99 latency of hype toggles and hype counts against the
+    current database (seed it first with `manage.py seed_content`), together
+    with how the table is stored, and saves the results as JSON.
+    """
+    help = "Benchmarks Hype toggle and count latency and writes the statistics as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help="Timed runs per operation.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed for the sampled users/posts.")
+        parser.add_argument('--output', default='bench_hypes.json', help="Where to write the JSON results.")
+        parser.add_argument('--compare', help="Earlier results file to compare against.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        hyped = list(Hype.objects.order_by('?').values_list('user_id', 'post_id')[:options['iterations']])
+        user_ids = list(User.objects.filter(is_active=True).values_list('pk', flat=True)[:1000])
+        post_ids = list(Post.objects.filter(is_published=True).values_list('pk', flat=True)[:1000])
+        popular = Post.objects.order_by('-hype_count').values_list('pk', flat=True).first()
+        if not hyped or not user_ids or not post_ids:
+            raise CommandError("No hypes to benchmark against; run `manage.py seed_content` first.")
+
+        taken = set(Hype.objects.filter(user_id__in=user_ids, post_id__in=post_ids).values_list('user_id', 'post_id'))
+        free = [pair for pair in ((rng.choice(user_ids), rng.choice(post_ids)) for _ in range(options['iterations'] * 4)) if pair not in taken]
+        if not free:
+            raise CommandError("Every sampled user has hyped every sampled post; nothing to toggle on.")
+
+        results = {}
+        for name, operation in OPERATIONS:
+            latencies = []
+            for i in range(options['iterations']):
+                sample = {'hyped': hyped[i % len(hyped)], 'free': free[i % len(free)], 'popular': popular}
+                with transaction.atomic():
+                    start = time.perf_counter()
+                    operation(sample)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    transaction.set_rollback(True)
+            latencies.sort()
+            results[name] = {
+                'p50_ms': percentile(latencies, 50),
+                'p95_ms': percentile(latencies, 95),
+                'p99_ms': percentile(latencies, 99),
+            }
+
+        report = {
+            'meta': {
+                'timestamp': timezone.now().isoformat(),
+                'iterations': options['iterations'],
+                'storage': self.storage(),
+                'rows': Hype.objects.count(),
+                'posts_with_hypes': Hype.objects.values('post_id').annotate(n=Count('pk')).count(),
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w') as fh:
+            json.dump(report, fh, indent=2)
+
+        previous = None
+        if options['compare']:
+            with open(options['compare']) as fh:
+                previous = json.load(fh)
+
+        self.stdout.write(f"content_hype: {report['meta']['storage']}, {report['meta']['rows']} rows")
+        if previous:
+            self.stdout.write(f"compared with: {previous['meta']['storage']}, {previous['meta']['rows']} rows")
+        self.print_report(results, previous and previous['results'])
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    def storage(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT c.relkind, COUNT(i.inhrelid)
+                FROM pg_class c LEFT JOIN pg_inherits i ON i.inhparent = c.oid
+                WHERE c.oid = %s::regclass
+                GROUP BY c.relkind
+                """,
+                [Hype._meta.db_table],
+            )
+            relkind, partitions = cursor.fetchone()
+        return f"partitioned ({partitions} partitions)" if relkind == 'p' else 'plain table'
+
+    def print_report(self, results, previous):
+        header = f"{'operation':<24} {'p50':>8} {'p95':>8} {'p99':>8}"
+        if previous:
+            header += f" {'p95 vs prev':>12}"
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+
+        for key, row in results.items():
+            line = f"{key:<24} {row['p50_ms']:>8.3f} {row['p95_ms']:>8.3f} {row['p99_ms']:>8.3f}"
+            if previous and key in previous and previous[key]['p95_ms']:
+                change = (row['p95_ms'] - previous[key]['p95_ms']) / previous[key]['p95_ms'] * 100
+                line += f" {change:>+11.1f}%"
+            self.stdout.write(line)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from content.related_tags import build_tag_cooccurrence
+
+
+class Command(BaseCommand):
+    """
+    Adds the posts created since the last run to the tag co-occurrence counts
+    and refreshes the related tags stored on the affected Feed rows.
+    Intended to run periodically (e.g. every 15 minutes from cron); run it with
+    --full nightly to account for edited, unpublished and deleted posts.
+    """
+    help = "Updates TagCooccurrence from new posts and refreshes Feed.related_tags."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Recount every published post instead of only new ones.")
+
+    def handle(self, *args, **options):
+        read, rescored = build_tag_cooccurrence(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Counted {read} new post(s); refreshed related tags of {rescored} tag(s)."
+        ))
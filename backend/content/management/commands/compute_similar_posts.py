@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from content.similar import compute_similar_posts
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the co-hype neighbours of the recent posts affected by hypes
+    added since the last run. Intended to run periodically (e.g. every
+    10 minutes from cron); --full rebuilds the whole window, which also picks
+    up un-hypes.
+    """
+    help = "Updates the PostSimilarity table from new hypes (co-hype cosine similarity)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help="Recompute every recent post, not just those affected by new hypes.")
+
+    def handle(self, *args, **options):
+        read, recomputed, pruned = compute_similar_posts(full=options['full'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Read {read} hype(s); recomputed {recomputed} post(s); pruned {pruned} stale row(s)."
+        ))
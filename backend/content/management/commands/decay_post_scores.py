@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from content.trending import decay_post_scores
+
+
+class Command(BaseCommand):
+    """
+    Rescores every tracked hot post from its stored counters and prunes posts
+    that are unpublished or older than HOT_POSTS_MAX_AGE.
+    Intended to run periodically (e.g. every 15 minutes from cron); also run it
+    once after deploying the PostScore table to seed the scores.
+    """
+    help = "Re-decays hot post scores and prunes stale posts from the PostScore table."
+
+    def handle(self, *args, **options):
+        rescored, pruned = decay_post_scores()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rescored {rescored} post(s); pruned {pruned} stale score(s)."
+        ))
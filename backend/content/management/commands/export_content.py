@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from content.transfer import export_content, open_stream, MODEL_ORDER, DEFAULT_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    """
+    Streams users, profiles, tags, posts, hypes and comments to a gzip-compressed
+    NDJSON file using server-side cursors, so memory use stays flat however
+    large the tables are. Restore it with `manage.py import_content`.
+    """
+    help = "Exports content as (gzip-compressed) NDJSON. Use '-' to write uncompressed NDJSON to stdout."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Output path (e.g. backup.ndjson.gz), or '-' for stdout.")
+        parser.add_argument(
+            '--models', nargs='+', choices=MODEL_ORDER,
+            help="Only export these models (default: all)."
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help="Rows fetched per server-side cursor round trip."
+        )
+
+    def handle(self, *args, **options):
+        stream = open_stream(options['output'], 'w')
+        try:
+            counts = export_content(stream, models=options['models'], chunk_size=options['chunk_size'])
+        finally:
+            if options['output'] != '-':
+                stream.close()
+
+        summary = ', '.join(f"{count} {model}" for model, count in counts.items())
+        self.stderr.write(self.style.SUCCESS(f"Exported {summary}."))
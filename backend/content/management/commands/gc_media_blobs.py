@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from content.media import collect_unreferenced_blobs
+
+
+class Command(BaseCommand):
+    """
+    Deletes stored media blobs that no post or profile has referenced for a
+    grace period (uploads and hash lookups whose post is still being saved
+    keep their file).
+    Intended to run periodically (e.g. daily from cron).
+    """
+    help = "Removes unreferenced content-addressed media blobs and their files."
+
+    def handle(self, *args, **options):
+        removed = collect_unreferenced_blobs()
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} unreferenced blob(s)."))
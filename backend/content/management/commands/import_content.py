@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from content.transfer import import_content, open_stream, DEFAULT_CHUNK_SIZE
+from content.trending import refresh_post_scores
+
+
+class Command(BaseCommand):
+    """
+    Loads a file written by `manage.py export_content` with batched bulk inserts.
+    Users and posts are matched by user_is / content_id, so the file can be
+    loaded into a database with different primary keys; comments keep theirs.
+    """
+    help = "Imports (gzip-compressed) NDJSON written by export_content. Use '-' to read NDJSON from stdin."
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="Input path (e.g. backup.ndjson.gz), or '-' for stdin.")
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help="Rows per bulk insert (each batch commits on its own)."
+        )
+
+    def handle(self, *args, **options):
+        stream = open_stream(options['input'], 'r')
+        try:
+            counts = import_content(
+                stream,
+                batch_size=options['batch_size'],
+                log=lambda message: self.stderr.write(message) if options['verbosity'] > 1 else None,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if options['input'] != '-':
+                stream.close()
+
+        # Imported posts bypass the signals, so give the recent ones their hot score.
+        refresh_post_scores()
+
+        summary = ', '.join(
+            f"{read} {model}"
+            + (f" ({read - resolved} unresolved)" if read != resolved else '')
+            + (f" ({skipped} skipped: id already taken)" if skipped else '')
+            for model, (read, resolved, skipped) in counts.items()
+        )
+        self.stdout.write(self.style.SUCCESS(f"Imported {summary}."))
+        skipped = sum(skipped for _, _, skipped in counts.values())
+        if skipped:
+            self.stderr.write(self.style.WARNING(
+                f"{skipped} row(s) were not imported because their id already exists in this database "
+                "(replies below them were skipped too)."
+            ))
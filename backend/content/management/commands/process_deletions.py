@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from content.deletion import run_deletion_job, ACTIVE_STATUSES, DEFAULT_BATCH_SIZE
+from content.models import DeletionJob
+
+
+class Command(BaseCommand):
+    """
+    Works through the queued DeletionJobs (hidden posts and deactivated
+    accounts), removing their comments, hypes and posts in small batches with
+    one short transaction each. Interrupted jobs are resumed where they
+    stopped. Intended to run periodically (e.g. every minute from cron).
+    """
+    help = "Processes pending post/account deletions in bounded batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Rows deleted per transaction.")
+        parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between batches.")
+        parser.add_argument('--job', type=int, help="Only run the job with this id.")
+        parser.add_argument('--retry-failed', action='store_true', help="Also re-run jobs that failed before.")
+
+    def handle(self, *args, **options):
+        statuses = ACTIVE_STATUSES + (('FAILED',) if options['retry_failed'] else ())
+        jobs = DeletionJob.objects.filter(status__in=statuses)
+        if options['job']:
+            jobs = jobs.filter(pk=options['job'])
+
+        for job in list(jobs):
+            self.stdout.write(f"Running {job} ...")
+            try:
+                job = run_deletion_job(
+                    job,
+                    batch_size=options['batch_size'],
+                    pause=options['pause'],
+                    log=lambda message: self.stdout.write(f"  {message}"),
+                )
+            except Exception as exc:
+                self.stderr.write(self.style.ERROR(f"{job} failed: {exc!r}"))
+                continue
+
+            self.stdout.write(self.style.SUCCESS(
+                f"{job}: {job.posts_deleted} post(s), {job.comments_deleted} comment(s) and "
+                f"{job.hypes_deleted} hype(s) deleted in {job.batches} batch(es)."
+            ))
@@ -0,0 +1,99 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from content.models import Post, Feed
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds Feed.total_used from the tags of the published posts, to repair
+    drift. The counts come from a single unnest/GROUP BY query read through a
+    server-side cursor, and only tags whose stored count differs are written
+    (in batches). Tags no published post uses any more drop to zero.
+    """
+    help = "Recounts Feed.total_used from Post.feed_types (drift repair)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Tags fetched and written per batch.")
+        parser.add_argument('--dry-run', action='store_true', help="Only report how many tags have drifted.")
+
+    def handle(self, *args, **options):
+        post_table = Post._meta.db_table
+        now = timezone.now()
+        seen = []
+        fixed = 0
+
+        with transaction.atomic():
+            with connection.chunked_cursor() as source:
+                source.execute(
+                    f"""
+                    SELECT UPPER(BTRIM(tag)) AS tag, COUNT(*)
+                    FROM {post_table}, unnest(feed_types) AS tag
+                    WHERE is_published AND BTRIM(tag) <> ''
+                    GROUP BY 1
+                    """
+                )
+                while True:
+                    rows = source.fetchmany(options['chunk_size'])
+                    if not rows:
+                        break
+                    seen.extend(tag for tag, _ in rows)
+                    fixed += self.write_counts(rows, now)
+
+            fixed += self.zero_unused(seen, now)
+
+            if options['dry_run']:
+                transaction.set_rollback(True)
+
+        verb = "would be corrected" if options['dry_run'] else "corrected"
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(seen)} tag(s) in use; {fixed} Feed count(s) {verb}."
+        ))
+
+    # Rank = total_used + max(0, 7 - whole days since last use) * 0.5 (see content/signals.py)
+    RANK_SQL = "{total} + GREATEST(0, 7 - FLOOR(EXTRACT(EPOCH FROM (%s - f.last_used_at)) / 86400)) * 0.5"
+
+    def write_counts(self, rows, now):
+        """Sets total_used for the drifted tags of one chunk (creating missing tags); returns how many."""
+        table = Feed._meta.db_table
+        values_sql = ', '.join(['(%s::varchar, %s::integer)'] * len(rows))
+        params = [value for row in rows for value in row]
+        rank = self.RANK_SQL.format(total='d.n')
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH d(tag, n) AS (VALUES {values_sql}),
+                updated AS (
+                    UPDATE {table} f SET total_used = d.n, "Rank" = {rank}
+                    FROM d
+                    WHERE f.tag = d.tag AND f.total_used <> d.n
+                    RETURNING f.tag
+                ),
+                inserted AS (
+                    INSERT INTO {table} (tag, total_used, "Rank", created_at, last_used_at, related_tags)
+                    SELECT d.tag, d.n, d.n, %s, %s, '[]'::jsonb
+                    FROM d
+                    WHERE NOT EXISTS (SELECT 1 FROM {table} f WHERE f.tag = d.tag)
+                    ON CONFLICT (tag) DO NOTHING
+                    RETURNING tag
+                )
+                SELECT (SELECT COUNT(*) FROM updated) + (SELECT COUNT(*) FROM inserted)
+                """,
+                [*params, now, now, now],
+            )
+            return cursor.fetchone()[0]
+
+    def zero_unused(self, seen, now):
+        """Sets total_used = 0 for tags that no published post uses; returns how many."""
+        table = Feed._meta.db_table
+        rank = self.RANK_SQL.format(total='0')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE {table} f SET total_used = 0, "Rank" = {rank}
+                WHERE f.total_used <> 0 AND NOT (f.tag = ANY(%s))
+                """,
+                [now, seen],
+            )
+            return cursor.rowcount
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from content.trending import rollup_tag_buckets
+
+
+class Command(BaseCommand):
+    """
+    Rolls hourly tag usage buckets up into daily buckets and prunes expired ones.
+    Intended to run periodically (e.g. hourly from cron).
+    """
+    help = "Rolls up old hourly TagUsageBucket rows into daily buckets and prunes expired days."
+
+    def handle(self, *args, **options):
+        rolled_up, pruned = rollup_tag_buckets()
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {rolled_up} hourly bucket(s); pruned {pruned} expired daily bucket(s)."
+        ))
@@ -0,0 +1,207 @@
+import random
+import uuid
+from collections import Counter
+from datetime import timedelta
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from accounts.models import User, StudentProfile
+from content.models import Post, Hype, Comment
+from content.signals import adjust_feed_counts
+from content.transfer import preserve_timestamps
+from content.trending import add_tag_usage, refresh_post_scores
+
+COLLEGES = ['MIT', 'Stanford', 'IIT Bombay', 'IIT Delhi', 'Oxford', 'ETH Zurich', 'NUS', 'Toronto']
+DEPARTMENTS = ['CSE', 'ECE', 'MECH', 'CIVIL', 'MATH', 'PHYSICS', 'DESIGN']
+WORDS = (
+    'exam lab hackathon fest club library campus placement project notes deadline '
+    'seminar workshop sports music canteen hostel internship robotics startup'
+).split()
+
+
+class Command(BaseCommand):
+    """
+    Generates a realistic synthetic dataset for load testing:
+    users with profiles, posts whose tags follow a Zipf (power-law) distribution,
+    heavy-tailed hype counts and nested comment threads. Everything is written
+    with bulk inserts in batches of posts, and the counters, Feed statistics,
+    tag usage buckets and hot scores are filled in directly.
+    """
+    help = "Seeds the database with synthetic users, posts, hypes and nested comments."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help="Number of users to create.")
+        parser.add_argument('--posts', type=int, default=2000, help="Number of posts to create.")
+        parser.add_argument('--tags', type=int, default=300, help="Size of the tag vocabulary.")
+        parser.add_argument('--tag-skew', type=float, default=1.1, help="Zipf exponent of the tag distribution.")
+        parser.add_argument('--hypes', type=float, default=8.0, help="Mean hypes per post (Pareto distributed).")
+        parser.add_argument('--comments', type=float, default=3.0, help="Mean top-level comments per post.")
+        parser.add_argument('--reply-depth', type=int, default=3, help="Maximum depth of comment replies.")
+        parser.add_argument('--days', type=int, default=30, help="Spread post creation over this many days.")
+        parser.add_argument('--batch-size', type=int, default=500, help="Posts generated per bulk batch.")
+        parser.add_argument('--password', default='password123', help="Password set on every seeded user.")
+        parser.add_argument('--seed', type=int, default=None, help="Random seed for reproducible datasets.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.rng = rng
+        self.now = timezone.now()
+        self.options = options
+
+        tags = [f"TAG{i:04d}" for i in range(options['tags'])]
+        tag_weights = [1 / (rank ** options['tag_skew']) for rank in range(1, len(tags) + 1)]
+        self.tags, self.tag_weights = tags, tag_weights
+
+        with preserve_timestamps(User, Post, Hype, Comment):
+            user_ids = self.create_users(options['users'])
+            # Power-law activity: a few users create most posts
+            activity = [rng.paretovariate(1.2) for _ in user_ids]
+
+            feed_counts = Counter()
+            bucket_counts = Counter()
+            created_posts = 0
+            while created_posts < options['posts']:
+                size = min(options['batch_size'], options['posts'] - created_posts)
+                with transaction.atomic():
+                    self.create_batch(size, user_ids, activity, feed_counts, bucket_counts)
+                created_posts += size
+                self.stdout.write(f"  {created_posts}/{options['posts']} posts")
+
+        adjust_feed_counts(feed_counts)
+        add_tag_usage(bucket_counts)
+        refresh_post_scores()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(user_ids)} users and {created_posts} posts "
+            f"(password for every user: {options['password']!r})."
+        ))
+
+    # ------------------------------------------------------------------
+    # Users
+    # ------------------------------------------------------------------
+
+    def create_users(self, count):
+        rng = self.rng
+        run = uuid.uuid4().hex[:8]
+        # Hashing is deliberately slow; every seeded user shares one hash.
+        password = make_password(self.options['password'])
+
+        users = [
+            User(
+                username=f"seed_{run}_{i}",
+                email=f"seed_{run}_{i}@example.com",
+                password=password,
+                date_joined=self.now - timedelta(days=self.options['days'] + rng.randint(0, 30)),
+            )
+            for i in range(count)
+        ]
+        users = User.objects.bulk_create(users, batch_size=1000)
+
+        StudentProfile.objects.bulk_create([
+            StudentProfile(
+                user=user,
+                college_university=rng.choice(COLLEGES),
+                department=rng.choice(DEPARTMENTS),
+                course='B.Tech',
+                current_year=rng.randint(1, 5),
+                feed_types=rng.choices(self.tags[:50], weights=self.tag_weights[:50], k=3),
+            )
+            for user in users
+        ], batch_size=1000)
+
+        return [user.pk for user in users]
+
+    # ------------------------------------------------------------------
+    # Posts, Hypes, Comments
+    # ------------------------------------------------------------------
+
+    def create_batch(self, size, user_ids, activity, feed_counts, bucket_counts):
+        rng, options = self.rng, self.options
+        span_seconds = options['days'] * 86400
+
+        posts = []
+        for _ in range(size):
+            created_at = self.now - timedelta(seconds=rng.uniform(0, span_seconds))
+            feed_types = sorted(set(rng.choices(self.tags, weights=self.tag_weights, k=rng.randint(1, 4))))
+            text = ' '.join(rng.choices(WORDS, k=rng.randint(5, 40)))
+            post = Post(
+                creator_id=rng.choices(user_ids, weights=activity)[0],
+                content_type='TEXT',
+                text_content=text,
+                description=text[:80],
+                feed_types=feed_types,
+                created_at=created_at,
+                updated_at=created_at,
+                is_published=rng.random() > 0.02,
+            )
+            # Heavy-tailed engagement, capped by the number of users
+            post.hype_count = min(int(rng.paretovariate(1.5) * options['hypes'] / 3), len(user_ids))
+            posts.append(post)
+
+            if post.is_published:
+                for tag in feed_types:
+                    feed_counts[tag] += 1
+                    bucket_counts[(tag, created_at.replace(minute=0, second=0, microsecond=0))] += 1
+
+        posts = Post.objects.bulk_create(posts)
+
+        hypes = []
+        for post in posts:
+            for user_id in rng.sample(user_ids, post.hype_count):
+                hypes.append(Hype(
+                    user_id=user_id,
+                    post=post,
+                    created_at=post.created_at + timedelta(seconds=rng.uniform(0, 86400)),
+                ))
+        Hype.objects.bulk_create(hypes, batch_size=5000)
+
+        comment_counts = self.create_comments(posts, user_ids)
+
+        for post in posts:
+            post.comment_count = comment_counts[post.pk]
+        Post.objects.bulk_update(posts, ['comment_count'], batch_size=1000)
+
+    def create_comments(self, posts, user_ids):
+        """Creates top-level comments, then each reply level in one bulk insert per level (with path, depth and reply_count)."""
+        rng, options = self.rng, self.options
+        comment_counts = Counter()
+
+        level = []
+        for post in posts:
+            for _ in range(int(rng.expovariate(1 / options['comments'])) if options['comments'] else 0):
+                level.append(Comment(
+                    user_id=rng.choice(user_ids),
+                    post=post,
+                    text=' '.join(rng.choices(WORDS, k=rng.randint(3, 20))),
+                    created_at=post.created_at + timedelta(seconds=rng.uniform(60, 86400)),
+                ))
+
+        for depth in range(options['reply_depth'] + 1):
+            if not level:
+                break
+            level = Comment.objects.bulk_create(level, batch_size=5000)
+            for comment in level:
+                comment_counts[comment.post_id] += 1
+
+            if depth == options['reply_depth']:
+                break
+
+            # Each comment gets a geometrically shrinking number of replies
+            replies = []
+            for parent in level:
+                for _ in range(int(rng.expovariate(1.5))):
+                    reply = Comment(
+                        user_id=rng.choice(user_ids),
+                        post_id=parent.post_id,
+                        parent_comment=parent,
+                        text=' '.join(rng.choices(WORDS, k=rng.randint(3, 20))),
+                        created_at=parent.created_at + timedelta(seconds=rng.uniform(60, 3600)),
+                    )
+                    reply.set_tree_position(parent)
+                    replies.append(reply)
+                    parent.reply_count += 1
+            Comment.objects.bulk_update([parent for parent in level if parent.reply_count], ['reply_count'], batch_size=1000)
+            level = replies
+
+        return comment_counts
@@ -0,0 +1,238 @@
+import hashlib
+import os
+import re
+import tempfile
+from datetime import timedelta
+from django.apps import apps
+from django.core.files.storage import FileSystemStorage, storages
+from django.db import connection
+from django.utils import timezone
+from rest_framework import serializers
+
+# ----------------------------------------------------------------------
+# Content-addressed media (Post.media_file, StudentProfile.profile_image)
+#
+# Uploads are hashed while they are streamed to a temporary file and stored
+# once, under
+#
+#   blobs/<sha[:2]>/<sha[2:4]>/<sha256><extension>
+#
+# with a MediaBlob row. Uploading a file that is already stored only returns
+# the existing name. Clients can ask GET /api/content/media/<sha256>/ first
+# and send the hash (media_sha256 / profile_image_sha256) instead of the file.
+#
+# MediaBlob.refcount follows the field values: the post_save/post_delete
+# signals adjust it (content/signals.py). Archiving a post keeps its
+# reference. Files stored before content addressing (post_media/...,
+# profile_pics/...) are served as before and not counted.
+#
+# An unreferenced blob records since when (unreferenced_since): set when
+# refcount drops to 0, cleared when it rises again, and restarted whenever
+# the blob is offered for reuse (a repeated upload, or GET media/<sha256>),
+# so a client that was just told the hash exists has the whole grace period
+# to save the post that references it.
+# ----------------------------------------------------------------------
+
+BLOB_DIR = 'blobs'
+
+# Blobs unreferenced for less than this are kept: the row that is about to
+# reference a fresh upload (or a hash just looked up) may not have been saved yet
+UNREFERENCED_GRACE = timedelta(days=1)
+
+_SHA256 = re.compile(r'^[0-9a-f]{64}$')
+
+
+def _media_blob():
+    # content.models imports accounts.models, which uses this module
+    return apps.get_model('content', 'MediaBlob')
+
+
+def blob_path(sha256, extension=''):
+    return f"{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}"
+
+
+def blob_hash(name):
+    """The sha256 a stored file name was derived from, or None for other files."""
+    parts = (name or '').split('/')
+    if len(parts) != 4 or parts[0] != BLOB_DIR:
+        return None
+    sha256 = os.path.splitext(parts[3])[0]
+    return sha256 if _SHA256.match(sha256) else None
+
+
+def normalize_hash(value):
+    value = str(value).strip().lower()
+    return value if _SHA256.match(value) else None
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    FileSystemStorage that names each file after its contents. The name
+    generated from upload_to only contributes the extension.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Identical contents share one name; different contents never collide
+        return name
+
+    def _save(self, name, content):
+        extension = os.path.splitext(name)[1].lower()
+        if not re.fullmatch(r'\.[a-z0-9]{1,8}', extension):
+            extension = ''
+        scratch = self.path(os.path.join(BLOB_DIR, 'incoming'))
+        os.makedirs(scratch, exist_ok=True)
+
+        digest, size = hashlib.sha256(), 0
+        descriptor, temporary = tempfile.mkstemp(dir=scratch)
+        try:
+            with os.fdopen(descriptor, 'wb') as out:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    size += len(chunk)
+                    out.write(chunk)
+            stored = register_blob(digest.hexdigest(), blob_path(digest.hexdigest(), extension), size)
+            target = self.path(stored)
+            if not os.path.exists(target):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.chmod(temporary, self.file_permissions_mode or 0o644)
+                os.replace(temporary, target)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+        return stored
+
+    def delete(self, name):
+        # Blobs are shared; only gc_media_blobs removes them (see delete_blob)
+        if blob_hash(name) is None:
+            super().delete(name)
+
+    def delete_blob(self, name):
+        super().delete(name)
+
+
+def media_storage():
+    """Storage of the media fields (settings.STORAGES['media'])."""
+    return storages['media']
+
+
+# ----------------------------------------------------------------------
+# Blob bookkeeping
+# ----------------------------------------------------------------------
+
+def register_blob(sha256, name, size):
+    """Records a stored blob; returns its name (the existing one if the contents were stored before)."""
+    table = _media_blob()._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (sha256, name, size, refcount, unreferenced_since, created_at)
+            VALUES (%s, %s, %s, 0, %s, %s)
+            ON CONFLICT (sha256) DO UPDATE
+            SET unreferenced_since = CASE WHEN {table}.refcount = 0 THEN EXCLUDED.created_at END
+            RETURNING name
+            """,
+            [sha256, name, size, timezone.now(), timezone.now()],
+        )
+        return cursor.fetchone()[0]
+
+
+def find_blob(sha256):
+    """
+    (name, size) of the stored blob with this hash, or None. An unreferenced
+    blob's grace period restarts, as the caller is about to reference it.
+    """
+    sha256 = normalize_hash(sha256)
+    if sha256 is None:
+        return None
+    table = _media_blob()._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH offered AS (
+                UPDATE {table} SET unreferenced_since = %s
+                WHERE sha256 = %s AND refcount = 0
+                RETURNING name, size
+            )
+            SELECT name, size FROM offered
+            UNION ALL
+            SELECT name, size FROM {table} WHERE sha256 = %s AND refcount > 0
+            """,
+            [timezone.now(), sha256, sha256],
+        )
+        return cursor.fetchone()
+
+
+def adjust_blob_refs(deltas):
+    """Applies {blob name: +n / -n} to MediaBlob.refcount in one statement; other names are ignored."""
+    deltas = {name: delta for name, delta in deltas.items() if delta and blob_hash(name)}
+    if not deltas:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {_media_blob()._meta.db_table} b
+            SET refcount = GREATEST(b.refcount + d.delta, 0),
+                unreferenced_since = CASE
+                    WHEN b.refcount + d.delta > 0 THEN NULL
+                    WHEN b.refcount > 0 THEN %s
+                    ELSE b.unreferenced_since
+                END
+            FROM unnest(%s::varchar[], %s::integer[]) AS d(name, delta)
+            WHERE b.name = d.name
+            """,
+            [timezone.now(), list(deltas), list(deltas.values())],
+        )
+
+
+def collect_unreferenced_blobs(now=None):
+    """
+    Deletes the files and rows of blobs that have had no references for
+    UNREFERENCED_GRACE and that no post or profile names (a safety net for
+    counts that drifted). Returns the number of blobs removed.
+    """
+    MediaBlob = _media_blob()
+    Post = apps.get_model('content', 'Post')
+    StudentProfile = apps.get_model('accounts', 'StudentProfile')
+    cutoff = (now or timezone.now()) - UNREFERENCED_GRACE
+
+    expired = MediaBlob.objects.filter(refcount=0, unreferenced_since__lt=cutoff)
+    candidates = list(expired.values_list('name', flat=True))
+    if not candidates:
+        return 0
+    in_use = set(Post.objects.filter(media_file__in=candidates).values_list('media_file', flat=True))
+    in_use.update(StudentProfile.objects.filter(profile_image__in=candidates).values_list('profile_image', flat=True))
+
+    storage = media_storage()
+    removed = 0
+    for name in candidates:
+        if name in in_use:
+            continue
+        # Only if still expired: a save or lookup may have referenced or offered it since the read
+        if expired.filter(name=name).delete()[0]:
+            storage.delete_blob(name)
+            removed += 1
+    return removed
+
+
+# ----------------------------------------------------------------------
+# Serializer field
+# ----------------------------------------------------------------------
+
+class MediaHashField(serializers.Field):
+    """
+    The sha256 of a media field's file. Reads the hash from the stored name
+    (None for files stored before content addressing); accepts the hash of a
+    stored blob in place of uploading the same file again.
+    """
+    default_error_messages = {
+        'unknown': "No stored file has this sha256; upload the file instead.",
+    }
+
+    def to_representation(self, value):
+        return blob_hash(getattr(value, 'name', value))
+
+    def to_internal_value(self, data):
+        blob = find_blob(data)
+        if blob is None:
+            self.fail('unknown')
+        return blob[0]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 23:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0009_rename_tags_post_feed_types'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagUsageBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tag', models.CharField(max_length=50)),
+                ('granularity', models.CharField(choices=[('HOUR', 'Hourly'), ('DAY', 'Daily')], default='HOUR', max_length=4)),
+                ('bucket_start', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Tag Usage Bucket',
+                'verbose_name_plural': 'Tag Usage Buckets',
+                'indexes': [models.Index(fields=['bucket_start', 'tag'], name='tag_usage_bucket_start_idx')],
+                'constraints': [models.UniqueConstraint(fields=('tag', 'granularity', 'bucket_start'), name='unique_tag_usage_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0010_tagusagebucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostScore',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='hot_score', serialize=False, to='content.post')),
+                ('score', models.FloatField(db_index=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Hot Post Score',
+                'verbose_name_plural': 'Hot Post Scores',
+            },
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='hype_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        # Backfill the counters from the existing Hype/Comment rows
+        migrations.RunSQL(
+            sql="""
+                UPDATE content_post p SET
+                    hype_count = (SELECT COUNT(*) FROM content_hype h WHERE h.post_id = p.id),
+                    comment_count = (SELECT COUNT(*) FROM content_comment c WHERE c.post_id = p.id);
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0011_post_counters_postscore'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target_type', models.CharField(choices=[('POST', 'Post'), ('USER', 'User')], max_length=4)),
+                ('target_id', models.BigIntegerField()),
+                ('target_label', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('PENDING', 'Pending'), ('RUNNING', 'Running'), ('DONE', 'Done'), ('FAILED', 'Failed')], db_index=True, default='PENDING', max_length=7)),
+                ('tag_deltas', models.JSONField(blank=True, default=dict)),
+                ('comments_deleted', models.PositiveBigIntegerField(default=0)),
+                ('hypes_deleted', models.PositiveBigIntegerField(default=0)),
+                ('posts_deleted', models.PositiveBigIntegerField(default=0)),
+                ('batches', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Deletion Job',
+                'verbose_name_plural': 'Deletion Jobs',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['target_type', 'target_id'], name='deletion_job_target_idx')],
+            },
+        ),
+    ]
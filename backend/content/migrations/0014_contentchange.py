@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0013_syncaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentChange',
+            fields=[
+                ('post_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('content_id', models.UUIDField()),
+                ('seq', models.BigIntegerField(unique=True)),
+                ('content_seq', models.BigIntegerField(default=0)),
+                ('created_seq', models.BigIntegerField(default=0)),
+                ('state', models.CharField(choices=[('LIVE', 'Published'), ('HIDDEN', 'Unpublished'), ('DELETED', 'Deleted')], default='LIVE', max_length=7)),
+                ('changed_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Content Change',
+                'verbose_name_plural': 'Content Changes',
+            },
+        ),
+        # Shared by every row: each change takes the next number
+        migrations.RunSQL(
+            sql="CREATE SEQUENCE content_change_seq;",
+            reverse_sql="DROP SEQUENCE content_change_seq;",
+        ),
+    ]
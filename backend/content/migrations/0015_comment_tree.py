@@ -0,0 +1,63 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0014_contentchange'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['path'], name='comment_path_idx', opclasses=['text_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['parent_comment', 'created_at', 'id'], name='comment_replies_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('parent_comment__isnull', True)), fields=['post', '-created_at', '-id'], name='comment_top_level_idx'),
+        ),
+        # Backfill after the indexes: CREATE INDEX refuses to run after these UPDATEs in one transaction
+        migrations.RunSQL(
+            sql="""
+                WITH RECURSIVE tree(id, path, depth) AS (
+                    SELECT id, ''::text, 0 FROM content_comment WHERE parent_comment_id IS NULL
+                    UNION ALL
+                    SELECT c.id, t.path || t.id || '/', t.depth + 1
+                    FROM content_comment c JOIN tree t ON c.parent_comment_id = t.id
+                )
+                UPDATE content_comment c SET path = tree.path, depth = tree.depth
+                FROM tree WHERE c.id = tree.id;
+
+                UPDATE content_comment c SET reply_count = r.n
+                FROM (
+                    SELECT parent_comment_id, COUNT(*) AS n FROM content_comment
+                    WHERE parent_comment_id IS NOT NULL GROUP BY parent_comment_id
+                ) r
+                WHERE c.id = r.parent_comment_id;
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
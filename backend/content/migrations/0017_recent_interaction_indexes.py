@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0016_admin_search_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', '-created_at'], name='comment_post_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hype',
+            index=models.Index(fields=['post', '-created_at'], name='hype_post_recent_idx'),
+        ),
+    ]
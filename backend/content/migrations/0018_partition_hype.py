@@ -0,0 +1,196 @@
+import re
+from django.db import migrations, transaction
+
+# ----------------------------------------------------------------------
+# Turns content_hype into a table hash-partitioned on post_id (and back, when
+# reversed), online:
+#
+#   1. create the new table with the same columns, indexes and constraints
+#      (under temporary names) and a trigger that mirrors every insert/delete
+#      on the old table into it;
+#   2. copy the existing rows in id order, BATCH_SIZE per short transaction
+#      (rows are share-locked while copied, so a concurrent un-hype either
+#      happens before the copy or is mirrored after it);
+#   3. in one brief ACCESS EXCLUSIVE transaction, catch up, carry the id
+#      sequence over, drop the old table and give the new one its names.
+#
+# The model is unchanged: every hype lookup (toggle, is_hyped, unique
+# (user, post), per-post lists and deletes) filters on post_id and is pruned
+# to a single partition. Postgres requires the primary key to include the
+# partition key, so it becomes (id, post_id); ids stay unique (one sequence).
+# ----------------------------------------------------------------------
+
+TABLE = 'content_hype'
+NEW_TABLE = 'content_hype_rebuild'
+MIRROR = 'content_hype_mirror'
+PARTITIONS = 16
+BATCH_SIZE = 10_000
+COLUMNS = 'id, created_at, post_id, user_id'
+
+
+def _is_partitioned(cursor):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = %s::regclass", [TABLE])
+    return cursor.fetchone()[0] == 'p'
+
+
+def _temporary(name):
+    return f"{name[:55]}_rebuild"
+
+
+def _copy_structure(connection, cursor, partitioned):
+    """Creates NEW_TABLE like TABLE (partitioned or not); returns {temporary name: (final name, plain index?)}."""
+    constraints = connection.introspection.get_constraints(cursor, TABLE)
+    renames = {}
+    cursor.execute(
+        f"""
+        CREATE TABLE {NEW_TABLE} (
+            id bigint GENERATED BY DEFAULT AS IDENTITY,
+            created_at timestamp with time zone NOT NULL,
+            post_id bigint NOT NULL,
+            user_id bigint NOT NULL
+        ) {'PARTITION BY HASH (post_id)' if partitioned else ''}
+        """
+    )
+    if partitioned:
+        for remainder in range(PARTITIONS):
+            cursor.execute(
+                f"CREATE TABLE {TABLE}_p{remainder} PARTITION OF {NEW_TABLE} "
+                f"FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})"
+            )
+
+    for name, info in constraints.items():
+        temporary = _temporary(name)
+        columns = ', '.join(info['columns'])
+        if info['primary_key']:
+            key = 'id, post_id' if partitioned else 'id'
+            cursor.execute(f"ALTER TABLE {NEW_TABLE} ADD CONSTRAINT {temporary} PRIMARY KEY ({key})")
+        elif info['foreign_key']:
+            target_table, target_column = info['foreign_key']
+            cursor.execute(
+                f"ALTER TABLE {NEW_TABLE} ADD CONSTRAINT {temporary} FOREIGN KEY ({columns}) "
+                f"REFERENCES {target_table} ({target_column}) DEFERRABLE INITIALLY DEFERRED"
+            )
+        elif info['unique']:
+            # Unique constraints on a partitioned table must contain post_id; (user, post) does
+            cursor.execute(f"ALTER TABLE {NEW_TABLE} ADD CONSTRAINT {temporary} UNIQUE ({columns})")
+        elif info['index']:
+            cursor.execute("SELECT pg_get_indexdef(%s::regclass)", [name])
+            definition = cursor.fetchone()[0]
+            using = re.split(rf" ON (?:ONLY )?(?:public\.)?{TABLE} ", definition, maxsplit=1)[1]
+            cursor.execute(f"CREATE INDEX {temporary} ON {NEW_TABLE} {using}")
+        else:
+            continue
+        renames[temporary] = (name, info['index'] and not (info['primary_key'] or info['unique']))
+    return renames
+
+
+def _install_mirror(cursor):
+    cursor.execute(
+        f"""
+        CREATE FUNCTION {MIRROR}() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO {NEW_TABLE} ({COLUMNS})
+                VALUES (NEW.id, NEW.created_at, NEW.post_id, NEW.user_id)
+                ON CONFLICT DO NOTHING;
+            ELSE
+                DELETE FROM {NEW_TABLE} WHERE id = OLD.id AND post_id = OLD.post_id;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    cursor.execute(
+        f"CREATE TRIGGER {MIRROR} AFTER INSERT OR DELETE ON {TABLE} "
+        f"FOR EACH ROW EXECUTE FUNCTION {MIRROR}()"
+    )
+
+
+def _copy_batch(cursor, after_id):
+    """Copies the next BATCH_SIZE rows past after_id; returns (last id, rows) or (None, 0)."""
+    cursor.execute(
+        f"""
+        WITH batch AS (
+            SELECT {COLUMNS} FROM {TABLE} WHERE id > %s ORDER BY id LIMIT %s FOR SHARE
+        ), copied AS (
+            INSERT INTO {NEW_TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM batch ON CONFLICT DO NOTHING
+        )
+        SELECT MAX(id), COUNT(*) FROM batch
+        """,
+        [after_id, BATCH_SIZE],
+    )
+    return cursor.fetchone()
+
+
+def _swap(cursor, renames, after_id):
+    cursor.execute(f"LOCK TABLE {TABLE} IN ACCESS EXCLUSIVE MODE")
+    cursor.execute(
+        f"INSERT INTO {NEW_TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {TABLE} WHERE id > %s ON CONFLICT DO NOTHING",
+        [after_id],
+    )
+    cursor.execute(
+        f"""
+        SELECT setval(
+            pg_get_serial_sequence(%s, 'id'),
+            GREATEST(
+                COALESCE(pg_sequence_last_value(pg_get_serial_sequence(%s, 'id')::regclass), 0),
+                COALESCE((SELECT MAX(id) FROM {TABLE}), 0)
+            ) + 1,
+            false
+        )
+        """,
+        [NEW_TABLE, TABLE],
+    )
+    cursor.execute(f"DROP TABLE {TABLE}")
+    cursor.execute(f"DROP FUNCTION {MIRROR}()")
+    cursor.execute(f"ALTER TABLE {NEW_TABLE} RENAME TO {TABLE}")
+    cursor.execute(f"ALTER SEQUENCE {NEW_TABLE}_id_seq RENAME TO {TABLE}_id_seq")
+    for temporary, (name, plain_index) in renames.items():
+        if plain_index:
+            cursor.execute(f"ALTER INDEX {temporary} RENAME TO {name}")
+        else:
+            cursor.execute(f"ALTER TABLE {TABLE} RENAME CONSTRAINT {temporary} TO {name}")
+
+
+def _rebuild(schema_editor, partitioned):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if _is_partitioned(cursor) == partitioned:
+            return
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        renames = _copy_structure(connection, cursor, partitioned)
+        _install_mirror(cursor)
+
+    after_id = 0
+    while True:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            last_id, copied = _copy_batch(cursor, after_id)
+        if not copied:
+            break
+        after_id = last_id
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        _swap(cursor, renames, after_id)
+
+
+def partition_hypes(apps, schema_editor):
+    _rebuild(schema_editor, partitioned=True)
+
+
+def unpartition_hypes(apps, schema_editor):
+    _rebuild(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+    # Each copy batch commits on its own
+    atomic = False
+
+    dependencies = [
+        ('content', '0017_recent_interaction_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_hypes, unpartition_hypes),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0018_partition_hype'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobCheckpoint',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('position', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Job Checkpoint',
+                'verbose_name_plural': 'Job Checkpoints',
+            },
+        ),
+        migrations.CreateModel(
+            name='PostSimilarity',
+            fields=[
+                ('pk', models.CompositePrimaryKey('post', 'similar', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('score', models.FloatField()),
+                ('post', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='similar_posts', to='content.post')),
+                ('similar', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='similar_to', to='content.post')),
+            ],
+            options={
+                'verbose_name': 'Post Similarity',
+                'verbose_name_plural': 'Post Similarities',
+            },
+        ),
+    ]
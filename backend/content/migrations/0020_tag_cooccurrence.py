@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0019_similar_posts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagCooccurrence',
+            fields=[
+                ('pk', models.CompositePrimaryKey('tag', 'other', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('tag', models.CharField(max_length=50)),
+                ('other', models.CharField(max_length=50)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Tag Co-occurrence',
+                'verbose_name_plural': 'Tag Co-occurrences',
+            },
+        ),
+        migrations.AddField(
+            model_name='feed',
+            name='related_tags',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:26
+
+import content.media
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0020_tag_cooccurrence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('size', models.BigIntegerField()),
+                ('refcount', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Media Blob',
+                'verbose_name_plural': 'Media Blobs',
+            },
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='media_file',
+            field=models.FileField(blank=True, null=True, storage=content.media.media_storage, upload_to='post_media/%Y/%m/%d/', verbose_name='Media File (Image/Video)'),
+        ),
+    ]
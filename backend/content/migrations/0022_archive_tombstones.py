@@ -0,0 +1,25 @@
+# Generated by Django 5.2.6 on 2026-10-19 01:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0021_media_blobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveTombstone',
+            fields=[
+                ('content_id', models.UUIDField(primary_key=True, serialize=False)),
+                ('reason', models.CharField(choices=[('DELETED', 'Deleted'), ('MODERATED', 'Removed by a moderator')], default='MODERATED', max_length=9)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Archive Tombstone',
+                'verbose_name_plural': 'Archive Tombstones',
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-19 03:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0022_archive_tombstones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediablob',
+            name='unreferenced_since',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        # Blobs that are already unreferenced keep the grace period they had
+        migrations.RunSQL(
+            sql="UPDATE content_mediablob SET unreferenced_since = created_at WHERE refcount = 0;",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
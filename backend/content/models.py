@@ -1,7 +1,15 @@
 import uuid
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from accounts.models import User # Import the custom User model
+from .media import media_storage
+
+# Full-text documents behind the admin search; the GIN indexes below are built
+# on exactly these expressions, so queries must use them unchanged.
+POST_SEARCH_VECTOR = SearchVector('description', 'text_content', config='simple')
+COMMENT_SEARCH_VECTOR = SearchVector('text', config='simple')
 
 # -------------------------------------------------------------------------
 # 1. Post Model
@@ -39,6 +47,7 @@ class Post(models.Model):
     # media_url (Replaced by FileField for better Django handling)
     media_file = models.FileField(
         upload_to='post_media/%Y/%m/%d/', 
+        storage=media_storage,
         blank=True, 
         null=True,
         verbose_name="Media File (Image/Video)"
@@ -77,22 +86,63 @@ class Post(models.Model):
 
     # 5. INTERACTIONS
     
-    # Hypes (number which denote the Hypes) - Not stored directly in the model.
-    # We will get the count dynamically using the 'Hypes' ForeignKey relationship
-    # (i.e., post.Hypes.count()). This prevents race conditions and ensures accuracy.
+    # Denormalized counters for Hypes and Comments. They are only ever changed
+    # with atomic F() updates by the Hype/Comment signals (see content/signals.py),
+    # so reads never need a COUNT(*) and concurrent hypes cannot race.
+    hype_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    # Fields a full save() must never write back from a (possibly stale) in-memory copy
+    COUNTER_FIELDS = ('hype_count', 'comment_count')
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Tag lookups: feed_types @> ARRAY['CSE']
+            GinIndex(fields=['feed_types'], name='post_feed_types_gin'),
+            GinIndex(POST_SEARCH_VECTOR, name='post_search_gin'),
+        ]
         verbose_name = "Content Post"
 
     def __str__(self):
         return f"Post {self.content_id} by {self.creator.username}"
         
+    # (is_published, feed_types) as last read from / written to the database;
+    # the post_save signal diffs against it to adjust the Feed tag counts.
+    _saved_tag_state = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_tag_state()
+        return instance
+
+    def remember_tag_state(self):
+        loaded = self.__dict__
+        if 'is_published' in loaded and 'feed_types' in loaded:
+            self._saved_tag_state = (self.is_published, list(self.feed_types))
+
     def save(self, *args, **kwargs):
         # Logic to set 'updated' status
         if self.pk:
             # If the post already exists, mark it as updated
             self.updated = True
+
+            # Protect the counters: write every column except them on a full save,
+            # and never from an explicit update_fields list either
+            if not self._state.adding:
+                update_fields = kwargs.get('update_fields')
+                if update_fields is None:
+                    kwargs['update_fields'] = [
+                        field.name for field in self._meta.concrete_fields
+                        if not field.primary_key and field.name not in self.COUNTER_FIELDS
+                    ]
+                else:
+                    update_fields = [name for name in update_fields if name not in self.COUNTER_FIELDS]
+                    # A partial save still records that (and when) the post was modified
+                    if update_fields:
+                        update_fields = list(dict.fromkeys([*update_fields, 'updated', 'updated_at']))
+                    kwargs['update_fields'] = update_fields
         super().save(*args, **kwargs)
 
 # -------------------------------------------------------------------------
@@ -108,6 +158,10 @@ class Hype(models.Model):
     
     class Meta:
         unique_together = ('user', 'post')
+        indexes = [
+            # A post's most recent hypes (admin post page)
+            models.Index(fields=['post', '-created_at'], name='hype_post_recent_idx'),
+        ]
         verbose_name = "Post Hype" # Renamed for clarity
 
     def __str__(self):
@@ -145,14 +199,60 @@ class Comment(models.Model):
         blank=True, 
         related_name='replies'
     )
+
+    # path (Ids of all ancestors, root first, each followed by '/'; '' for top-level comments)
+    path = models.TextField(default='', blank=True)
+
+    # depth (0 for top-level comments, 1 for their replies, ...)
+    depth = models.PositiveSmallIntegerField(default=0)
+
+    # reply_count (Number of direct replies; maintained by signals)
+    reply_count = models.PositiveIntegerField(default=0)
     
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Subtree lookups: path LIKE '<ancestors><id>/%'
+            models.Index(fields=['path'], name='comment_path_idx', opclasses=['text_pattern_ops']),
+            # Paging through a comment's replies, oldest first
+            models.Index(fields=['parent_comment', 'created_at', 'id'], name='comment_replies_idx'),
+            # Paging through a post's top-level comments, newest first
+            models.Index(
+                fields=['post', '-created_at', '-id'], name='comment_top_level_idx',
+                condition=models.Q(parent_comment__isnull=True),
+            ),
+            # A post's most recent comments at any depth (admin post page)
+            models.Index(fields=['post', '-created_at'], name='comment_post_recent_idx'),
+            GinIndex(COMMENT_SEARCH_VECTOR, name='comment_search_gin'),
+        ]
         verbose_name = "Comment"
         verbose_name_plural = "Comments"
 
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            self.set_tree_position()
+        super().save(*args, **kwargs)
+
+    def set_tree_position(self, parent=None):
+        """Fills path/depth from the parent comment (passed in, cached on the instance, or read)."""
+        if self.parent_comment_id is None:
+            self.path, self.depth = '', 0
+            return
+        if parent is None:
+            if Comment.parent_comment.is_cached(self):
+                parent = self.parent_comment
+            else:
+                parent = Comment.objects.only('path', 'depth').get(pk=self.parent_comment_id)
+        self.path = f"{parent.path}{parent.pk}/"
+        self.depth = parent.depth + 1
+
+    @property
+    def subtree_prefix(self):
+        """The path prefix shared by every reply below this comment."""
+        return f"{self.path}{self.pk}/"
+
     def __str__(self):
         return f"Comment by {self.user.username} on Post {self.post.content_id}"
 
@@ -185,10 +285,375 @@ class Feed(models.Model):
     # last_used_at (When the tag was last used on a new published post)
     last_used_at = models.DateTimeField(auto_now=True)
 
+    # related_tags ([{"tag", "score"}, ...] best first, written by `manage.py build_tag_cooccurrence`)
+    related_tags = models.JSONField(default=list, blank=True)
+
     class Meta:
         ordering = ['-Rank', '-total_used'] # Rank by importance/popularity
         verbose_name = "Feed Tag Statistic"
         verbose_name_plural = "Feed Tag Statistics"
 
     def __str__(self):
-        return self.tag
\ No newline at end of file
+        return self.tag
+
+# -------------------------------------------------------------------------
+# 5. Tag Usage Buckets (Sliding-window trending)
+# -------------------------------------------------------------------------
+
+class TagUsageBucket(models.Model):
+    """
+    Counts how often a tag was used on new published posts within one hour
+    (or, once rolled up, one day). Used to rank trending feed_types by velocity.
+    """
+
+    GRANULARITY_CHOICES = [
+        ('HOUR', 'Hourly'),
+        ('DAY', 'Daily'),
+    ]
+
+    # tag (Normalized tag name, matches Feed.tag)
+    tag = models.CharField(max_length=50)
+
+    # granularity (HOUR buckets are rolled up into DAY buckets once they age out)
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES, default='HOUR')
+
+    # bucket_start (Start of the hour/day covered by this bucket, truncated in UTC)
+    bucket_start = models.DateTimeField()
+
+    # count (Number of new published posts that used the tag in this bucket)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tag', 'granularity', 'bucket_start'],
+                name='unique_tag_usage_bucket',
+            ),
+        ]
+        indexes = [
+            # Window queries scan a time range and group by tag
+            models.Index(fields=['bucket_start', 'tag'], name='tag_usage_bucket_start_idx'),
+        ]
+        verbose_name = "Tag Usage Bucket"
+        verbose_name_plural = "Tag Usage Buckets"
+
+    def __str__(self):
+        return f"{self.tag} @ {self.bucket_start:%Y-%m-%d %H:00} ({self.granularity}): {self.count}"
+
+
+# -------------------------------------------------------------------------
+# 6. Hot Post Scores (Trending posts)
+# -------------------------------------------------------------------------
+
+class PostScore(models.Model):
+    """
+    Time-decayed popularity score of a recent published post.
+    Maintained incrementally from the Hype/Comment signals (see content/trending.py);
+    the hot-posts endpoint reads it straight off the score index.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='hot_score'
+    )
+
+    # score (log of weighted engagement plus a term that grows with creation time)
+    score = models.FloatField(db_index=True)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Hot Post Score"
+        verbose_name_plural = "Hot Post Scores"
+
+    def __str__(self):
+        return f"Post {self.post_id}: {self.score:.4f}"
+
+
+# -------------------------------------------------------------------------
+# 7. Background Deletion Jobs
+# -------------------------------------------------------------------------
+
+class DeletionJob(models.Model):
+    """
+    A post or account that has been hidden (unpublished / deactivated) and is
+    waiting for `manage.py process_deletions` to remove it and everything that
+    depends on it in small batches (see content/deletion.py).
+
+    There is deliberately no foreign key to the target: the job outlives it.
+    """
+
+    TARGET_CHOICES = [
+        ('POST', 'Post'),
+        ('USER', 'User'),
+    ]
+
+    STATUS_CHOICES = [
+        ('PENDING', 'Pending'),
+        ('RUNNING', 'Running'),
+        ('DONE', 'Done'),
+        ('FAILED', 'Failed'),
+    ]
+
+    target_type = models.CharField(max_length=4, choices=TARGET_CHOICES)
+
+    # target_id (Primary key of the Post/User being deleted)
+    target_id = models.BigIntegerField()
+
+    # target_label (content_id / email, kept for display after the target is gone)
+    target_label = models.CharField(max_length=255)
+
+    status = models.CharField(max_length=7, choices=STATUS_CHOICES, default='PENDING', db_index=True)
+
+    # tag_deltas ({tag: -n} for the published posts hidden by this job, applied to Feed at the end)
+    tag_deltas = models.JSONField(default=dict, blank=True)
+
+    # Progress counters, updated after every batch
+    comments_deleted = models.PositiveBigIntegerField(default=0)
+    hypes_deleted = models.PositiveBigIntegerField(default=0)
+    posts_deleted = models.PositiveBigIntegerField(default=0)
+    batches = models.PositiveIntegerField(default=0)
+
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['target_type', 'target_id'], name='deletion_job_target_idx'),
+        ]
+        verbose_name = "Deletion Job"
+        verbose_name_plural = "Deletion Jobs"
+
+    def __str__(self):
+        return f"Delete {self.get_target_type_display()} {self.target_label} ({self.get_status_display()})"
+
+
+# -------------------------------------------------------------------------
+# 8. Offline Sync Actions (idempotency keys)
+# -------------------------------------------------------------------------
+
+class SyncAction(models.Model):
+    """
+    Remembers every action a client replayed through the sync endpoint, keyed by
+    the client-generated id, together with the result it got. Replaying the same
+    action again returns that stored result instead of applying it twice.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='sync_actions')
+
+    # client_id (Id generated by the client when the action was queued offline)
+    client_id = models.CharField(max_length=64)
+
+    # action (hype / unhype / comment)
+    action = models.CharField(max_length=10)
+
+    # result (Per-action result returned to the client)
+    result = models.JSONField(default=dict)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'client_id'], name='unique_sync_action_per_user'),
+        ]
+        verbose_name = "Sync Action"
+        verbose_name_plural = "Sync Actions"
+
+    def __str__(self):
+        return f"{self.action} {self.client_id} by {self.user_id}"
+
+
+# -------------------------------------------------------------------------
+# 9. Post Change Log (delta sync)
+# -------------------------------------------------------------------------
+
+class ContentChange(models.Model):
+    """
+    One row per post, moved to a fresh sequence number every time the post
+    changes (see content/changes.py). GET /api/content/changes/ reads the rows
+    past the client's sequence number, so repeated edits of a post coalesce
+    into a single entry and deleted posts leave a tombstone behind.
+    """
+
+    STATE_CHOICES = [
+        ('LIVE', 'Published'),
+        ('HIDDEN', 'Unpublished'),
+        ('DELETED', 'Deleted'),
+    ]
+
+    # post_id (Primary key of the post; no foreign key, the tombstone outlives it)
+    post_id = models.BigIntegerField(primary_key=True)
+    content_id = models.UUIDField()
+
+    # seq (Sequence number of the latest change of any kind)
+    seq = models.BigIntegerField(unique=True)
+
+    # content_seq (Sequence number of the latest change other than hype/comment counts)
+    content_seq = models.BigIntegerField(default=0)
+
+    # created_seq (Sequence number of the post's creation; 0 if it predates the log)
+    created_seq = models.BigIntegerField(default=0)
+
+    state = models.CharField(max_length=7, choices=STATE_CHOICES, default='LIVE')
+    changed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Content Change"
+        verbose_name_plural = "Content Changes"
+
+    def __str__(self):
+        return f"Post {self.content_id} @ {self.seq} ({self.get_state_display()})"
+
+
+# -------------------------------------------------------------------------
+# 10. Offline Job Checkpoints
+# -------------------------------------------------------------------------
+
+class JobCheckpoint(models.Model):
+    """
+    How far an incremental offline job has read its input (e.g. the last Hype
+    id folded into the similar-posts table), so the next run starts there.
+    """
+
+    # name (Job key, e.g. 'similar_posts')
+    name = models.CharField(max_length=50, primary_key=True)
+
+    # position (Last input row id processed)
+    position = models.BigIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Job Checkpoint"
+        verbose_name_plural = "Job Checkpoints"
+
+    def __str__(self):
+        return f"{self.name} @ {self.position}"
+
+
+# -------------------------------------------------------------------------
+# 11. Similar Posts (co-hype recommendations)
+# -------------------------------------------------------------------------
+
+class PostSimilarity(models.Model):
+    """
+    One of the top SIMILAR_POSTS_TOP_K neighbours of a recent post by co-hype
+    cosine similarity, written by `manage.py compute_similar_posts` (see
+    content/similar.py). Keyed by (post, similar) with no surrogate id or other
+    index, so a post's neighbours are one primary-key range scan.
+
+    There are no database constraints on the foreign keys: posts are removed
+    in raw batches (deletion.py, archive.py), rows pointing at missing posts
+    drop out of the join when served and are pruned by the next run.
+    """
+    pk = models.CompositePrimaryKey('post', 'similar')
+
+    post = models.ForeignKey(
+        Post, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='similar_posts'
+    )
+    similar = models.ForeignKey(
+        Post, on_delete=models.DO_NOTHING, db_constraint=False, db_index=False, related_name='similar_to'
+    )
+
+    # score (co-hypes / sqrt(hypes of post * hypes of similar), 0..1)
+    score = models.FloatField()
+
+    class Meta:
+        verbose_name = "Post Similarity"
+        verbose_name_plural = "Post Similarities"
+
+    def __str__(self):
+        return f"Post {self.post_id} ~ {self.similar_id}: {self.score:.3f}"
+
+
+# -------------------------------------------------------------------------
+# 12. Tag Co-occurrence (related tags)
+# -------------------------------------------------------------------------
+
+class TagCooccurrence(models.Model):
+    """
+    How many published posts carry both tag and other, stored in both
+    directions; the diagonal (tag, tag) is the number of posts with the tag.
+    Maintained by `manage.py build_tag_cooccurrence` (see content/related_tags.py),
+    which turns it into each Feed row's related_tags.
+    """
+    pk = models.CompositePrimaryKey('tag', 'other')
+
+    tag = models.CharField(max_length=50)
+    other = models.CharField(max_length=50)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Tag Co-occurrence"
+        verbose_name_plural = "Tag Co-occurrences"
+
+    def __str__(self):
+        return f"{self.tag} + {self.other}: {self.count}"
+
+
+# -------------------------------------------------------------------------
+# 13. Content-Addressed Media Blobs
+# -------------------------------------------------------------------------
+
+class MediaBlob(models.Model):
+    """
+    One uploaded file, stored once under its sha256 (see content/media.py)
+    however many posts and profiles use it. refcount is the number of
+    Post.media_file / StudentProfile.profile_image values (live or archived)
+    naming it; `manage.py gc_media_blobs` removes blobs nobody references.
+    """
+
+    sha256 = models.CharField(max_length=64, primary_key=True)
+
+    # name (Storage path, blobs/<2 hex>/<2 hex>/<sha256><extension of the first upload>)
+    name = models.CharField(max_length=100, unique=True)
+
+    size = models.BigIntegerField()
+    refcount = models.IntegerField(default=0)
+
+    # unreferenced_since (When refcount dropped to 0 or the blob was last offered for reuse; None while referenced)
+    unreferenced_since = models.DateTimeField(null=True, blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Media Blob"
+        verbose_name_plural = "Media Blobs"
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} reference(s))"
+
+
+# -------------------------------------------------------------------------
+# 14. Archive Tombstones
+# -------------------------------------------------------------------------
+
+class ArchiveTombstone(models.Model):
+    """
+    A post whose copy in the archive segments (see content/archive.py) must no
+    longer be served: it was deleted, or removed by a moderator. Segment files
+    are never rewritten, so the archive readers skip every content id listed
+    here.
+    """
+
+    REASON_CHOICES = [
+        ('DELETED', 'Deleted'),
+        ('MODERATED', 'Removed by a moderator'),
+    ]
+
+    content_id = models.UUIDField(primary_key=True)
+    reason = models.CharField(max_length=9, choices=REASON_CHOICES, default='MODERATED')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Archive Tombstone"
+        verbose_name_plural = "Archive Tombstones"
+
+    def __str__(self):
+        return f"Archived post {self.content_id} ({self.get_reason_display()})"
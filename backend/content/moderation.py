@@ -0,0 +1,132 @@
+from collections import Counter
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Post, Comment, DeletionJob
+from .changes import record_post_changes
+from .deletion import ACTIVE_STATUSES
+from .signals import adjust_feed_counts
+from .trending import add_tag_usage, refresh_post_scores
+
+# ----------------------------------------------------------------------
+# Set-based moderation (behind the Post/Comment admin bulk actions)
+#
+# The admin hands these functions a queryset: the selected rows or, with
+# "select all", everything matching the changelist's filters and search
+# (e.g. @username or #TAG). It is never loaded; its ids are used as a
+# subquery of a single UPDATE/DELETE, and the Feed tag counts, hot scores,
+# change log and counters are then adjusted once for the whole set instead of
+# through the per-row signals.
+# ----------------------------------------------------------------------
+
+
+def _ids_subquery(queryset):
+    """(sql, params) selecting the primary keys of queryset."""
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    return sql, list(params)
+
+
+def set_posts_published(queryset, published):
+    """
+    Publishes (or unpublishes) every post in queryset that is not already in
+    that state, in one statement. Posts queued for deletion, on their own or
+    with their creator, are left alone: the job would delete them anyway.
+    Returns the number of posts changed.
+    """
+    post_table = Post._meta.db_table
+    job_table = DeletionJob._meta.db_table
+    ids_sql, params = _ids_subquery(queryset)
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH changed AS (
+                    UPDATE {post_table} SET is_published = %s
+                    WHERE id IN ({ids_sql}) AND is_published <> %s
+                      AND id NOT IN (
+                          SELECT target_id FROM {job_table}
+                          WHERE target_type = 'POST' AND status = ANY(%s)
+                      )
+                      AND creator_id NOT IN (
+                          SELECT target_id FROM {job_table}
+                          WHERE target_type = 'USER' AND status = ANY(%s)
+                      )
+                    RETURNING id, feed_types
+                )
+                SELECT id, NULL, NULL FROM changed
+                UNION ALL
+                SELECT NULL, UPPER(BTRIM(tag)), COUNT(*)
+                FROM changed, unnest(changed.feed_types) AS tag
+                WHERE BTRIM(tag) <> ''
+                GROUP BY 2
+                """,
+                [published, *params, published, list(ACTIVE_STATUSES), list(ACTIVE_STATUSES)],
+            )
+            post_ids, tag_counts = [], Counter()
+            for post_id, tag, count in cursor.fetchall():
+                if post_id is not None:
+                    post_ids.append(post_id)
+                else:
+                    tag_counts[tag] = count
+
+        if not post_ids:
+            return 0
+
+        now = timezone.now()
+        sign = 1 if published else -1
+        adjust_feed_counts({tag: sign * count for tag, count in tag_counts.items()}, now)
+        if published:
+            bucket_start = now.replace(minute=0, second=0, microsecond=0)
+            add_tag_usage({(tag, bucket_start): count for tag, count in tag_counts.items()})
+        refresh_post_scores(post_ids)
+        record_post_changes(post_ids)
+
+    return len(post_ids)
+
+
+def delete_comment_trees(queryset):
+    """
+    Deletes every comment in queryset together with all replies below it, in
+    one statement, and lowers the comment counters of their posts and the
+    reply counts of surviving parents. Returns the number of comments deleted.
+    """
+    comment_table = Comment._meta.db_table
+    post_table = Post._meta.db_table
+    ids_sql, params = _ids_subquery(queryset)
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                WITH RECURSIVE doomed(id) AS (
+                    SELECT id FROM {comment_table} WHERE id IN ({ids_sql})
+                    UNION
+                    SELECT c.id FROM {comment_table} c JOIN doomed d ON c.parent_comment_id = d.id
+                ), gone AS (
+                    DELETE FROM {comment_table} c USING doomed WHERE c.id = doomed.id
+                    RETURNING c.id, c.post_id, c.parent_comment_id
+                ), parents AS (
+                    UPDATE {comment_table} p SET reply_count = GREATEST(p.reply_count - g.n, 0)
+                    FROM (
+                        SELECT parent_comment_id, COUNT(*) AS n FROM gone
+                        WHERE parent_comment_id IS NOT NULL
+                          AND parent_comment_id NOT IN (SELECT id FROM doomed)
+                        GROUP BY parent_comment_id
+                    ) g
+                    WHERE p.id = g.parent_comment_id
+                ), posts AS (
+                    UPDATE {post_table} p SET comment_count = GREATEST(p.comment_count - g.n, 0)
+                    FROM (SELECT post_id, COUNT(*) AS n FROM gone GROUP BY post_id) g
+                    WHERE p.id = g.post_id
+                    RETURNING p.id, g.n
+                )
+                SELECT id, n FROM posts
+                """,
+                params,
+            )
+            deleted = dict(cursor.fetchall())
+
+        refresh_post_scores(deleted)
+        record_post_changes(deleted, counts_only=True)
+
+    return sum(deleted.values())
@@ -0,0 +1,194 @@
+import math
+import numpy as np
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+from accounts.models import StudentProfile
+from .models import Post, Hype, PostScore
+
+# ----------------------------------------------------------------------
+# Ranked main feed (GET /api/content/?order=ranked)
+#
+#   1. candidate generators each propose up to GENERATOR_LIMIT post ids; they
+#      are combined into one UNION subquery (so at most ~2,000 candidates)
+#   2. the features of all candidates are read in one query (plus one for the
+#      viewer's affinity to their creators) into NumPy arrays
+#   3. a weighted sum scores every candidate at once
+#   4. a diversity pass decays repeated creators and tags, then the top of
+#      the list is returned
+#
+# Generators and weights are pluggable through FEED_RANKING_GENERATORS and
+# FEED_RANKING_WEIGHTS.
+# ----------------------------------------------------------------------
+
+GENERATOR_LIMIT = 500
+
+# Engagement halves for every RECENCY_HALF_LIFE_HOURS of age
+RECENCY_HALF_LIFE_HOURS = 24.0
+
+# The n-th post (0-based) of the same creator / first tag is worth decay ** n of its score
+CREATOR_DECAY = 0.7
+TAG_DECAY = 0.85
+
+FEATURES = ('recency', 'hypes', 'comments', 'tag_overlap', 'creator_affinity')
+
+DEFAULT_WEIGHTS = {
+    'recency': 1.0,
+    'hypes': 0.6,
+    'comments': 0.8,
+    'tag_overlap': 0.7,
+    'creator_affinity': 0.5,
+}
+
+
+# ----------------------------------------------------------------------
+# 1. Candidate generators: (viewer context) -> queryset of post ids, or None
+# ----------------------------------------------------------------------
+
+def recent_candidates(viewer):
+    return Post.objects.filter(is_published=True).order_by('-created_at').values_list('pk')[:GENERATOR_LIMIT]
+
+
+def followed_tag_candidates(viewer):
+    if not viewer.tags:
+        return None
+    return (
+        Post.objects.filter(is_published=True, feed_types__overlap=list(viewer.tags))
+        .order_by('-created_at').values_list('pk')[:GENERATOR_LIMIT]
+    )
+
+
+def same_college_candidates(viewer):
+    if not viewer.college:
+        return None
+    return (
+        Post.objects.filter(is_published=True, creator__studentprofile__college_university=viewer.college)
+        .order_by('-created_at').values_list('pk')[:GENERATOR_LIMIT]
+    )
+
+
+def trending_candidates(viewer):
+    return PostScore.objects.order_by('-score').values_list('post_id')[:GENERATOR_LIMIT]
+
+
+CANDIDATE_GENERATORS = {
+    'recent': recent_candidates,
+    'followed_tags': followed_tag_candidates,
+    'same_college': same_college_candidates,
+    'trending': trending_candidates,
+}
+
+
+class Viewer:
+    """What the generators and features need to know about the requesting user."""
+
+    def __init__(self, user):
+        self.user = user
+        profile = StudentProfile.objects.filter(user=user).values_list('feed_types', 'college_university').first()
+        tags, self.college = profile or ([], None)
+        self.tags = frozenset(tag.strip().upper() for tag in tags or () if tag.strip())
+
+
+def candidate_ids(viewer):
+    """One UNION of the enabled generators (evaluated as a subquery)."""
+    names = getattr(settings, 'FEED_RANKING_GENERATORS', None) or list(CANDIDATE_GENERATORS)
+    querysets = [qs for qs in (CANDIDATE_GENERATORS[name](viewer) for name in names) if qs is not None]
+    first, *rest = querysets
+    return first.union(*rest) if rest else first
+
+
+# ----------------------------------------------------------------------
+# 2. Features (bulk)
+# ----------------------------------------------------------------------
+
+def extract_features(viewer, candidates, now=None):
+    """
+    Returns (post ids, creator ids, first-tag codes, feature matrix) for the
+    published candidates; the matrix has one column per FEATURES entry.
+    """
+    now = now or timezone.now()
+    rows = list(
+        Post.objects.filter(pk__in=candidates, is_published=True)
+        .values_list('pk', 'created_at', 'hype_count', 'comment_count', 'feed_types', 'creator_id')
+    )
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, empty, np.empty((0, len(FEATURES)))
+
+    post_ids, created, hypes, comments, tags, creators = zip(*rows)
+    creators = np.fromiter(creators, dtype=np.int64, count=len(rows))
+
+    affinity = dict(
+        Hype.objects.filter(user=viewer.user, post__creator_id__in=set(creators.tolist()))
+        .values_list('post__creator_id').annotate(n=Count('pk')).order_by()
+    )
+
+    age_hours = np.fromiter(((now - moment).total_seconds() / 3600 for moment in created), dtype=float, count=len(rows))
+    hypes = np.log1p(np.fromiter(hypes, dtype=float, count=len(rows)))
+    comments = np.log1p(np.fromiter(comments, dtype=float, count=len(rows)))
+    normalized_tags = [[tag.strip().upper() for tag in post_tags if tag.strip()] for post_tags in tags]
+    overlap = np.fromiter(
+        (len(viewer.tags.intersection(post_tags)) / len(post_tags) if post_tags else 0.0 for post_tags in normalized_tags),
+        dtype=float, count=len(rows),
+    )
+    affinity = np.log1p(np.fromiter((affinity.get(creator, 0) for creator in creators.tolist()), dtype=float, count=len(rows)))
+
+    features = np.column_stack([
+        np.exp(-math.log(2) * np.maximum(age_hours, 0) / RECENCY_HALF_LIFE_HOURS),
+        hypes / max(hypes.max(), 1.0),
+        comments / max(comments.max(), 1.0),
+        overlap,
+        affinity / max(affinity.max(), 1.0),
+    ])
+
+    # Integer code of each post's first tag (-1 without tags), for the diversity pass
+    codes = {}
+    first_tags = np.fromiter(
+        (codes.setdefault(post_tags[0], len(codes)) if post_tags else -1 for post_tags in normalized_tags),
+        dtype=np.int64, count=len(rows),
+    )
+    return np.fromiter(post_ids, dtype=np.int64, count=len(rows)), creators, first_tags, features
+
+
+# ----------------------------------------------------------------------
+# 3. Scoring and 4. diversity
+# ----------------------------------------------------------------------
+
+def weight_vector():
+    weights = {**DEFAULT_WEIGHTS, **getattr(settings, 'FEED_RANKING_WEIGHTS', {})}
+    return np.array([weights[name] for name in FEATURES], dtype=float)
+
+
+def score(features):
+    return features @ weight_vector()
+
+
+def _occurrence(groups):
+    """For groups listed in rank order: how many earlier entries share each entry's group."""
+    n = len(groups)
+    by_group = np.lexsort((np.arange(n), groups))
+    sorted_groups = groups[by_group]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]])
+    group_start = np.repeat(starts, np.diff(np.r_[starts, n]))
+    occurrence = np.empty(n, dtype=np.int64)
+    occurrence[by_group] = np.arange(n) - group_start
+    return occurrence
+
+
+def diversify(scores, creators, first_tags):
+    """Indices into the candidates, best first, after decaying repeated creators and tags."""
+    order = np.argsort(-scores, kind='stable')
+    adjusted = scores[order] * CREATOR_DECAY ** _occurrence(creators[order])
+    tagged = first_tags[order] >= 0
+    tag_occurrence = _occurrence(first_tags[order])
+    adjusted = np.where(tagged, adjusted * TAG_DECAY ** tag_occurrence, adjusted)
+    return order[np.argsort(-adjusted, kind='stable')]
+
+
+def ranked_post_ids(user, limit=50, now=None):
+    """The viewer's top `limit` post ids, in ranked order."""
+    viewer = Viewer(user)
+    post_ids, creators, first_tags, features = extract_features(viewer, candidate_ids(viewer), now)
+    if not len(post_ids):
+        return []
+    return post_ids[diversify(score(features), creators, first_tags)[:limit]].tolist()
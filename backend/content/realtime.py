@@ -0,0 +1,290 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import uuid
+from functools import lru_cache
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils.module_loading import import_string
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------------------------------------
+# Real-time feed events (served by content/streaming.py)
+#
+# Writers publish small events through the configured broker (REALTIME_BROKER)
+# from inside their transaction; brokers only deliver them once it commits.
+# Every ASGI worker runs one Hub that receives the events and fans them out to
+# its WebSocket/SSE subscribers:
+#
+#   post.created  -> 'feed' and 'tag:<TAG>' subscribers, as it arrives
+#   post.changed  -> the post's counters are re-read and sent to 'post:<id>'
+#                    subscribers at most once per REALTIME_COUNTS_INTERVAL,
+#                    however many hypes/comments arrived in between
+# ----------------------------------------------------------------------
+
+NOTIFY_CHANNEL = 'content_events'
+
+# Events a subscriber may have queued before it is considered stuck and dropped
+SUBSCRIBER_QUEUE_SIZE = 1000
+
+# Content ids per post.changed event: Postgres rejects NOTIFY payloads of 8000
+# bytes or more, and each id takes ~40 bytes of JSON
+CHANGED_IDS_PER_EVENT = 150
+
+
+# ----------------------------------------------------------------------
+# 1. Brokers
+# ----------------------------------------------------------------------
+
+class InMemoryBroker:
+    """Delivers events to listeners in the same process (tests, single-process dev servers)."""
+
+    def __init__(self):
+        self._listeners = []
+
+    def publish(self, event):
+        transaction.on_commit(lambda: self._fan_out(event))
+
+    def _fan_out(self, event):
+        for deliver in list(self._listeners):
+            deliver(event)
+
+    def listen(self, deliver):
+        self._listeners.append(deliver)
+
+    def unlisten(self, deliver):
+        if deliver in self._listeners:
+            self._listeners.remove(deliver)
+
+
+class PostgresBroker:
+    """
+    Broadcasts through Postgres NOTIFY once the publishing transaction has
+    committed. Each listening process keeps one extra connection, waited on by
+    a daemon thread.
+    """
+
+    def __init__(self, alias=DEFAULT_DB_ALIAS):
+        self.alias = alias
+        self._listeners = []
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def publish(self, event):
+        # After the commit, so a failed notification can never roll back the write
+        transaction.on_commit(lambda: self._notify(event), using=self.alias)
+
+    def _notify(self, event):
+        try:
+            with connections[self.alias].cursor() as cursor:
+                cursor.execute("SELECT pg_notify(%s, %s)", [NOTIFY_CHANNEL, json.dumps(event)])
+        except Exception:
+            logger.exception("Could not publish a %s event", event.get('type'))
+
+    def listen(self, deliver):
+        with self._lock:
+            self._listeners.append(deliver)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='content-events', daemon=True)
+                self._thread.start()
+
+    def unlisten(self, deliver):
+        with self._lock:
+            if deliver in self._listeners:
+                self._listeners.remove(deliver)
+
+    def _run(self):
+        while True:
+            wrapper = connections.create_connection(self.alias)
+            try:
+                wrapper.ensure_connection()
+                raw = wrapper.connection
+                raw.autocommit = True
+                with raw.cursor() as cursor:
+                    cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                while True:
+                    if select.select([raw], [], [], 5.0)[0]:
+                        raw.poll()
+                        while raw.notifies:
+                            notification = raw.notifies.pop(0)
+                            event = json.loads(notification.payload)
+                            for deliver in list(self._listeners):
+                                deliver(event)
+            except Exception:
+                logger.exception("Lost the %s listener connection; reconnecting", NOTIFY_CHANNEL)
+                threading.Event().wait(1.0)
+            finally:
+                wrapper.close()
+
+
+@lru_cache(maxsize=None)
+def _load_broker(path):
+    return import_string(path)()
+
+
+def get_broker():
+    """The configured broker (one instance per process), or None when real-time push is off."""
+    path = getattr(settings, 'REALTIME_BROKER', None)
+    return _load_broker(path) if path else None
+
+
+# ----------------------------------------------------------------------
+# 2. Publishing (called by writers, inside their transaction)
+# ----------------------------------------------------------------------
+
+def publish_post_created(post):
+    broker = get_broker()
+    if broker is None or not post.is_published:
+        return
+    broker.publish({
+        'type': 'post.created',
+        'content_id': str(post.content_id),
+        'feed_types': [tag.strip().upper() for tag in post.feed_types if tag.strip()],
+        'created_at': post.created_at.isoformat(),
+    })
+
+
+def publish_counts_changed(content_ids):
+    """
+    Announces that the hype/comment counters of these posts moved (values are
+    read by the hubs), in events of at most CHANGED_IDS_PER_EVENT ids.
+    """
+    broker = get_broker()
+    if broker is None:
+        return
+    content_ids = sorted({str(content_id) for content_id in content_ids})
+    for start in range(0, len(content_ids), CHANGED_IDS_PER_EVENT):
+        broker.publish({'type': 'post.changed', 'content_ids': content_ids[start:start + CHANGED_IDS_PER_EVENT]})
+
+
+# ----------------------------------------------------------------------
+# 3. Per-worker Hub
+# ----------------------------------------------------------------------
+
+def parse_channel(value):
+    """Normalizes 'feed', 'tag:<tag>' or 'post:<uuid>'; returns None for anything else."""
+    value = (value or '').strip()
+    if value == 'feed':
+        return value
+    kind, _, name = value.partition(':')
+    if kind == 'tag' and name.strip():
+        return f"tag:{name.strip().upper()}"
+    if kind == 'post':
+        try:
+            return f"post:{uuid.UUID(name.strip())}"
+        except ValueError:
+            return None
+    return None
+
+
+class Subscriber:
+    """One WebSocket/SSE connection: its channels and its outgoing queue."""
+
+    def __init__(self):
+        self.channels = set()
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = asyncio.Event()
+
+    def push(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed.set()
+
+
+def _load_counts(content_ids):
+    return list(
+        Post.objects.filter(content_id__in=content_ids, is_published=True)
+        .values_list('content_id', 'hype_count', 'comment_count')
+    )
+
+
+class Hub:
+    """Routes broker events to this worker's subscribers; lives on one event loop."""
+
+    def __init__(self, broker, loop):
+        self.broker = broker
+        self.loop = loop
+        self.interval = getattr(settings, 'REALTIME_COUNTS_INTERVAL', 1.0)
+        self.channels = {}  # channel -> set of Subscriber
+        self.dirty = set()  # content ids whose counters changed since the last flush
+        self._flusher = None
+        self.broker.listen(self.deliver)
+
+    def deliver(self, event):
+        """Broker callback; may run on any thread."""
+        self.loop.call_soon_threadsafe(self.dispatch, event)
+
+    def dispatch(self, event):
+        if event.get('type') == 'post.created':
+            targets = set(self.channels.get('feed', ()))
+            for tag in event.get('feed_types', ()):
+                targets.update(self.channels.get(f"tag:{tag}", ()))
+            for subscriber in targets:
+                subscriber.push(event)
+        elif event.get('type') == 'post.changed':
+            watched = [content_id for content_id in event.get('content_ids', ()) if f"post:{content_id}" in self.channels]
+            if watched:
+                self.dirty.update(watched)
+                if self._flusher is None or self._flusher.done():
+                    self._flusher = self.loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        # Everything that changes during the interval goes out in the same flush
+        await asyncio.sleep(self.interval)
+        dirty, self.dirty = self.dirty, set()
+        try:
+            rows = await sync_to_async(_load_counts)(dirty)
+        except Exception:
+            logger.exception("Could not read counters for %d post(s)", len(dirty))
+            return
+        for content_id, hype_count, comment_count in rows:
+            message = {
+                'type': 'post.counts',
+                'content_id': str(content_id),
+                'hype_count': hype_count,
+                'comment_count': comment_count,
+            }
+            for subscriber in list(self.channels.get(f"post:{content_id}", ())):
+                subscriber.push(message)
+        if self.dirty:
+            self._flusher = self.loop.create_task(self._flush_later())
+
+    def subscribe(self, subscriber, channels):
+        for channel in channels:
+            subscriber.channels.add(channel)
+            self.channels.setdefault(channel, set()).add(subscriber)
+
+    def unsubscribe(self, subscriber, channels=None):
+        for channel in list(subscriber.channels if channels is None else channels):
+            subscriber.channels.discard(channel)
+            members = self.channels.get(channel)
+            if members is not None:
+                members.discard(subscriber)
+                if not members:
+                    del self.channels[channel]
+
+    def close(self):
+        self.broker.unlisten(self.deliver)
+        if self._flusher is not None:
+            self._flusher.cancel()
+
+
+_hub = None
+
+
+def get_hub():
+    """The Hub of the running event loop (created on first use)."""
+    global _hub
+    loop = asyncio.get_running_loop()
+    broker = get_broker()
+    if _hub is None or _hub.loop is not loop or _hub.broker is not broker:
+        if _hub is not None:
+            _hub.close()
+        _hub = Hub(broker, loop)
+    return _hub
@@ -0,0 +1,138 @@
+from datetime import timedelta
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import Post, Feed, JobCheckpoint, TagCooccurrence
+
+# ----------------------------------------------------------------------
+# Related tags from co-occurrence (`manage.py build_tag_cooccurrence`)
+#
+# TagCooccurrence counts, for every pair of tags, the published posts that
+# carry both. Each run adds the posts created since the last run (by Post id,
+# see JobCheckpoint) in one set-based statement that unnests every post's tags
+# against themselves, then rescores the tags whose counts moved:
+#
+#   npmi(a, b) = ln(p(a, b) / (p(a) p(b))) / -ln p(a, b)       (-1 .. 1)
+#
+# with p(x) = posts with x / published tagged posts. The best
+# RELATED_TAGS_TOP_N of each tag are stored on its Feed row, so the
+# related-tags endpoint reads a single row.
+#
+# Edits, unpublishing and deletions are not in the input, and tags unrelated
+# to the new posts keep scores computed against an older post total; a --full
+# rebuild (e.g. nightly) recounts and rescores everything.
+# ----------------------------------------------------------------------
+
+CHECKPOINT = 'tag_cooccurrence'
+
+# Related tags kept per tag
+RELATED_TAGS_TOP_N = 10
+
+# Pairs on fewer posts than this are not suggested (PMI overrates rare pairs)
+RELATED_TAGS_MIN_POSTS = 2
+
+# Posts younger than this are left for the next run, so a post whose
+# transaction took an earlier id but had not committed yet is not skipped
+SETTLE = timedelta(minutes=1)
+
+# Normalized, de-duplicated tags of a post (the same normalization as counted_tags)
+POST_TAGS_SQL = (
+    "ARRAY(SELECT DISTINCT UPPER(BTRIM(t)) FROM unnest(p.feed_types) t WHERE BTRIM(t) <> '')"
+)
+
+
+def _add_posts(cursor, after_id, up_to_id):
+    """Adds the pairs of the published posts with after_id < id <= up_to_id; returns the touched tags."""
+    table = TagCooccurrence._meta.db_table
+    cursor.execute(
+        f"""
+        WITH posts AS (
+            SELECT {POST_TAGS_SQL} AS tags
+            FROM {Post._meta.db_table} p
+            WHERE p.is_published AND p.id > %s AND p.id <= %s
+        ), pairs AS (
+            SELECT a.tag, b.tag AS other, COUNT(*) AS n
+            FROM posts, unnest(posts.tags) a(tag), unnest(posts.tags) b(tag)
+            GROUP BY a.tag, b.tag
+        )
+        INSERT INTO {table} (tag, other, count)
+        SELECT tag, other, n FROM pairs
+        ON CONFLICT (tag, other) DO UPDATE SET count = {table}.count + EXCLUDED.count
+        RETURNING tag
+        """,
+        [after_id, up_to_id],
+    )
+    return {tag for tag, in cursor.fetchall()}
+
+
+def _rescore(cursor, touched):
+    """
+    Rewrites Feed.related_tags of every tag paired with a touched tag (a
+    touched tag's count is part of all its partners' scores). Returns the
+    number of Feed rows updated.
+    """
+    table = TagCooccurrence._meta.db_table
+    cursor.execute(
+        f"SELECT COUNT(*) FROM {Post._meta.db_table} p WHERE p.is_published AND cardinality(p.feed_types) > 0"
+    )
+    total = max(cursor.fetchone()[0], 1)
+    cursor.execute(
+        f"""
+        WITH rescored AS (
+            SELECT DISTINCT other AS tag FROM {table} WHERE tag = ANY(%(touched)s)
+        ), scored AS (
+            SELECT c.tag, c.other,
+                   CASE WHEN c.count >= %(total)s THEN 1.0
+                        ELSE LN(c.count::float8 * %(total)s / (ta.count::float8 * tb.count))
+                             / -LN(c.count::float8 / %(total)s)
+                   END AS score
+            FROM {table} c
+            JOIN {table} ta ON ta.tag = c.tag AND ta.other = c.tag
+            JOIN {table} tb ON tb.tag = c.other AND tb.other = c.other
+            WHERE c.tag IN (SELECT tag FROM rescored) AND c.other <> c.tag AND c.count >= %(min_posts)s
+        ), ranked AS (
+            SELECT tag, other, score, ROW_NUMBER() OVER (PARTITION BY tag ORDER BY score DESC, other) AS position
+            FROM scored
+        ), lists AS (
+            SELECT tag, jsonb_agg(
+                jsonb_build_object('tag', other, 'score', ROUND(score::numeric, 4)) ORDER BY position
+            ) AS related
+            FROM ranked WHERE position <= %(top_n)s
+            GROUP BY tag
+        )
+        UPDATE {Feed._meta.db_table} f
+        SET related_tags = COALESCE(lists.related, '[]'::jsonb)
+        FROM rescored LEFT JOIN lists ON lists.tag = rescored.tag
+        WHERE f.tag = rescored.tag
+        """,
+        {'touched': sorted(touched), 'total': total, 'min_posts': RELATED_TAGS_MIN_POSTS, 'top_n': RELATED_TAGS_TOP_N},
+    )
+    return cursor.rowcount
+
+
+def build_tag_cooccurrence(full=False, now=None):
+    """
+    Adds the posts created since the last run to TagCooccurrence (recounts
+    everything when full, or on the first run) and refreshes the related tags
+    that changed, in one transaction. Returns (posts read, tags rescored).
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        # Row lock: a concurrent run waits instead of counting the same posts twice
+        checkpoint, _ = JobCheckpoint.objects.select_for_update().get_or_create(name=CHECKPOINT)
+        full = full or checkpoint.position == 0
+        after_id = 0 if full else checkpoint.position
+
+        new_posts = Post.objects.filter(pk__gt=after_id, created_at__lte=now - SETTLE)
+        up_to_id = max(new_posts.order_by('-pk').values_list('pk', flat=True).first() or 0, after_id)
+        read = Post.objects.filter(pk__gt=after_id, pk__lte=up_to_id, is_published=True).count()
+
+        with connection.cursor() as cursor:
+            if full:
+                cursor.execute(f"DELETE FROM {TagCooccurrence._meta.db_table}")
+                Feed.objects.exclude(related_tags=[]).update(related_tags=[])
+            touched = _add_posts(cursor, after_id, up_to_id)
+            rescored = _rescore(cursor, touched) if touched else 0
+
+        checkpoint.position = up_to_id
+        checkpoint.save(update_fields=['position', 'updated_at'])
+    return read, rescored
@@ -1,7 +1,10 @@
 from rest_framework import serializers
+from django.db.models import BigIntegerField, F, Func, OuterRef, Q, Subquery, Value, Window
+from django.db.models.functions import Cast, Coalesce, NullIf, RowNumber
 from .models import Post, Hype, Comment, Feed 
 from accounts.models import User
 from accounts.serializers import StudentProfileSerializer 
+from .media import MediaHashField
 import re 
 
 # ----------------------------------------------------------------------
@@ -26,20 +29,67 @@ class CommentCreatorSerializer(serializers.ModelSerializer):
 # 2. Comment Serializers (Recursive)
 # ----------------------------------------------------------------------
 
-class RecursiveCommentSerializer(serializers.Serializer):
-    """Helper serializer for recursive nesting of comment replies."""
-    def to_representation(self, value):
-        serializer = CommentSerializer(value, context=self.context)
-        return serializer.data
+def comment_children_map(comments):
+    """
+    Groups already loaded comments by parent id ({parent_id: [replies...]}),
+    keeping their order. CommentSerializer reads replies from this map (passed as
+    context['comment_children']) instead of querying each comment's replies.
+    """
+    children = {}
+    for comment in comments:
+        children.setdefault(comment.parent_comment_id, []).append(comment)
+    return children
+
+
+# What PostListSerializer.top_comments shows of a post's thread: the newest
+# POST_TOP_COMMENTS top-level comments, each with its first POST_REPLY_PREVIEW
+# replies, POST_PREVIEW_LEVELS levels deep (reply_count tells what is left)
+POST_TOP_COMMENTS = 3
+POST_REPLY_PREVIEW = 3
+POST_PREVIEW_LEVELS = 2
+
+
+def post_comment_previews():
+    """
+    The comments top_comments shows, for a prefetch over any number of posts
+    (one query). The top-level comments come from the post's top-level index;
+    replies are ranked among their siblings with ROW_NUMBER() and kept only
+    below those comments (by the root id at the head of Comment.path).
+    """
+    newest = (
+        Comment.objects.filter(post_id=OuterRef('post_id'), parent_comment__isnull=True)
+        .order_by('-created_at', '-id').values('pk')[:POST_TOP_COMMENTS]
+    )
+    root = Coalesce(
+        Cast(NullIf(Func(F('path'), Value('/'), Value(1), function='split_part'), Value('')), BigIntegerField()),
+        F('id'),
+        output_field=BigIntegerField(),
+    )
+    sibling_rank = Window(
+        RowNumber(), partition_by=[F('parent_comment_id')], order_by=[F('created_at').asc(), F('id').asc()],
+    )
+    return (
+        Comment.objects
+        .alias(root_id=root)
+        .filter(root_id__in=Subquery(newest), depth__lte=POST_PREVIEW_LEVELS)
+        .annotate(sibling_rank=sibling_rank)
+        .filter(Q(parent_comment__isnull=True) | Q(sibling_rank__lte=POST_REPLY_PREVIEW))
+        .select_related('user__studentprofile')
+        .order_by('depth', 'created_at', 'id')
+    )
 
 
 class CommentSerializer(serializers.ModelSerializer):
     """
     Main serializer for comments.
+    Replies are nested recursively; when the view has loaded the thread,
+    context['comment_children'] supplies them without further queries, and
+    context['replies_next'] links the comments whose replies were cut short
+    to the next page of the replies endpoint.
     """
     user = CommentCreatorSerializer(read_only=True)
-    replies = RecursiveCommentSerializer(many=True, read_only=True) 
-    reply_count = serializers.SerializerMethodField()
+    replies = serializers.SerializerMethodField()
+    replies_next = serializers.SerializerMethodField()
 
     class Meta:
         model = Comment
@@ -49,15 +99,28 @@ class CommentSerializer(serializers.ModelSerializer):
             'text',             # Required for input
             'parent_comment',   # Optional for input (if it's a reply)
             'created_at',
+            'depth',
             'replies',       
             'reply_count',   
+            'replies_next',
         ]
         # 'post' is excluded from input but included in read_only_fields 
         # so it can still be serialized if needed by other views.
-        read_only_fields = ['id', 'user', 'created_at', 'replies', 'reply_count'] 
-        
-    def get_reply_count(self, obj):
-        return obj.replies.count()
+        read_only_fields = ['id', 'user', 'created_at', 'depth', 'replies', 'reply_count'] 
+
+    def _children(self, obj):
+        children = self.context.get('comment_children')
+        if children is not None:
+            return children.get(obj.pk, [])
+        if not obj.reply_count:
+            return []
+        return list(obj.replies.select_related('user__studentprofile').order_by('created_at', 'id'))
+
+    def get_replies(self, obj):
+        return CommentSerializer(self._children(obj), many=True, context=self.context).data
+
+    def get_replies_next(self, obj):
+        return self.context.get('replies_next', {}).get(obj.pk)
 
 
 # ----------------------------------------------------------------------
@@ -67,11 +130,12 @@ class CommentSerializer(serializers.ModelSerializer):
 class PostListSerializer(serializers.ModelSerializer):
     """
     Serializer for displaying the full post content in the main feed.
+    Build the queryset with views.with_post_relations() so a page of posts is
+    serialized in a fixed number of queries.
     """
     
     creator = PostCreatorSerializer(read_only=True)
-    hype_count = serializers.SerializerMethodField() 
-    comment_count = serializers.SerializerMethodField()
+    media_sha256 = MediaHashField(source='media_file', read_only=True)
     is_hyped = serializers.SerializerMethodField()
     top_comments = serializers.SerializerMethodField()
 
@@ -83,6 +147,7 @@ class PostListSerializer(serializers.ModelSerializer):
             'content_type', 
             'text_content', 
             'media_file',
+            'media_sha256',
             'description',
             'feed_types',
             'hype_count',           
@@ -97,25 +162,34 @@ class PostListSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = fields 
 
-    def get_hype_count(self, obj):
-        return obj.Hypes.count()
-        
-    def get_comment_count(self, obj):
-        return obj.comments.count()
-
     def get_is_hyped(self, obj):
+        if hasattr(obj, 'is_hyped_by_user'):
+            return obj.is_hyped_by_user
         user = self.context.get('request').user
         if user.is_authenticated:
             return Hype.objects.filter(post=obj, user=user).exists()
         return False
         
     def get_top_comments(self, obj):
-        """Fetches the top 3 top-level comments (parent_comment=None)."""
-        top_level_comments = obj.comments.filter(
-            parent_comment__isnull=True
-        ).order_by('-created_at')[:3]
-        
-        return CommentSerializer(top_level_comments, many=True, context=self.context).data
+        """
+        The newest top-level comments with a preview of their replies (see
+        post_comment_previews). Threads loaded whole (archived posts) are cut
+        to the same shape.
+        """
+        if hasattr(obj, 'thread_comments'):
+            thread = obj.thread_comments
+        else:
+            thread = list(post_comment_previews().filter(post=obj))
+        # The thread is oldest first, so the newest top-level comments are at the end
+        children = {
+            parent_id: comments[-POST_TOP_COMMENTS:][::-1] if parent_id is None else comments[:POST_REPLY_PREVIEW]
+            for parent_id, comments in comment_children_map(
+                comment for comment in thread if comment.depth <= POST_PREVIEW_LEVELS
+            ).items()
+        }
+
+        context = {**self.context, 'comment_children': children}
+        return CommentSerializer(children.get(None, []), many=True, context=context).data
 
 
 # ----------------------------------------------------------------------
@@ -125,7 +199,10 @@ class PostListSerializer(serializers.ModelSerializer):
 class PostCreateSerializer(serializers.ModelSerializer):
     """
     Serializer for creating a new post.
+    Instead of uploading media_file, a client may send media_sha256 of a file
+    that is already stored (GET /api/content/media/<sha256>/ tells).
     """
+    media_sha256 = MediaHashField(source='media_file', required=False)
     
     class Meta:
         model = Post
@@ -133,6 +210,7 @@ class PostCreateSerializer(serializers.ModelSerializer):
             'content_type',
             'text_content',
             'media_file',
+            'media_sha256',
             'description',
             'feed_types', 
         ]
@@ -147,6 +225,9 @@ class PostCreateSerializer(serializers.ModelSerializer):
         content_type = data.get('content_type')
         text_content = data.get('text_content', '')
         media_file = data.get('media_file')
+
+        if 'media_file' in self.initial_data and 'media_sha256' in self.initial_data:
+            raise serializers.ValidationError("Send either media_file or media_sha256, not both.")
         
         # --- 1. Content Type Validation ---
         if content_type == 'TEXT' and not text_content:
@@ -179,6 +260,47 @@ class PostCreateSerializer(serializers.ModelSerializer):
         return Post.objects.create(**validated_data)
 
 
+# ----------------------------------------------------------------------
+# 4b. Post Partial Update (PATCH) Serializer
+# ----------------------------------------------------------------------
+
+class PostUpdateSerializer(serializers.ModelSerializer):
+    """
+    Serializer for editing a post (PATCH only). Only the fields that actually
+    changed are written, via save(update_fields=...), so unchanged posts cost no
+    write and the tag statistics are only touched when tags/publish state change.
+    """
+
+    class Meta:
+        model = Post
+        fields = [
+            'text_content',
+            'description',
+            'feed_types',
+            'is_published',
+        ]
+
+    def validate_feed_types(self, feed_types):
+        """Cleans, normalizes and de-duplicates the feed_types (order preserved)."""
+        cleaned_feed_types = list(dict.fromkeys(tag.strip().upper() for tag in feed_types if tag.strip()))
+        if len(cleaned_feed_types) > 10:
+            raise serializers.ValidationError("A post cannot have more than 10 feed_types.")
+        return cleaned_feed_types
+
+    def validate(self, data):
+        if self.instance.content_type == 'TEXT' and 'text_content' in data and not data['text_content']:
+            raise serializers.ValidationError("Text content is required for TEXT posts.")
+        return data
+
+    def update(self, instance, validated_data):
+        changed = [field for field, value in validated_data.items() if getattr(instance, field) != value]
+        for field in changed:
+            setattr(instance, field, validated_data[field])
+        if changed:
+            instance.save(update_fields=changed)
+        return instance
+
+
 # ----------------------------------------------------------------------
 # 5. Feed/Tag List Serializer
 # ----------------------------------------------------------------------
@@ -187,4 +309,43 @@ class FeedSerializer(serializers.ModelSerializer):
     """Serializer for displaying Feed statistics."""
     class Meta:
         model = Feed
-        fields = ('tag', 'total_used', 'Rank', 'created_at', 'last_used_at')
\ No newline at end of file
+        fields = ('tag', 'total_used', 'Rank', 'created_at', 'last_used_at')
+
+# ----------------------------------------------------------------------
+# 6. Trending Tag Serializer
+# ----------------------------------------------------------------------
+
+class TrendingTagSerializer(serializers.Serializer):
+    """Serializer for a trending tag row computed from TagUsageBucket windows."""
+    tag = serializers.CharField()
+    window_count = serializers.IntegerField()
+    expected = serializers.FloatField()
+    velocity = serializers.FloatField()
+
+
+# ----------------------------------------------------------------------
+# 7. Offline Sync Action Serializer (input only)
+# ----------------------------------------------------------------------
+
+class SyncActionSerializer(serializers.Serializer):
+    """
+    One queued client action for the sync endpoint. 'id' is generated by the
+    client and makes the action idempotent. A reply can point at an existing
+    comment ('parent_comment') or at an earlier comment action of the same
+    batch by its client id ('parent').
+    """
+    ACTION_CHOICES = ['hype', 'unhype', 'comment']
+
+    id = serializers.CharField(max_length=64)
+    type = serializers.ChoiceField(choices=ACTION_CHOICES)
+    post = serializers.UUIDField()
+    text = serializers.CharField(required=False)
+    parent_comment = serializers.IntegerField(required=False)
+    parent = serializers.CharField(max_length=64, required=False)
+
+    def validate(self, data):
+        if data['type'] == 'comment' and not data.get('text'):
+            raise serializers.ValidationError({'text': "Text is required for comment actions."})
+        if 'parent_comment' in data and 'parent' in data:
+            raise serializers.ValidationError("Give either parent_comment or parent, not both.")
+        return data
@@ -1,7 +1,23 @@
-from django.db.models.signals import post_save
+from collections import Counter
+from django.db import connection, transaction
+from django.db.models import F, QuerySet
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from .models import Post, Feed
+from accounts.models import StudentProfile
+from .models import Post, Feed, Hype, Comment, ArchiveTombstone
+from .archive import is_archived
+from .media import adjust_blob_refs
+from .trending import record_tag_usage, bump_post_counters, refresh_post_scores
+from .changes import record_post_changes, record_post_deletions
+from .realtime import publish_post_created
+
+# Post fields whose change affects the Feed tag counts
+TAG_STATE_FIELDS = frozenset({'feed_types', 'is_published'})
+
+# Content-addressed media field of each model (MediaBlob.refcount)
+MEDIA_FIELDS = {Post: 'media_file', StudentProfile: 'profile_image'}
 
 # --- Helper Function for Rank Update ---
 def calculate_and_update_rank(feed_instance):
@@ -25,44 +41,243 @@ def calculate_and_update_rank(feed_instance):
     Feed.objects.filter(pk=feed_instance.pk).update(Rank=new_rank)
 
 
-# --- Signal Handler ---
+def adjust_feed_counts(deltas, used_at=None):
+    """
+    Applies {tag: +n / -n} to Feed.total_used in a single statement and recomputes
+    Rank for the touched tags with the same formula as calculate_and_update_rank.
+    Tags with a positive delta are created if missing and get last_used_at bumped.
+    Used by bulk writers that bypass the per-post signal.
+    """
+    deltas = {tag: delta for tag, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    used_at = used_at or timezone.now()
+    table = Feed._meta.db_table
+    values_sql = ', '.join(['(%s::varchar, %s::integer)'] * len(deltas))
+    params = []
+    for tag, delta in sorted(deltas.items()):
+        params.extend([tag, delta])
+
+    # Rank = total_used + max(0, 7 - whole days since last use) * 0.5
+    new_last_used = "CASE WHEN d.delta > 0 THEN GREATEST(f.last_used_at, %s) ELSE f.last_used_at END"
+    new_total = "GREATEST(f.total_used + d.delta, 0)"
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH d(tag, delta) AS (VALUES {values_sql}),
+            updated AS (
+                UPDATE {table} f SET
+                    total_used = {new_total},
+                    last_used_at = {new_last_used},
+                    "Rank" = {new_total} + GREATEST(
+                        0, 7 - FLOOR(EXTRACT(EPOCH FROM (%s - {new_last_used})) / 86400)
+                    ) * 0.5
+                FROM d
+                WHERE f.tag = d.tag
+                RETURNING f.tag
+            )
+            INSERT INTO {table} (tag, total_used, "Rank", created_at, last_used_at, related_tags)
+            SELECT d.tag, d.delta, d.delta + 3.5, %s, %s, '[]'::jsonb
+            FROM d
+            WHERE d.delta > 0 AND d.tag NOT IN (SELECT tag FROM updated)
+            ON CONFLICT (tag) DO UPDATE SET
+                total_used = {table}.total_used + EXCLUDED.total_used,
+                last_used_at = EXCLUDED.last_used_at,
+                "Rank" = {table}.total_used + EXCLUDED.total_used + 3.5
+            """,
+            [*params, used_at, used_at, used_at, used_at, used_at],
+        )
+
+
+def counted_tags(is_published, feed_types):
+    """The Feed.total_used contribution of a post: {TAG: n} while published, else nothing."""
+    if not is_published:
+        return Counter()
+    return Counter(tag.strip().upper() for tag in feed_types if tag.strip())
+
+
+# --- Signal Handlers ---
+@receiver(pre_save, sender=Post)
+def load_saved_tag_state(sender, instance, update_fields=None, **kwargs):
+    """
+    Posts loaded from the database carry a snapshot of their tags (Post.from_db).
+    For an existing post saved without one (e.g. built by hand with a pk), read it now.
+    """
+    if instance._state.adding or instance.pk is None or instance._saved_tag_state is not None:
+        return
+    if update_fields is not None and not TAG_STATE_FIELDS.intersection(update_fields):
+        return
+    row = Post.objects.filter(pk=instance.pk).values_list('is_published', 'feed_types').first()
+    if row is not None:
+        instance._saved_tag_state = (row[0], list(row[1]))
+
+
 @receiver(post_save, sender=Post)
-def update_feed_statistics(sender, instance, created, **kwargs):
+def update_feed_statistics(sender, instance, created, update_fields=None, **kwargs):
     """
-    Handler that updates Feed entries whenever a Post is created or modified.
+    Keeps Feed in step with the post: diffs the tags it counted before this save
+    against the tags it counts now (unpublished posts count none) and applies the
+    +/- deltas in a single statement. Added tags are also recorded in the hourly
+    usage buckets behind the trending endpoint.
     """
-    
-    if not instance.is_published:
+    if update_fields is not None and not TAG_STATE_FIELDS.intersection(update_fields):
+        return
+
+    before = Counter() if created or instance._saved_tag_state is None else counted_tags(*instance._saved_tag_state)
+    after = counted_tags(instance.is_published, instance.feed_types)
+    instance.remember_tag_state()
+
+    deltas = {tag: after[tag] - before[tag] for tag in before.keys() | after.keys() if after[tag] != before[tag]}
+    if not deltas:
         return
 
-    post_feed_types = instance.feed_types
     now = timezone.now()
+    adjust_feed_counts(deltas, now)
 
-    for raw_tag_name in post_feed_types:
-        # Final cleanup ensures consistency with serializer logic
-        tag_name = raw_tag_name.strip().upper() 
+    added = [tag for tag, delta in deltas.items() if delta > 0]
+    if added:
+        record_tag_usage(added, now)
 
-        # 1. Get the Feed instance or create it
-        feed_instance, is_new = Feed.objects.get_or_create(
-            tag=tag_name,
-            # Set default values for a new tag
-            defaults={'total_used': 1, 'last_used_at': now, 'Rank': 1.0}
-        )
-        
-        # 2. If the tag already existed (not new)
-        if not is_new:
-            update_fields = {'last_used_at': now}
-            
-            # CRITICAL: Only increment total_used if the post is NEW.
-            if created:
-                update_fields['total_used'] = feed_instance.total_used + 1
-            
-            # Perform the update
-            Feed.objects.filter(pk=feed_instance.pk).update(**update_fields)
-
-            # Manually update the in-memory instance for the Rank calculation
-            if created:
-                feed_instance.total_used += 1
-
-        # 3. Update the rank based on current stats
-        calculate_and_update_rank(feed_instance)
\ No newline at end of file
+
+@receiver(post_delete, sender=Post)
+def release_feed_tags(sender, instance, **kwargs):
+    """Takes a deleted (still published) post's tags back out of Feed.total_used."""
+    state = instance._saved_tag_state or (instance.is_published, instance.feed_types)
+    deltas = {tag: -count for tag, count in counted_tags(*state).items()}
+    adjust_feed_counts(deltas)
+
+
+# --- Hot Score / Counter Signal Handlers ---
+@receiver(post_save, sender=Post)
+def sync_post_score(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Gives new published posts a hot score and drops it again when a post is unpublished.
+    """
+    if update_fields is not None and 'is_published' not in update_fields:
+        return
+    refresh_post_scores([instance.pk])
+
+
+# --- Change Log Signal Handlers (delta sync) ---
+@receiver(post_save, sender=Post)
+def log_post_change(sender, instance, created, **kwargs):
+    """Every saved edit (Post.save never writes the counters) is a content change."""
+    record_post_changes([instance.pk], created=created)
+    if created:
+        publish_post_created(instance)
+
+
+@receiver(post_delete, sender=Post)
+def log_post_deletion(sender, instance, **kwargs):
+    record_post_deletions([(instance.pk, instance.content_id)])
+
+
+@receiver(post_delete, sender=Post)
+def bury_archived_copy(sender, instance, **kwargs):
+    """A post that changed after it was archived also has a segment copy, which must not be served once it is deleted."""
+    if is_archived(instance.content_id):
+        ArchiveTombstone.objects.get_or_create(content_id=instance.content_id, defaults={'reason': 'DELETED'})
+
+
+def _counter_row_deleted(instance, origin, **deltas):
+    """
+    Applies the counter delta for a deleted Hype/Comment, depending on what the
+    delete was started from (Django passes it to post_delete as 'origin').
+    """
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+
+    if origin_model is Post:
+        # The post itself is being deleted; its counters and score go with it.
+        return
+
+    if origin_model is type(instance):
+        bump_post_counters(instance.post_id, **deltas)
+        record_post_changes([instance.post_id], counts_only=True)
+    else:
+        # Cascade from another object (e.g. a User): the post may be deleted in the
+        # same transaction, so only rescore it once that transaction has committed.
+        bump_post_counters(instance.post_id, rescore=False, **deltas)
+        record_post_changes([instance.post_id], counts_only=True)
+        transaction.on_commit(lambda: refresh_post_scores([instance.post_id]))
+
+
+@receiver(post_save, sender=Hype)
+def hype_created(sender, instance, created, **kwargs):
+    if created:
+        bump_post_counters(instance.post_id, hypes=1)
+        record_post_changes([instance.post_id], counts_only=True)
+
+
+@receiver(post_delete, sender=Hype)
+def hype_deleted(sender, instance, origin=None, **kwargs):
+    _counter_row_deleted(instance, origin, hypes=-1)
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        bump_post_counters(instance.post_id, comments=1)
+        record_post_changes([instance.post_id], counts_only=True)
+        if instance.parent_comment_id is not None:
+            Comment.objects.filter(pk=instance.parent_comment_id).update(reply_count=F('reply_count') + 1)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, origin=None, **kwargs):
+    _counter_row_deleted(instance, origin, comments=-1)
+
+    # Replies removed together with their parent (or their post) leave no count to fix
+    if instance.parent_comment_id is None or isinstance(origin, Post):
+        return
+    if isinstance(origin, Comment) and origin is not instance:
+        return
+    Comment.objects.filter(pk=instance.parent_comment_id).update(reply_count=Greatest(F('reply_count') - 1, 0))
+
+
+# --- Media Blob Reference Counts ---
+def _media_name(value):
+    return getattr(value, 'name', value) or ''
+
+
+@receiver(post_init, sender=Post)
+@receiver(post_init, sender=StudentProfile)
+def remember_media(sender, instance, **kwargs):
+    """Remembers the media file name as loaded (None when the field was deferred)."""
+    loaded = instance.__dict__
+    field = MEDIA_FIELDS[sender]
+    instance._saved_media = _media_name(loaded[field]) if field in loaded else None
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=StudentProfile)
+def load_saved_media(sender, instance, update_fields=None, **kwargs):
+    field = MEDIA_FIELDS[sender]
+    if instance._state.adding or instance._saved_media is not None:
+        return
+    if update_fields is not None and field not in update_fields:
+        return
+    row = sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+    instance._saved_media = _media_name(row)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=StudentProfile)
+def update_media_refs(sender, instance, created, update_fields=None, **kwargs):
+    """Moves one reference from the previously saved media file to the current one."""
+    field = MEDIA_FIELDS[sender]
+    if update_fields is not None and field not in update_fields:
+        return
+    before = '' if created else instance._saved_media or ''
+    after = _media_name(getattr(instance, field))
+    instance._saved_media = after
+    if before != after:
+        adjust_blob_refs({before: -1, after: 1})
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=StudentProfile)
+def release_media_ref(sender, instance, **kwargs):
+    saved = instance._saved_media
+    adjust_blob_refs({_media_name(getattr(instance, MEDIA_FIELDS[sender])) if saved is None else saved: -1})
@@ -0,0 +1,170 @@
+from datetime import timedelta
+from itertools import islice
+import numpy as np
+from scipy import sparse
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from .models import Post, Hype, JobCheckpoint, PostSimilarity
+
+# ----------------------------------------------------------------------
+# Similar posts from co-hypes (`manage.py compute_similar_posts`)
+#
+# Two recent posts are similar when the same users hyped both:
+#
+#   score(a, b) = co-hypes(a, b) / sqrt(hypes(a) * hypes(b))   (cosine)
+#
+# Each run reads the hypes added since the last run (by Hype id, see
+# JobCheckpoint). A new hype by user u on post p changes the co-hype counts of
+# p with every other post u hyped, so those posts are recomputed; nothing
+# else is. Their hypers' hypes within the window are streamed into a sparse
+# user x post matrix X and one sparse product X[:, sources].T @ X gives all
+# co-hype counts at once; the top SIMILAR_POSTS_TOP_K per post replace the
+# post's rows in PostSimilarity.
+#
+# Un-hypes are not in the input: a post's neighbours reflect them the next
+# time the post is recomputed (or on a --full rebuild).
+# ----------------------------------------------------------------------
+
+CHECKPOINT = 'similar_posts'
+
+# Only posts this recent are recommended (or get recommendations)
+SIMILAR_POSTS_MAX_AGE = timedelta(days=30)
+
+# Neighbours kept per post
+SIMILAR_POSTS_TOP_K = 20
+
+# Pairs hyped together by fewer users than this are treated as noise
+SIMILAR_POSTS_MIN_CO_HYPES = 2
+
+# Hypes younger than this are left for the next run, so a hype whose
+# transaction took an earlier id but had not committed yet is not skipped
+SETTLE = timedelta(minutes=1)
+
+# Posts whose rows are replaced per transaction
+WRITE_BATCH = 5_000
+
+# Rows fetched from the database per round trip while streaming hypes
+STREAM_CHUNK = 50_000
+
+
+def _pairs(queryset, *fields):
+    """Streams the queryset's (int, int) rows into an (n, 2) int64 array."""
+    rows = queryset.values_list(*fields).iterator(chunk_size=STREAM_CHUNK)
+    parts = [np.empty((0, 2), dtype=np.int64)]
+    while batch := list(islice(rows, STREAM_CHUNK)):
+        parts.append(np.array(batch, dtype=np.int64))
+    return np.concatenate(parts)
+
+
+# ----------------------------------------------------------------------
+# 1. Computing neighbours
+# ----------------------------------------------------------------------
+
+def top_similar(hypes, post_ids, hype_counts, sources):
+    """
+    hypes: (user id, post id) rows; post_ids: sorted ids of the candidate posts
+    with their hype_counts; sources: ids of the posts to compute neighbours for.
+    Returns (post, similar, score) arrays, at most SIMILAR_POSTS_TOP_K rows per
+    source, best first.
+    """
+    # A post can leave the window between the queries that read hypes and counts
+    hypes = hypes[np.isin(hypes[:, 1], post_ids)]
+    sources = sources[np.isin(sources, post_ids)]
+    users, user_rows = np.unique(hypes[:, 0], return_inverse=True)
+    columns = np.searchsorted(post_ids, hypes[:, 1])
+    matrix = sparse.csc_matrix(
+        (np.ones(len(hypes), dtype=np.float32), (user_rows, columns)),
+        shape=(len(users), len(post_ids)),
+    )
+    source_columns = np.searchsorted(post_ids, sources)
+
+    co_hypes = (matrix[:, source_columns].T @ matrix).tocoo()
+    rows, columns, counts = co_hypes.row, co_hypes.col, co_hypes.data
+    keep = (columns != source_columns[rows]) & (counts >= SIMILAR_POSTS_MIN_CO_HYPES)
+    rows, columns, counts = rows[keep], columns[keep], counts[keep]
+
+    # Counters can lag the hype rows; never let a pair score above 1
+    totals = np.maximum(hype_counts.astype(np.float64), 1.0)
+    scores = counts / np.sqrt(
+        np.maximum(totals[source_columns[rows]], counts) * np.maximum(totals[columns], counts)
+    )
+
+    order = np.lexsort((-scores, rows))
+    rows, columns, scores = rows[order], columns[order], scores[order]
+    rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+    keep = rank < SIMILAR_POSTS_TOP_K
+    return sources[rows[keep]], post_ids[columns[keep]], scores[keep]
+
+
+def _write(sources, posts, similar, scores):
+    """Replaces the rows of every source post (sources without neighbours end up with none)."""
+    table = PostSimilarity._meta.db_table
+    for start in range(0, len(sources), WRITE_BATCH):
+        batch = sources[start:start + WRITE_BATCH]
+        chosen = np.isin(posts, batch)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {table} WHERE post_id = ANY(%s)", [batch.tolist()])
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (post_id, similar_id, score)
+                SELECT * FROM unnest(%s::bigint[], %s::bigint[], %s::double precision[])
+                """,
+                [posts[chosen].tolist(), similar[chosen].tolist(), scores[chosen].tolist()],
+            )
+
+
+def _prune(since):
+    """Drops the rows of posts that aged out of the window, were unpublished or are gone."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            DELETE FROM {PostSimilarity._meta.db_table} s
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {Post._meta.db_table} p
+                WHERE p.id = s.post_id AND p.is_published AND p.created_at >= %s
+            )
+            """,
+            [since],
+        )
+        return cursor.rowcount
+
+
+# ----------------------------------------------------------------------
+# 2. The job
+# ----------------------------------------------------------------------
+
+def compute_similar_posts(full=False, now=None):
+    """
+    Folds the hypes added since the last run into PostSimilarity (everything
+    in the window when full, or on the first run). Returns (hypes read, posts
+    recomputed, rows pruned).
+    """
+    now = now or timezone.now()
+    since = now - SIMILAR_POSTS_MAX_AGE
+    checkpoint, _ = JobCheckpoint.objects.get_or_create(name=CHECKPOINT)
+    full = full or checkpoint.position == 0
+
+    settled = Hype.objects.filter(created_at__lte=now - SETTLE).order_by()
+    recent = Post.objects.filter(is_published=True, created_at__gte=since)
+    window = Hype.objects.filter(post__in=recent).order_by()
+    if full:
+        read = settled.count()
+        position = settled.aggregate(last=Max('pk'))['last'] or 0
+        sources = window.values_list('post_id', flat=True).distinct()
+    else:
+        new_hypes = _pairs(settled.filter(pk__gt=checkpoint.position), 'id', 'user_id')
+        read = len(new_hypes)
+        position = int(new_hypes[:, 0].max()) if read else checkpoint.position
+        sources = window.filter(user_id__in=np.unique(new_hypes[:, 1]).tolist()).values_list('post_id', flat=True).distinct()
+    sources = np.unique(np.fromiter(sources, dtype=np.int64))
+
+    if len(sources):
+        # Everything hyped by the sources' hypers: every post that can co-occur with a source
+        hypes = _pairs(window.filter(user_id__in=window.filter(post_id__in=sources.tolist()).values('user_id')), 'user_id', 'post_id')
+        counts = _pairs(recent.filter(pk__in=np.unique(hypes[:, 1]).tolist()).order_by('pk'), 'pk', 'hype_count')
+        _write(sources, *top_similar(hypes, counts[:, 0], counts[:, 1], sources))
+
+    pruned = _prune(since)
+    JobCheckpoint.objects.filter(name=CHECKPOINT).update(position=position, updated_at=now)
+    return read, len(sources), pruned
@@ -0,0 +1,204 @@
+import asyncio
+import json
+from urllib.parse import parse_qs
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from .realtime import Subscriber, get_broker, get_hub, parse_channel
+
+# ----------------------------------------------------------------------
+# Real-time ASGI endpoints (mounted in social_backend/asgi.py)
+#
+#   WebSocket  /ws/content/?token=<access>&channels=feed,tag:CSE,post:<uuid>
+#              further {"action": "subscribe" | "unsubscribe", "channels": [...]}
+#              messages change the subscription at any time
+#   SSE        /api/content/stream/?channels=...  (Authorization: Bearer <access>
+#              or ?token=), a fallback for clients without WebSockets
+#
+# Both push the events routed to them by the worker's Hub as JSON.
+# ----------------------------------------------------------------------
+
+WEBSOCKET_PATH = '/ws/content/'
+SSE_PATH = '/api/content/stream/'
+
+# WebSocket close codes
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_TOO_SLOW = 4408
+CLOSE_UNAVAILABLE = 1013
+
+
+def _query(scope):
+    return {key: values[-1] for key, values in parse_qs(scope.get('query_string', b'').decode()).items()}
+
+
+def _channels(values):
+    """Valid, normalized channels from a list or comma-separated string, capped per connection."""
+    if isinstance(values, str):
+        values = values.split(',')
+    limit = getattr(settings, 'REALTIME_MAX_CHANNELS', 100)
+    channels = {parse_channel(value) for value in values or () if isinstance(value, str)}
+    channels.discard(None)
+    return sorted(channels)[:limit]
+
+
+def _authenticate(scope):
+    """The active user behind the access token (query 'token' or Authorization header), or None."""
+    raw_token = _query(scope).get('token')
+    if not raw_token:
+        for name, value in scope.get('headers', ()):
+            if name == b'authorization' and value.startswith(b'Bearer '):
+                raw_token = value[7:].decode()
+    if not raw_token:
+        return None
+    auth = JWTAuthentication()
+    try:
+        user = auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+    return user if user.is_active else None
+
+
+async def _wait_first(*awaitables):
+    """Waits for the first of the awaitables and cancels the rest; returns its result."""
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    for task in pending:
+        task.cancel()
+    return done.pop().result()
+
+
+# ----------------------------------------------------------------------
+# 1. WebSocket
+# ----------------------------------------------------------------------
+
+async def websocket_app(scope, receive, send):
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    if get_broker() is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_UNAVAILABLE})
+        return
+    if await sync_to_async(_authenticate)(scope) is None:
+        await send({'type': 'websocket.close', 'code': CLOSE_UNAUTHORIZED})
+        return
+
+    await send({'type': 'websocket.accept'})
+    hub = get_hub()
+    subscriber = Subscriber()
+    hub.subscribe(subscriber, _channels(_query(scope).get('channels')))
+
+    async def send_json(data):
+        await send({'type': 'websocket.send', 'text': json.dumps(data)})
+
+    async def read_client():
+        while True:
+            message = await receive()
+            if message['type'] == 'websocket.disconnect':
+                return None
+            try:
+                request = json.loads(message.get('text') or '{}')
+                action, channels = request.get('action'), _channels(request.get('channels'))
+            except (ValueError, AttributeError):
+                continue
+            if action == 'subscribe':
+                hub.subscribe(subscriber, channels)
+            elif action == 'unsubscribe':
+                hub.unsubscribe(subscriber, channels)
+            else:
+                continue
+            await send_json({'type': 'subscribed', 'channels': sorted(subscriber.channels)})
+
+    async def write_events():
+        while True:
+            await send_json(await subscriber.queue.get())
+
+    async def watch_overflow():
+        await subscriber.overflowed.wait()
+        return CLOSE_TOO_SLOW
+
+    try:
+        close_code = await _wait_first(read_client(), write_events(), watch_overflow())
+        if close_code is not None:
+            await send({'type': 'websocket.close', 'code': close_code})
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+# ----------------------------------------------------------------------
+# 2. Server-Sent Events
+# ----------------------------------------------------------------------
+
+async def _send_response(send, status, body):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json')],
+    })
+    await send({'type': 'http.response.body', 'body': json.dumps(body).encode()})
+
+
+async def sse_app(scope, receive, send):
+    if scope['method'] != 'GET':
+        await _send_response(send, 405, {'detail': 'Method not allowed.'})
+        return
+    if get_broker() is None:
+        await _send_response(send, 503, {'detail': 'Real-time updates are disabled.'})
+        return
+    if await sync_to_async(_authenticate)(scope) is None:
+        await _send_response(send, 401, {'detail': 'Authentication credentials were not provided or are invalid.'})
+        return
+
+    hub = get_hub()
+    subscriber = Subscriber()
+    hub.subscribe(subscriber, _channels(_query(scope).get('channels')))
+    heartbeat = getattr(settings, 'REALTIME_HEARTBEAT_SECONDS', 15)
+
+    async def send_chunk(text):
+        await send({'type': 'http.response.body', 'body': text.encode(), 'more_body': True})
+
+    async def write_events():
+        await send_chunk(f"event: subscribed\ndata: {json.dumps(sorted(subscriber.channels))}\n\n")
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), timeout=heartbeat)
+            except asyncio.TimeoutError:
+                await send_chunk(": ping\n\n")  # keeps proxies from closing an idle stream
+                continue
+            await send_chunk(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n")
+
+    async def wait_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        return 'disconnected'
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', b'text/event-stream'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ],
+    })
+    try:
+        ended = await _wait_first(write_events(), wait_disconnect(), subscriber.overflowed.wait())
+        if ended != 'disconnected':
+            await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        hub.unsubscribe(subscriber)
+
+
+# ----------------------------------------------------------------------
+# 3. Router
+# ----------------------------------------------------------------------
+
+def realtime_router(django_application):
+    """Sends the real-time paths to the apps above and everything else to Django."""
+    async def application(scope, receive, send):
+        if scope['type'] == 'websocket' and scope['path'] == WEBSOCKET_PATH:
+            return await websocket_app(scope, receive, send)
+        if scope['type'] == 'http' and scope['path'] == SSE_PATH:
+            return await sse_app(scope, receive, send)
+        return await django_application(scope, receive, send)
+    return application
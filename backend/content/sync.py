@@ -0,0 +1,229 @@
+from collections import Counter
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from .models import Post, Hype, Comment, SyncAction
+from .serializers import SyncActionSerializer
+from .trending import refresh_post_scores
+from .changes import record_post_changes
+
+# ----------------------------------------------------------------------
+# Offline action sync (used by SyncView, POST /api/content/sync/)
+#
+# A batch of queued hype/unhype/comment actions is applied in one
+# transaction: every action first claims its client id in SyncAction
+# (INSERT ... ON CONFLICT DO NOTHING), the claimed actions are replayed in
+# order against the user's current hypes in memory, and the net result is
+# written with bulk inserts/deletes. The touched posts' counters then move by
+# the rows actually written, in one statement. Actions whose id was already
+# claimed return their stored result, so replaying a batch is harmless.
+# ----------------------------------------------------------------------
+
+SYNC_MAX_ACTIONS = 200
+
+
+def _claim(user, actions, now):
+    """Inserts a SyncAction per action; returns {client_id: SyncAction pk} for the ones not seen before."""
+    table = SyncAction._meta.db_table
+    values_sql = ', '.join(['(%s, %s, %s, %s, %s)'] * len(actions))
+    params = []
+    for action in actions:
+        params.extend([user.pk, action['id'], action['type'], '{}', now])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (user_id, client_id, action, result, created_at)
+            VALUES {values_sql}
+            ON CONFLICT (user_id, client_id) DO NOTHING
+            RETURNING client_id, id
+            """,
+            params,
+        )
+        return dict(cursor.fetchall())
+
+
+def _write_hypes(user, added, removed, now):
+    """
+    Inserts/deletes the user's hypes on these posts; returns {post_id: +1/-1}
+    for the rows actually written (a concurrent request may have got there first).
+    """
+    hype_table = Hype._meta.db_table
+    deltas = Counter()
+    with connection.cursor() as cursor:
+        if added:
+            cursor.execute(
+                f"""
+                INSERT INTO {hype_table} (user_id, post_id, created_at)
+                SELECT %s, post_id, %s FROM unnest(%s::bigint[]) AS a(post_id)
+                ON CONFLICT DO NOTHING
+                RETURNING post_id
+                """,
+                [user.pk, now, sorted(added)],
+            )
+            deltas.update(post_id for post_id, in cursor.fetchall())
+        if removed:
+            cursor.execute(
+                f"DELETE FROM {hype_table} WHERE user_id = %s AND post_id = ANY(%s) RETURNING post_id",
+                [user.pk, sorted(removed)],
+            )
+            deltas.subtract(post_id for post_id, in cursor.fetchall())
+    return deltas
+
+
+def _apply_counter_deltas(hypes, comments):
+    """Adds {post_id: n} hype and comment deltas to the posts' counters (one statement)."""
+    post_ids = sorted(post_id for post_id in set(hypes) | set(comments) if hypes[post_id] or comments[post_id])
+    if not post_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {Post._meta.db_table} p SET
+                hype_count = GREATEST(p.hype_count + d.hypes, 0),
+                comment_count = p.comment_count + d.comments
+            FROM unnest(%s::bigint[], %s::integer[], %s::integer[]) AS d(id, hypes, comments)
+            WHERE p.id = d.id
+            """,
+            [post_ids, [hypes[post_id] for post_id in post_ids], [comments[post_id] for post_id in post_ids]],
+        )
+
+
+def _bump_reply_counts(counts):
+    """Adds {comment_id: n} new replies to the parents' reply_count (one statement)."""
+    if not counts:
+        return
+    comment_table = Comment._meta.db_table
+    values_sql = ', '.join(['(%s::bigint, %s::integer)'] * len(counts))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {comment_table} c SET reply_count = c.reply_count + d.n
+            FROM (VALUES {values_sql}) AS d(id, n)
+            WHERE c.id = d.id
+            """,
+            [value for item in sorted(counts.items()) for value in item],
+        )
+
+
+def apply_sync_actions(user, raw_actions):
+    """
+    Applies an ordered list of raw action dicts for the user.
+    Returns (results, posts): one result per action, in order, and the final
+    counters of every post the batch referred to.
+    """
+    results = [None] * len(raw_actions)
+    valid = []  # (index, validated action)
+    seen_ids = {}
+    for index, raw in enumerate(raw_actions):
+        serializer = SyncActionSerializer(data=raw)
+        if not serializer.is_valid():
+            client_id = raw.get('id') if isinstance(raw, dict) else None
+            results[index] = {'id': client_id, 'status': 'rejected', 'errors': serializer.errors}
+        elif serializer.validated_data['id'] in seen_ids:
+            results[index] = {'id': serializer.validated_data['id'], 'status': 'duplicate'}
+        else:
+            seen_ids[serializer.validated_data['id']] = index
+            valid.append((index, serializer.validated_data))
+
+    now = timezone.now()
+    with transaction.atomic():
+        claimed = _claim(user, [action for _, action in valid], now) if valid else {}
+
+        # Already applied earlier: hand back what the client got then
+        stored = dict(
+            SyncAction.objects.filter(user=user, client_id__in=[a['id'] for _, a in valid if a['id'] not in claimed])
+            .values_list('client_id', 'result')
+        )
+        for index, action in valid:
+            if action['id'] not in claimed:
+                results[index] = {**stored.get(action['id'], {}), 'id': action['id'], 'replayed': True}
+
+        pending = [(index, action) for index, action in valid if action['id'] in claimed]
+        post_ids = dict(
+            Post.objects.filter(content_id__in={action['post'] for _, action in valid}, is_published=True)
+            .values_list('content_id', 'pk')
+        )
+        hyped_before = set(
+            Hype.objects.filter(user=user, post_id__in=post_ids.values()).values_list('post_id', flat=True)
+        )
+        parents = Comment.objects.only('post_id', 'path', 'depth').in_bulk(
+            {a['parent_comment'] for _, a in pending if 'parent_comment' in a}
+        )
+
+        # --- Replay in order against the in-memory state ---
+        hyped = set(hyped_before)
+        new_comments = {}  # client id -> (result index, Comment, parent client id)
+        touched = set()
+        for index, action in pending:
+            post_id = post_ids.get(action['post'])
+            result = {'id': action['id'], 'type': action['type']}
+            results[index] = result
+            if post_id is None:
+                result.update(status='rejected', errors={'post': "Post not found."})
+                continue
+
+            if action['type'] in ('hype', 'unhype'):
+                wanted = action['type'] == 'hype'
+                result['status'] = 'noop' if (post_id in hyped) == wanted else 'applied'
+                (hyped.add if wanted else hyped.discard)(post_id)
+            else:
+                parent_id = action.get('parent_comment')
+                parent_client_id = action.get('parent')
+                if parent_id is not None and getattr(parents.get(parent_id), 'post_id', None) != post_id:
+                    result.update(status='rejected', errors={'parent_comment': "Parent comment not found on this post."})
+                    continue
+                if parent_client_id is not None:
+                    parent = new_comments.get(parent_client_id)
+                    if parent is None or parent[1].post_id != post_id:
+                        result.update(status='rejected', errors={'parent': "Parent action not found in this batch."})
+                        continue
+                comment = Comment(user=user, post_id=post_id, text=action['text'], parent_comment_id=parent_id)
+                if parent_id is not None:
+                    comment.set_tree_position(parents[parent_id])
+                new_comments[action['id']] = (index, comment, parent_client_id)
+                result['status'] = 'applied'
+            touched.add(post_id)
+
+        # --- Write the net effect in bulk ---
+        hype_deltas = _write_hypes(user, hyped - hyped_before, hyped_before - hyped, now)
+
+        # Comments level by level, so in-batch replies get their parent's new pk
+        level = [entry for entry in new_comments.values() if entry[2] is None]
+        while level:
+            Comment.objects.bulk_create([comment for _, comment, _ in level])
+            created = {client_id for client_id, entry in new_comments.items() if entry in level}
+            for index, comment, _ in level:
+                results[index]['comment_id'] = comment.pk
+            level = []
+            for index, comment, parent_client_id in new_comments.values():
+                if parent_client_id in created:
+                    comment.parent_comment_id = new_comments[parent_client_id][1].pk
+                    comment.set_tree_position(new_comments[parent_client_id][1])
+                    level.append((index, comment, parent_client_id))
+        _bump_reply_counts(Counter(
+            comment.parent_comment_id for _, comment, _ in new_comments.values() if comment.parent_comment_id
+        ))
+
+        comment_deltas = Counter(comment.post_id for _, comment, _ in new_comments.values())
+        if hype_deltas or comment_deltas:
+            _apply_counter_deltas(hype_deltas, comment_deltas)
+            refresh_post_scores(touched)
+            record_post_changes(touched, counts_only=True)
+
+        SyncAction.objects.bulk_update(
+            [SyncAction(pk=claimed[results[index]['id']], result=results[index]) for index, _ in pending],
+            ['result'],
+        )
+
+        posts = {
+            str(post['content_id']): {
+                'hype_count': post['hype_count'],
+                'comment_count': post['comment_count'],
+                'is_hyped': post['is_hyped'],
+            }
+            for post in Post.objects.filter(pk__in=post_ids.values())
+            .annotate(is_hyped=Exists(Hype.objects.filter(post=OuterRef('pk'), user=user)))
+            .values('content_id', 'hype_count', 'comment_count', 'is_hyped')
+        }
+
+    return results, posts
@@ -1,3 +1,1137 @@
-from django.test import TestCase
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+from accounts.models import User, StudentProfile
+from .deletion import schedule_post_deletion, schedule_user_deletion, run_deletion_job
+from .archive import write_segment, delete_archived, remove_archived_post
+from .related_tags import build_tag_cooccurrence
+from .serializers import post_comment_previews
+from .transfer import export_content, import_content
+from .similar import compute_similar_posts
+from .trending import record_tag_usage, rollup_tag_buckets, trending_tags, refresh_post_scores
+from .management.commands.benchmark_api import ENDPOINTS, BenchmarkContext, percentile, url_name
+from .media import collect_unreferenced_blobs
+from .moderation import set_posts_published
+from .models import Post, Hype, Comment, Feed, DeletionJob, MediaBlob, PostSimilarity, ArchiveTombstone, ContentChange, TagUsageBucket, PostScore
+from .streaming import realtime_router
 
-# Create your tests here.
+# ----------------------------------------------------------------------
+# Query budgets: (method, url name) -> maximum SQL queries per request
+#
+# Every endpoint in the benchmark_api endpoint table must have a budget.
+# Each endpoint is exercised against datasets of different sizes and must
+# stay within its budget at every size, so a serializer field or view change
+# that adds per-row queries (N+1) fails here. Raise a budget only together
+# with a reason in the review.
+# ----------------------------------------------------------------------
+
+QUERY_BUDGETS = {
+    # --- content.urls ---
+    ('GET', 'post-list-create'): 3,          # auth user, posts (+creator, profile, is_hyped), comment threads
+    ('GET', 'post-list-create[ranked]'): 6,  # auth user, profile, candidate features, creator affinity, posts, comment threads
+    ('POST', 'post-list-create'): 8,         # auth user, insert, Feed deltas, tag buckets, score (2), change log, notify
+    ('GET', 'user-post-list'): 3,
+    ('GET', 'public-user-post-list'): 4,     # + resolve user_is
+    ('GET', 'post-detail'): 3,
+    ('GET', 'post-batch'): 3,
+    ('GET', 'media-blob'): 2,                # auth user, blob by primary key
+    ('GET', 'post-similar'): 3,              # auth user, similar posts (one join on the PostSimilarity key), comment threads
+    ('GET', 'post-changes'): 5,              # auth user, log range, edited posts (+ comment threads), held counts
+    ('PATCH', 'post-detail'): 8,             # auth user, post, UPDATE changed columns, Feed deltas, buckets, change log, reload (2)
+    ('GET', 'post-list-by-feed_types'): 3,
+    ('GET', 'post-trending'): 3,
+    ('POST', 'post-hype-toggle'): 9,         # auth user, post, exists, write, counters + score, change log, notify, refresh
+    ('POST', 'post-sync'): 18,               # auth user, claim ids, lookups (2), hype writes (2), one insert per reply level, reply counts, counters, scores (2), change log, notify, results, final state
+    ('GET', 'comment-list-create'): 3,       # auth user, page of top-level comments, reply previews
+    ('GET', 'comment-replies'): 3,
+    ('POST', 'comment-list-create'): 9,
+    ('DELETE', 'comment-delete'): 9,
+    ('GET', 'feed-tag-list'): 2,
+    ('GET', 'feed-tag-trending'): 2,
+    ('GET', 'feed-tag-related'): 2,          # auth user, one Feed row
+
+    # --- social_backend.urls (accounts) ---
+    ('GET', 'check_username'): 2,
+    ('POST', 'request_otp'): 8,              # update_or_create runs inside two savepoints
+    ('POST', 'final_register'): 8,
+    ('POST', 'token_obtain_pair'): 1,
+    ('POST', 'token_refresh'): 1,
+    ('POST', 'token_verify'): 0,
+    ('GET', 'user_profile_update'): 2,
+    ('PATCH', 'user_profile_update'): 3,
+}
+
+# Dataset sizes (posts per author) every endpoint is checked against
+DATASET_SIZES = (1, 4, 12)
+
+PASSWORD = 'Budget-password-123'
+
+
+# Changes written by seed() must be visible to the delta sync endpoint at once
+@override_settings(CONTENT_CHANGES_SETTLE_SECONDS=0)
+class QueryBudgetTests(TestCase):
+    """Asserts every API endpoint stays within its QUERY_BUDGETS entry regardless of data size."""
+
+    def seed(self, size):
+        """
+        Creates `size` posts for each of two authors, every post hyped by the
+        viewer and carrying a small comment thread (two top-level comments,
+        each with a reply that has a reply of its own).
+        """
+        users = []
+        for i in range(2):
+            user = User.objects.create_user(
+                email=f"budget_{size}_{i}@example.com",
+                username=f"budget_{size}_{i}",
+                password=PASSWORD,
+            )
+            StudentProfile.objects.create(user=user, college_university='MIT', department='CSE')
+            users.append(user)
+        viewer, author = users
+
+        for n in range(size):
+            for creator in users:
+                post = Post.objects.create(
+                    creator=creator,
+                    content_type='TEXT',
+                    text_content=f"Budget post {n}",
+                    feed_types=[f"BUDGET{n % 3}", 'BUDGET'],
+                )
+                Hype.objects.create(user=viewer, post=post)
+                for _ in range(2):
+                    top = Comment.objects.create(user=author, post=post, text='top')
+                    reply = Comment.objects.create(user=viewer, post=post, parent_comment=top, text='reply')
+                    Comment.objects.create(user=author, post=post, parent_comment=reply, text='nested')
+
+        return BenchmarkContext(viewer, PASSWORD)
+
+    def request(self, ctx, name, method, build):
+        kwargs, payload = build(ctx)
+        url = reverse(url_name(name), kwargs=kwargs)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f"Bearer {ctx.access}"
+        with CaptureQueriesContext(connection) as queries:
+            if method == 'GET':
+                response = self.client.get(url, payload)
+            else:
+                response = getattr(self.client, method.lower())(
+                    url, data=payload, content_type='application/json'
+                )
+        return response, queries
+
+    def test_every_endpoint_has_a_budget(self):
+        endpoints = {(method, name) for name, method, _ in ENDPOINTS}
+        self.assertEqual(endpoints, set(QUERY_BUDGETS))
+
+    def test_endpoints_stay_within_query_budget(self):
+        for size in DATASET_SIZES:
+            ctx = self.seed(size)
+            for name, method, build in ENDPOINTS:
+                budget = QUERY_BUDGETS[(method, name)]
+                with self.subTest(endpoint=f"{method} {name}", size=size):
+                    sid = connection.savepoint()
+                    try:
+                        response, queries = self.request(ctx, name, method, build)
+                    finally:
+                        connection.savepoint_rollback(sid)
+
+                    self.assertLess(response.status_code, 500)
+                    if len(queries) > budget:
+                        sql = '\n'.join(
+                            f"  {i}. {query['sql']}" for i, query in enumerate(queries.captured_queries, 1)
+                        )
+                        self.fail(
+                            f"{method} {name} ran {len(queries)} queries with {size} posts per author "
+                            f"(budget {budget}):\n{sql}"
+                        )
+
+
+class BenchmarkPercentileTests(SimpleTestCase):
+    """benchmark_api reports nearest-rank percentiles."""
+
+    def test_nearest_rank(self):
+        values = list(range(1, 11))
+        self.assertEqual([percentile(values, q) for q in (0, 10, 50, 90, 95, 99, 100)], [1, 1, 5, 9, 10, 10, 10])
+        self.assertEqual(percentile(list(range(1, 101)), 99), 99)
+        self.assertEqual(percentile([7], 50), 7)
+        self.assertIsNone(percentile([], 50))
+
+
+class DeletionJobTests(TestCase):
+    """Hidden at once, removed batch by batch, counters and tag counts kept in step."""
+
+    def setUp(self):
+        self.alice = User.objects.create_user(email='alice@example.com', username='alice', password=PASSWORD)
+        self.bob = User.objects.create_user(email='bob@example.com', username='bob', password=PASSWORD)
+        self.alice_post = Post.objects.create(creator=self.alice, content_type='TEXT', text_content='a', feed_types=['GONE', 'KEPT'])
+        self.bob_post = Post.objects.create(creator=self.bob, content_type='TEXT', text_content='b', feed_types=['KEPT'])
+
+        # Alice comments on Bob's post and Bob replies to her, three levels deep
+        parent = None
+        for i in range(3):
+            parent = Comment.objects.create(user=self.alice if i % 2 == 0 else self.bob, post=self.bob_post, parent_comment=parent, text=str(i))
+        self.bob_comment = Comment.objects.create(user=self.bob, post=self.bob_post, text='survives')
+        for post in (self.alice_post, self.bob_post):
+            Hype.objects.create(user=self.alice, post=post)
+        Comment.objects.create(user=self.bob, post=self.alice_post, text='on alice')
+
+    def test_user_deletion_hides_then_removes_in_batches(self):
+        job = schedule_user_deletion(self.alice)
+        self.alice.refresh_from_db()
+        self.assertFalse(self.alice.is_active)
+        self.assertFalse(Post.objects.get(pk=self.alice_post.pk).is_published)
+        self.assertEqual(schedule_user_deletion(self.alice), job)
+
+        job = run_deletion_job(job, batch_size=1)
+
+        self.assertEqual(job.status, 'DONE')
+        self.assertEqual((job.posts_deleted, job.comments_deleted, job.hypes_deleted), (1, 4, 2))
+        self.assertFalse(User.objects.filter(pk=self.alice.pk).exists())
+        self.assertEqual(list(Comment.objects.values_list('pk', flat=True)), [self.bob_comment.pk])
+
+        self.bob_post.refresh_from_db()
+        self.assertEqual((self.bob_post.hype_count, self.bob_post.comment_count), (0, 1))
+        self.assertEqual(Feed.objects.get(tag='GONE').total_used, 0)
+        self.assertEqual(Feed.objects.get(tag='KEPT').total_used, 1)
+
+    def test_post_deletion_keeps_the_author(self):
+        job = run_deletion_job(schedule_post_deletion(self.alice_post), batch_size=1)
+        self.assertEqual(job.status, 'DONE')
+        self.assertFalse(Post.objects.filter(pk=self.alice_post.pk).exists())
+        self.assertTrue(User.objects.filter(pk=self.alice.pk, is_active=True).exists())
+        self.assertEqual(Hype.objects.filter(post=self.bob_post).count(), 1)
+
+    def test_counter_notifications_fit_postgres_payload_limit(self):
+        # One batch touches 300+ posts: more content ids than a single NOTIFY payload can hold
+        posts = Post.objects.bulk_create(
+            Post(creator=self.bob, content_type='TEXT', text_content=str(i), comment_count=1) for i in range(320)
+        )
+        Comment.objects.bulk_create(Comment(user=self.alice, post=post, text='hi') for post in posts)
+
+        with self.assertNoLogs('content.realtime', 'ERROR'), self.captureOnCommitCallbacks(execute=True) as callbacks:
+            job = run_deletion_job(schedule_user_deletion(self.alice))
+        self.assertEqual(job.status, 'DONE')
+        self.assertGreater(len(callbacks), 1)
+        self.assertEqual(Post.objects.filter(pk__in=[post.pk for post in posts], comment_count=0).count(), 320)
+
+
+class HypePartitionTests(TestCase):
+    """content_hype is hash-partitioned on post_id (migration 0018) and keeps its constraints."""
+
+    def test_partitioned_table_keeps_uniqueness_and_counters(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT relkind FROM pg_class WHERE oid = 'content_hype'::regclass")
+            self.assertEqual(cursor.fetchone()[0], 'p')
+
+        user = User.objects.create_user(email='fan@example.com', username='fan', password=PASSWORD)
+        post = Post.objects.create(creator=user, content_type='TEXT', text_content='x')
+        hype = Hype.objects.create(user=user, post=post)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Hype.objects.create(user=user, post=post)
+
+        self.assertEqual(Hype.objects.get(pk=hype.pk).post_id, post.pk)
+        Hype.objects.filter(user=user, post=post).delete()
+        post.refresh_from_db()
+        self.assertEqual((post.hype_count, Hype.objects.count()), (0, 0))
+
+
+class FeedCountTests(TestCase):
+    """Feed.total_used follows tag edits, unpublishing and deletion."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='tags@example.com', username='tags', password=PASSWORD)
+        self.post = Post.objects.create(creator=self.user, content_type='TEXT', text_content='x', feed_types=['A', 'B'])
+        Post.objects.create(creator=self.user, content_type='TEXT', text_content='y', feed_types=['B'])
+
+    def counts(self):
+        return dict(Feed.objects.values_list('tag', 'total_used'))
+
+    def test_edit_applies_only_the_difference(self):
+        post = Post.objects.get(pk=self.post.pk)
+        post.feed_types = ['B', 'C']
+        post.save()
+        self.assertEqual(self.counts(), {'A': 0, 'B': 2, 'C': 1})
+
+    def test_unpublish_republish_and_delete(self):
+        post = Post.objects.get(pk=self.post.pk)
+        post.is_published = False
+        post.save(update_fields=['is_published'])
+        self.assertEqual(self.counts(), {'A': 0, 'B': 1})
+
+        post.is_published = True
+        post.save(update_fields=['is_published'])
+        self.assertEqual(self.counts(), {'A': 1, 'B': 2})
+
+        Post.objects.filter(pk=post.pk).delete()
+        self.assertEqual(self.counts(), {'A': 0, 'B': 1})
+
+    def test_recount_repairs_drift(self):
+        Feed.objects.filter(tag='B').update(total_used=40)
+        Feed.objects.create(tag='STALE', total_used=3)
+        Feed.objects.filter(tag='A').delete()
+        call_command('recount_feed_tags', chunk_size=1, stdout=io.StringIO())
+        self.assertEqual(self.counts(), {'A': 1, 'B': 2, 'STALE': 0})
+
+
+class PostUpdateTests(TestCase):
+    """PATCH /api/content/<content_id>/ writes only what changed, for the creator or staff."""
+
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', username='owner', password=PASSWORD)
+        self.other = User.objects.create_user(email='other@example.com', username='other', password=PASSWORD)
+        self.post = Post.objects.create(creator=self.owner, content_type='TEXT', text_content='x', feed_types=['A'])
+        self.url = reverse('post-detail', kwargs={'content_id': self.post.content_id})
+
+    def patch(self, user, data):
+        token = RefreshToken.for_user(user).access_token
+        return self.client.patch(self.url, data, content_type='application/json', HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_only_the_creator_can_edit(self):
+        self.assertEqual(self.patch(self.other, {'description': 'hijacked'}).status_code, 403)
+
+    def test_partial_update_writes_changed_columns_and_keeps_counters(self):
+        stale = Post.objects.get(pk=self.post.pk)
+        Hype.objects.create(user=self.other, post=self.post)
+
+        stale.description = 'edited'
+        stale.save(update_fields=['description', 'hype_count'])
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.description, self.post.hype_count, self.post.updated), ('edited', 1, True))
+
+        response = self.patch(self.owner, {'feed_types': ['a', 'b'], 'is_published': False})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['feed_types'], ['A', 'B'])
+        self.assertEqual(dict(Feed.objects.values_list('tag', 'total_used')), {'A': 0})  # B was added while unpublished
+
+        with CaptureQueriesContext(connection) as queries:
+            self.patch(self.owner, {'description': 'edited'})
+        self.assertFalse([q for q in queries.captured_queries if q['sql'].startswith('UPDATE')])
+
+
+class PostBatchTests(TestCase):
+    """GET /api/content/batch/ keeps the requested order and reports what it could not return."""
+
+    def test_order_missing_and_unpublished(self):
+        user = User.objects.create_user(email='batch@example.com', username='batch', password=PASSWORD)
+        first, second, hidden = [
+            Post.objects.create(creator=user, content_type='TEXT', text_content=str(i), is_published=i < 2)
+            for i in range(3)
+        ]
+        absent = uuid.uuid4()
+        ids = [second.content_id, absent, hidden.content_id, first.content_id, 'not-a-uuid']
+
+        token = RefreshToken.for_user(user).access_token
+        response = self.client.get(
+            reverse('post-batch'), {'ids': ','.join(map(str, ids))}, HTTP_AUTHORIZATION=f"Bearer {token}",
+        )
+
+        body = response.json()
+        self.assertEqual([post['content_id'] for post in body['results']], [str(second.content_id), str(first.content_id)])
+        self.assertEqual(body['missing'], ['not-a-uuid', str(absent)])
+        self.assertEqual(body['unpublished'], [str(hidden.content_id)])
+
+
+class SyncTests(TestCase):
+    """POST /api/content/sync/ applies a batch once; replays return the stored results."""
+
+    def test_replayed_batch_is_harmless(self):
+        user = User.objects.create_user(email='sync@example.com', username='sync', password=PASSWORD)
+        post = Post.objects.create(creator=user, content_type='TEXT', text_content='x')
+        other = Post.objects.create(creator=user, content_type='TEXT', text_content='y')
+        Hype.objects.create(user=user, post=other)
+        actions = [
+            {'id': 'h1', 'type': 'hype', 'post': str(post.content_id)},
+            {'id': 'h2', 'type': 'hype', 'post': str(post.content_id)},
+            {'id': 'c1', 'type': 'comment', 'post': str(post.content_id), 'text': 'hello'},
+            {'id': 'c2', 'type': 'comment', 'post': str(post.content_id), 'text': 'reply', 'parent': 'c1'},
+            {'id': 'u1', 'type': 'unhype', 'post': str(other.content_id)},
+            {'id': 'bad', 'type': 'hype', 'post': str(uuid.uuid4())},
+        ]
+
+        token = RefreshToken.for_user(user).access_token
+        sync = lambda: self.client.post(
+            reverse('post-sync'), {'actions': actions}, content_type='application/json',
+            HTTP_AUTHORIZATION=f"Bearer {token}",
+        ).json()
+
+        first = sync()
+        self.assertEqual(
+            [result['status'] for result in first['results']],
+            ['applied', 'noop', 'applied', 'applied', 'applied', 'rejected'],
+        )
+        reply = Comment.objects.get(pk=first['results'][3]['comment_id'])
+        self.assertEqual(reply.parent_comment_id, first['results'][2]['comment_id'])
+        expected = {
+            str(post.content_id): {'hype_count': 1, 'comment_count': 2, 'is_hyped': True},
+            str(other.content_id): {'hype_count': 0, 'comment_count': 0, 'is_hyped': False},
+        }
+        self.assertEqual(first['posts'], expected)
+
+        second = sync()
+        self.assertTrue(all(result['replayed'] for result in second['results']))
+        self.assertEqual(second['results'][3]['comment_id'], reply.pk)
+        self.assertEqual(second['posts'], expected)
+        self.assertEqual(Comment.objects.filter(post=post).count(), 2)
+        self.assertEqual(Hype.objects.filter(user=user).count(), 1)
+
+    def test_counters_move_by_the_rows_written(self):
+        user = User.objects.create_user(email='delta-sync@example.com', username='deltasync', password=PASSWORD)
+        post = Post.objects.create(creator=user, content_type='TEXT', text_content='x')
+        # Counters are never recounted from the rows, so increments made meanwhile are kept
+        Post.objects.filter(pk=post.pk).update(hype_count=10, comment_count=5)
+        actions = [
+            {'id': 'h1', 'type': 'hype', 'post': str(post.content_id)},
+            {'id': 'c1', 'type': 'comment', 'post': str(post.content_id), 'text': 'hello'},
+        ]
+        response = self.client.post(
+            reverse('post-sync'), {'actions': actions}, content_type='application/json',
+            HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}",
+        ).json()
+        self.assertEqual(response['posts'][str(post.content_id)], {'hype_count': 11, 'comment_count': 6, 'is_hyped': True})
+
+
+@override_settings(CONTENT_CHANGES_SETTLE_SECONDS=0)
+class PostChangesTests(TestCase):
+    """GET /api/content/changes/ returns coalesced changes past the token, and a new token."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='delta@example.com', username='delta', password=PASSWORD)
+        self.held = Post.objects.create(creator=self.user, content_type='TEXT', text_content='held')
+        self.edited = Post.objects.create(creator=self.user, content_type='TEXT', text_content='edited')
+        self.doomed = Post.objects.create(creator=self.user, content_type='TEXT', text_content='doomed')
+        self.token = RefreshToken.for_user(self.user).access_token
+
+    def poll(self, since=None):
+        params = {'posts': str(self.held.content_id)}
+        if since:
+            params['since'] = since
+        return self.client.get(reverse('post-changes'), params, HTTP_AUTHORIZATION=f"Bearer {self.token}").json()
+
+    def test_changes_since_token(self):
+        start = self.poll()['next']
+
+        created = Post.objects.create(creator=self.user, content_type='TEXT', text_content='new')
+        Hype.objects.create(user=self.user, post=self.held)
+        self.edited.description = 'first'
+        self.edited.save()
+        self.edited.description = 'second'
+        self.edited.save()
+        doomed_id = str(self.doomed.content_id)
+        self.doomed.delete()
+
+        body = self.poll(start)
+        changes = {change['content_id']: change for change in body['changes']}
+        self.assertEqual(changes[str(created.content_id)]['change'], 'created')
+        self.assertEqual(changes[str(self.edited.content_id)]['change'], 'edited')
+        self.assertEqual(changes[str(self.edited.content_id)]['post']['description'], 'second')
+        self.assertEqual(changes[str(self.held.content_id)], {
+            'content_id': str(self.held.content_id), 'change': 'counts', 'hype_count': 1, 'comment_count': 0,
+        })
+        self.assertEqual(changes[doomed_id]['change'], 'deleted')
+        self.assertEqual(len(body['changes']), 4)
+
+        # Nothing new: only the auth lookup and one probe of the log
+        with self.assertNumQueries(2):
+            idle = self.poll(body['next'])
+        self.assertEqual(idle['changes'], [])
+        self.assertEqual(idle['next'], body['next'])
+
+    def test_forged_token_is_rejected(self):
+        response = self.client.get(
+            reverse('post-changes'), {'since': '0:forged'}, HTTP_AUTHORIZATION=f"Bearer {self.token}",
+        )
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(REALTIME_BROKER='content.realtime.InMemoryBroker', REALTIME_COUNTS_INTERVAL=0.05)
+class RealtimeTests(TestCase):
+    """New posts reach feed/tag subscribers; counter bursts reach post subscribers once per interval."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='live@example.com', username='live', password=PASSWORD)
+        self.post = Post.objects.create(creator=self.user, content_type='TEXT', text_content='x', feed_types=['CSE'])
+        self.token = str(RefreshToken.for_user(self.user).access_token)
+        self.app = realtime_router(None)
+
+    def hype_burst(self, n):
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(n):
+                fan = User.objects.create_user(email=f"fan{i}@example.com", username=f"fan{i}", password=PASSWORD)
+                Hype.objects.create(user=fan, post=self.post)
+
+    def create_post(self, feed_types):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(creator=self.user, content_type='TEXT', text_content='new', feed_types=feed_types)
+
+    async def test_websocket_subscriptions(self):
+        communicator = ApplicationCommunicator(self.app, {
+            'type': 'websocket', 'path': '/ws/content/', 'headers': [],
+            'query_string': f"token={self.token}&channels=post:{self.post.content_id}".encode(),
+        })
+        await communicator.send_input({'type': 'websocket.connect'})
+        self.assertEqual((await communicator.receive_output(1))['type'], 'websocket.accept')
+
+        await communicator.send_input({'type': 'websocket.receive', 'text': json.dumps({'action': 'subscribe', 'channels': ['tag:cse']})})
+        subscribed = json.loads((await communicator.receive_output(1))['text'])
+        self.assertEqual(subscribed['channels'], [f"post:{self.post.content_id}", 'tag:CSE'])
+
+        await sync_to_async(self.hype_burst)(3)
+        counts = json.loads((await communicator.receive_output(1))['text'])
+        self.assertEqual(counts, {
+            'type': 'post.counts', 'content_id': str(self.post.content_id), 'hype_count': 3, 'comment_count': 0,
+        })
+        self.assertTrue(await communicator.receive_nothing(0.2))
+
+        await sync_to_async(self.create_post)(['OTHER'])
+        self.assertTrue(await communicator.receive_nothing(0.1))
+        created = await sync_to_async(self.create_post)(['cse'])
+        event = json.loads((await communicator.receive_output(1))['text'])
+        self.assertEqual((event['type'], event['content_id']), ('post.created', str(created.content_id)))
+
+        await communicator.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await communicator.wait(1)
+
+    async def test_event_stream_requires_a_token(self):
+        scope = {'type': 'http', 'method': 'GET', 'path': '/api/content/stream/', 'headers': [], 'query_string': b'channels=feed'}
+        communicator = ApplicationCommunicator(self.app, scope)
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        self.assertEqual((await communicator.receive_output(1))['status'], 401)
+
+        communicator = ApplicationCommunicator(self.app, {**scope, 'headers': [(b'authorization', f"Bearer {self.token}".encode())]})
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        start = await communicator.receive_output(1)
+        self.assertEqual((start['status'], dict(start['headers'])[b'content-type']), (200, b'text/event-stream'))
+        self.assertEqual((await communicator.receive_output(1))['body'], b'event: subscribed\ndata: ["feed"]\n\n')
+
+        created = await sync_to_async(self.create_post)([])
+        chunk = (await communicator.receive_output(1))['body'].decode()
+        self.assertTrue(chunk.startswith('event: post.created\n'))
+        self.assertIn(str(created.content_id), chunk)
+
+        await communicator.send_input({'type': 'http.disconnect'})
+        await communicator.wait(1)
+
+
+class CommentThreadTests(TestCase):
+    """Top-level comments are paged; replies beyond the preview continue through the replies endpoint."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='thread@example.com', username='thread', password=PASSWORD)
+        self.post = Post.objects.create(creator=self.user, content_type='TEXT', text_content='x')
+        self.older = Comment.objects.create(user=self.user, post=self.post, text='older')
+        self.root = Comment.objects.create(user=self.user, post=self.post, text='root')
+        self.replies = [
+            Comment.objects.create(user=self.user, post=self.post, parent_comment=self.root, text=f"reply {i}")
+            for i in range(5)
+        ]
+        chain = self.replies[0]
+        for depth in range(2, 5):
+            chain = Comment.objects.create(user=self.user, post=self.post, parent_comment=chain, text=f"depth {depth}")
+        self.deepest = chain
+        self.client.defaults['HTTP_AUTHORIZATION'] = f"Bearer {RefreshToken.for_user(self.user).access_token}"
+
+    def test_tree_columns(self):
+        self.assertEqual(self.deepest.depth, 4)
+        self.assertEqual(self.deepest.path, f"{self.root.pk}/{self.replies[0].pk}/{self.deepest.parent_comment.parent_comment_id}/{self.deepest.parent_comment_id}/")
+        self.root.refresh_from_db()
+        self.assertEqual(self.root.reply_count, 5)
+        self.replies[4].delete()
+        self.root.refresh_from_db()
+        self.assertEqual(self.root.reply_count, 4)
+
+    def test_pages_and_reply_previews(self):
+        url = reverse('comment-list-create', kwargs={'content_id': self.post.content_id})
+        body = self.client.get(url, {'page_size': 1}).json()
+
+        root = body['results'][0]
+        self.assertEqual(root['id'], self.root.pk)
+        self.assertEqual(root['reply_count'], 5)
+        self.assertEqual([reply['id'] for reply in root['replies']], [reply.pk for reply in self.replies[:3]])
+        second_level = root['replies'][0]['replies'][0]
+        self.assertEqual((second_level['depth'], second_level['replies']), (2, []))
+        self.assertTrue(second_level['replies_next'].endswith(f"/comments/{second_level['id']}/replies/"))
+
+        rest = self.client.get(root['replies_next']).json()
+        self.assertEqual([reply['id'] for reply in rest['results']], [reply.pk for reply in self.replies[3:]])
+
+        next_page = self.client.get(body['next']).json()
+        self.assertEqual([comment['id'] for comment in next_page['results']], [self.older.pk])
+
+    def test_post_previews_are_bounded(self):
+        newer = [Comment.objects.create(user=self.user, post=self.post, text=f"newer {i}") for i in range(2)]
+        # Newest top-level comments (the oldest is left out), three replies of the root, two levels deep
+        self.assertEqual(post_comment_previews().filter(post=self.post).count(), 3 + 3 + 1)
+
+        body = self.client.get(reverse('post-detail', kwargs={'content_id': self.post.content_id})).json()
+        top = body['top_comments']
+        self.assertEqual([comment['id'] for comment in top], [newer[1].pk, newer[0].pk, self.root.pk])
+        self.assertEqual([reply['id'] for reply in top[2]['replies']], [reply.pk for reply in self.replies[:3]])
+        self.assertEqual(top[2]['reply_count'], 5)
+        second_level = top[2]['replies'][0]['replies'][0]
+        self.assertEqual((second_level['depth'], second_level['replies'], second_level['reply_count']), (2, [], 1))
+
+
+def comment_tree_errors():
+    """Ids of the comments whose path/depth/reply_count do not match the parent links."""
+    rows = {pk: rest for pk, *rest in Comment.objects.values_list('pk', 'parent_comment_id', 'path', 'depth', 'reply_count')}
+    replies = Counter(parent for parent, *_ in rows.values() if parent)
+    errors = []
+    for pk, (parent, path, depth, reply_count) in rows.items():
+        expected_path = f"{rows[parent][1]}{parent}/" if parent else ''
+        if (path, depth, reply_count) != (expected_path, expected_path.count('/'), replies[pk]):
+            errors.append(pk)
+    return errors
+
+
+def seed_threads(seed):
+    call_command(
+        'seed_content', '--users', '5', '--posts', '20', '--tags', '5', '--comments', '4',
+        '--reply-depth', '3', '--seed', str(seed), stdout=io.StringIO(),
+    )
+
+
+class BulkCommentTreeTests(TestCase):
+    """Bulk comment writers fill path/depth/reply_count like Comment.save()."""
+
+    def test_seeded_threads(self):
+        seed_threads(7)
+        self.assertTrue(Comment.objects.filter(depth__gte=2).exists())
+        self.assertEqual(comment_tree_errors(), [])
+
+
+class ContentTransferTests(TransactionTestCase):
+    """export_content/import_content round-trip users, posts, hypes and comment trees (exports need a real transaction)."""
+
+    def test_export_import_round_trip(self):
+        seed_threads(3)
+        snapshot = lambda: (
+            list(Comment.objects.order_by('pk').values_list('pk', 'path', 'depth', 'reply_count')),
+            list(Post.objects.order_by('content_id').values_list('content_id', 'hype_count', 'comment_count')),
+        )
+        before = snapshot()
+        stream = io.StringIO()
+        export_content(stream)
+        User.objects.all().delete()
+        self.assertFalse(Comment.objects.exists())
+
+        counts = import_content(io.StringIO(stream.getvalue()))
+        self.assertEqual(counts['comment'], (len(before[0]), len(before[0]), 0))
+        self.assertEqual(snapshot(), before)
+        self.assertEqual(comment_tree_errors(), [])
+
+        # Importing again: every comment id is taken, so every comment is reported as skipped
+        counts = import_content(io.StringIO(stream.getvalue()))
+        self.assertEqual(counts['comment'], (len(before[0]), len(before[0]), len(before[0])))
+        self.assertEqual(snapshot(), before)
+
+
+class PostAdminTests(TestCase):
+    """The changelist search is answered by indexes and stays at a fixed query count."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', username='admin', password=PASSWORD)
+        self.author = User.objects.create_user(email='writer@example.com', username='writer', password=PASSWORD)
+        self.tagged = Post.objects.create(creator=self.author, content_type='TEXT', description='Exam timetable', feed_types=['CSE'])
+        self.other = Post.objects.create(creator=self.admin, content_type='TEXT', text_content='Hostel notice', feed_types=['ECE'])
+        self.client.force_login(self.admin)
+
+    def search(self, term):
+        response = self.client.get(reverse('admin:content_post_changelist'), {'q': term})
+        self.assertEqual(response.status_code, 200)
+        return {post.pk for post in response.context['cl'].result_list}
+
+    def test_search_terms(self):
+        self.assertEqual(self.search(str(self.tagged.content_id)), {self.tagged.pk})
+        self.assertEqual(self.search('#cse'), {self.tagged.pk})
+        self.assertEqual(self.search('@writer'), {self.tagged.pk})
+        self.assertEqual(self.search('hostel'), {self.other.pk})
+
+    def test_queries_do_not_grow_with_rows(self):
+        url = reverse('admin:content_post_changelist')
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(url)
+        for i in range(10):
+            Post.objects.create(creator=self.author, content_type='TEXT', description=f"post {i}")
+        with CaptureQueriesContext(connection) as many:
+            self.client.get(url)
+        self.assertEqual(len(many), len(few))
+
+    def test_change_page_shows_recent_interactions_only(self):
+        from .admin import INLINE_RECENT
+        fans = [
+            User.objects.create_user(email=f"fan{i}@example.com", username=f"fan{i}", password=PASSWORD)
+            for i in range(INLINE_RECENT + 5)
+        ]
+        Hype.objects.bulk_create(Hype(user=fan, post=self.tagged) for fan in fans)
+        for fan in fans:
+            Comment.objects.create(user=fan, post=self.tagged, text='hi')
+        self.tagged.refresh_from_db()
+
+        response = self.client.get(reverse('admin:content_post_change', args=[self.tagged.pk]))
+        self.assertEqual(response.status_code, 200)
+        hypes, comments = response.context['inline_admin_formsets']
+        self.assertEqual(len(hypes.formset.forms), INLINE_RECENT)
+        self.assertEqual(len(comments.formset.forms), INLINE_RECENT)
+        self.assertContains(response, f"?post__id__exact={self.tagged.pk}")
+
+        hype_list = self.client.get(reverse('admin:content_hype_changelist'), {'post__id__exact': self.tagged.pk})
+        self.assertEqual(hype_list.context['cl'].result_count, len(fans))
+
+    def run_action(self, model_name, action, **data):
+        return self.client.post(reverse(f'admin:content_{model_name}_changelist') + f"?q={data.pop('q', '')}", {
+            'action': action, 'index': 0, **data,
+        })
+
+    def test_bulk_unpublish_and_republish_matching_search(self):
+        Post.objects.create(creator=self.author, content_type='TEXT', text_content='spam', feed_types=['CSE'])
+        self.assertEqual(Feed.objects.get(tag='CSE').total_used, 2)
+
+        self.run_action('post', 'unpublish_posts', q='@writer', select_across=1, _selected_action=[self.tagged.pk])
+        self.assertFalse(Post.objects.filter(creator=self.author, is_published=True).exists())
+        self.assertTrue(Post.objects.get(pk=self.other.pk).is_published)
+        self.assertEqual(Feed.objects.get(tag='CSE').total_used, 0)
+
+        self.run_action('post', 'republish_posts', _selected_action=[self.tagged.pk])
+        self.assertEqual(Feed.objects.get(tag='CSE').total_used, 1)
+
+        self.run_action('post', 'delete_selected', post='yes', _selected_action=[self.tagged.pk, self.other.pk])
+        self.assertFalse(Post.objects.filter(is_published=True).exists())
+        self.assertEqual(DeletionJob.objects.filter(target_type='POST').count(), 2)
+
+    def test_republish_skips_posts_queued_for_deletion(self):
+        spammer = User.objects.create_user(email='spammer@example.com', username='spammer', password=PASSWORD)
+        spam = Post.objects.create(creator=spammer, content_type='TEXT', text_content='spam')
+        schedule_post_deletion(self.tagged)
+        schedule_user_deletion(spammer)
+        set_posts_published(Post.objects.filter(pk=self.other.pk), False)
+
+        self.run_action('post', 'republish_posts', _selected_action=[self.tagged.pk, self.other.pk, spam.pk])
+        self.assertEqual(set(Post.objects.filter(is_published=True).values_list('pk', flat=True)), {self.other.pk})
+        self.assertEqual(DeletionJob.objects.filter(status='PENDING').count(), 2)
+
+    def test_existing_comments_cannot_be_moved(self):
+        first = Comment.objects.create(user=self.author, post=self.tagged, text='first')
+        second = Comment.objects.create(user=self.author, post=self.tagged, text='second')
+        reply = Comment.objects.create(user=self.admin, post=self.tagged, parent_comment=first, text='reply')
+
+        response = self.client.post(reverse('admin:content_comment_change', args=[reply.pk]), {
+            'user': self.admin.pk, 'post': self.other.pk, 'parent_comment': second.pk, 'text': 'edited',
+        })
+        self.assertEqual(response.status_code, 302)
+        reply.refresh_from_db()
+        self.assertEqual((reply.text, reply.post_id, reply.parent_comment_id, reply.path), ('edited', self.tagged.pk, first.pk, f"{first.pk}/"))
+        self.assertEqual(comment_tree_errors(), [])
+
+        page = self.client.get(reverse('admin:content_post_change', args=[self.tagged.pk]))
+        comments = page.context['inline_admin_formsets'][1]
+        self.assertNotIn('parent_comment', comments.formset.forms[0].fields)
+
+    def test_bulk_comment_delete_removes_whole_threads(self):
+        root = Comment.objects.create(user=self.author, post=self.tagged, text='root')
+        reply = Comment.objects.create(user=self.admin, post=self.tagged, parent_comment=root, text='reply')
+        Comment.objects.create(user=self.author, post=self.tagged, parent_comment=reply, text='nested')
+        kept = Comment.objects.create(user=self.admin, post=self.tagged, parent_comment=root, text='kept')
+
+        self.run_action('comment', 'delete_selected', post='yes', _selected_action=[reply.pk])
+        self.assertEqual(set(Comment.objects.values_list('pk', flat=True)), {root.pk, kept.pk})
+        root.refresh_from_db()
+        self.tagged.refresh_from_db()
+        self.assertEqual((root.reply_count, self.tagged.comment_count), (1, 2))
+
+
+class ArchiveTests(TestCase):
+    """Old posts move to segment files and are still served by the detail and public user endpoints."""
+
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir)
+        settings_override = override_settings(CONTENT_ARCHIVE_DIR=self.archive_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='old@example.com', username='old', password=PASSWORD)
+        self.old = Post.objects.create(creator=self.user, content_type='TEXT', text_content='from last year', feed_types=['CSE'])
+        self.recent = Post.objects.create(creator=self.user, content_type='TEXT', text_content='from today')
+        root = Comment.objects.create(user=self.user, post=self.old, text='first')
+        Comment.objects.create(user=self.user, post=self.old, parent_comment=root, text='reply')
+        Hype.objects.create(user=self.user, post=self.old)
+        Post.objects.filter(pk=self.old.pk).update(created_at=timezone.now() - timedelta(days=400))
+        self.client.defaults['HTTP_AUTHORIZATION'] = f"Bearer {RefreshToken.for_user(self.user).access_token}"
+
+    def test_archived_posts_are_served_from_segments(self):
+        call_command('archive_posts', '--older-than-days', '365', stdout=io.StringIO())
+        self.assertEqual(list(Post.objects.values_list('pk', flat=True)), [self.recent.pk])
+        self.assertFalse(Comment.objects.exists() or Hype.objects.exists())
+
+        body = self.client.get(reverse('post-detail', kwargs={'content_id': self.old.content_id})).json()
+        self.assertEqual((body['text_content'], body['hype_count'], body['comment_count']), ('from last year', 1, 2))
+        self.assertEqual(body['top_comments'][0]['replies'][0]['text'], 'reply')
+
+        listed = self.client.get(reverse('public-user-post-list', kwargs={'user_is': self.user.user_is})).json()
+        self.assertEqual([post['content_id'] for post in listed], [str(self.recent.content_id), str(self.old.content_id)])
+
+        missing = self.client.get(reverse('post-detail', kwargs={'content_id': uuid.uuid4()}))
+        self.assertEqual(missing.status_code, 404)
+
+    def test_archived_posts_release_their_tags(self):
+        self.assertEqual(Feed.objects.get(tag='CSE').total_used, 1)
+        call_command('archive_posts', '--older-than-days', '365', stdout=io.StringIO())
+        self.assertEqual(Feed.objects.get(tag='CSE').total_used, 0)
+
+        remove_archived_post(self.old.content_id)
+        self.assertEqual(Feed.objects.get(tag='CSE').total_used, 0)
+        out = io.StringIO()
+        call_command('recount_feed_tags', '--dry-run', stdout=out)
+        self.assertIn("0 Feed count(s) would be corrected", out.getvalue())
+
+    def served(self):
+        detail = self.client.get(reverse('post-detail', kwargs={'content_id': self.old.content_id}))
+        listed = self.client.get(reverse('public-user-post-list', kwargs={'user_is': self.user.user_is})).json()
+        return detail.status_code, [post['content_id'] for post in listed]
+
+    def test_deleting_a_post_kept_live_does_not_resurrect_its_segment_copy(self):
+        archived = write_segment(timezone.now() - timedelta(days=365))
+        fan = User.objects.create_user(email='late@example.com', username='late', password=PASSWORD)
+        Hype.objects.create(user=fan, post=self.old)  # counters move between writing and deleting
+        self.assertEqual(delete_archived(archived), 0)
+
+        schedule_post_deletion(self.old)
+        self.assertEqual(self.served(), (404, [str(self.recent.content_id)]))
+        self.assertEqual(run_deletion_job(DeletionJob.objects.get()).status, 'DONE')
+        self.assertEqual(self.served(), (404, [str(self.recent.content_id)]))
+        self.assertEqual(ArchiveTombstone.objects.get().reason, 'DELETED')
+
+    def test_archived_only_post_can_be_removed(self):
+        call_command('archive_posts', '--older-than-days', '365', stdout=io.StringIO())
+        self.assertTrue(remove_archived_post(self.old.content_id))
+        self.assertFalse(remove_archived_post(self.old.content_id))
+
+        self.assertEqual(self.served(), (404, [str(self.recent.content_id)]))
+        self.assertEqual(ContentChange.objects.get(content_id=self.old.content_id).state, 'DELETED')
+
+
+def at(moment):
+    return datetime.fromisoformat(f"{moment}+00:00")
+
+
+class TrendingTagsTests(TestCase):
+    """Tag uses land in hourly buckets; rollup and the sliding windows count every use exactly once."""
+
+    NOW = at('2026-03-10T15:30')
+
+    def use(self, tag, *moments):
+        for moment in moments:
+            record_tag_usage([tag], at(moment))
+
+    def buckets(self):
+        return {
+            (tag, granularity, bucket_start.isoformat()[:16]): count
+            for tag, granularity, bucket_start, count in TagUsageBucket.objects.values_list('tag', 'granularity', 'bucket_start', 'count')
+        }
+
+    def counts(self, window, now):
+        return {row['tag']: (row['window_count'], row['baseline_count']) for row in trending_tags(window, now=now)}
+
+    def test_window_edges_follow_the_hour_boundaries(self):
+        self.use('CSE', '2026-03-09T14:10', '2026-03-09T15:10', '2026-03-10T14:10', '2026-03-10T15:05', '2026-03-10T15:55', '2026-03-10T16:15')
+
+        # 14:00 bucket starts before the window (baseline); 16:00 is in the future; 03-09 14:00 precedes the baseline
+        self.assertEqual(self.counts('1h', at('2026-03-10T15:30')), {'CSE': (2, 2)})
+        # Buckets starting exactly on the window or baseline start are inside it, once
+        self.assertEqual(self.counts('1h', at('2026-03-10T16:00')), {'CSE': (3, 2)})
+        # 15:00 slides from the window into the baseline, 03-09 15:00 out of the baseline
+        self.assertEqual(self.counts('1h', at('2026-03-10T16:30')), {'CSE': (1, 3)})
+        self.assertEqual(self.counts('1h', at('2026-03-10T17:30')), {})
+        self.assertEqual(self.counts('24h', at('2026-03-10T16:30')), {'CSE': (4, 2)})
+
+    def test_rollup_moves_every_hour_once(self):
+        self.use('CSE', '2026-03-07T10:05', '2026-03-07T10:40', '2026-03-07T23:59', '2026-03-08T00:00')
+        self.use('AI', '2026-03-06T12:00')
+        before = self.counts('7d', self.NOW)
+        self.assertEqual(before, {'CSE': (4, 0), 'AI': (1, 0)})
+
+        # Hours of the days that ended before now - HOURLY_RETENTION become day buckets
+        self.assertEqual(rollup_tag_buckets(self.NOW), (3, 0))
+        self.assertEqual(self.buckets(), {
+            ('CSE', 'DAY', '2026-03-07T00:00'): 3,
+            ('CSE', 'HOUR', '2026-03-08T00:00'): 1,
+            ('AI', 'DAY', '2026-03-06T00:00'): 1,
+        })
+        self.assertEqual(self.counts('7d', self.NOW), before)
+        self.assertEqual(rollup_tag_buckets(self.NOW), (0, 0))
+
+        # A late hour joins its existing day; the next day rolls up a day later
+        self.use('CSE', '2026-03-07T12:00')
+        self.assertEqual(rollup_tag_buckets(self.NOW), (1, 0))
+        self.assertEqual(rollup_tag_buckets(self.NOW + timedelta(days=1)), (1, 0))
+        self.assertEqual(self.buckets(), {
+            ('CSE', 'DAY', '2026-03-07T00:00'): 4,
+            ('CSE', 'DAY', '2026-03-08T00:00'): 1,
+            ('AI', 'DAY', '2026-03-06T00:00'): 1,
+        })
+
+        # A day bucket that starts before the window start counts in the baseline only
+        self.assertEqual(self.counts('7d', at('2026-03-14T12:00')), {'CSE': (1, 4)})
+        self.assertEqual(rollup_tag_buckets(self.NOW + timedelta(days=40)), (0, 3))
+        self.assertEqual(self.buckets(), {})
+
+
+class HotPostsTests(TestCase):
+    """Hypes and comments rescore a post at once; /api/content/trending/ serves the stored order."""
+
+    def setUp(self):
+        self.author = User.objects.create_user(email='author@example.com', username='author', password=PASSWORD)
+        self.fans = [
+            User.objects.create_user(email=f"fan{n}@example.com", username=f"fan{n}", password=PASSWORD)
+            for n in range(2)
+        ]
+        self.old, self.new = [
+            Post.objects.create(creator=self.author, content_type='TEXT', text_content=text) for text in ('old', 'new')
+        ]
+        # One half-life apart: the old post needs twice the weighted engagement to tie
+        Post.objects.filter(pk=self.old.pk).update(created_at=timezone.now() - timedelta(hours=12))
+        self.assertEqual(refresh_post_scores([self.old.pk, self.new.pk]), 2)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f"Bearer {RefreshToken.for_user(self.author).access_token}"
+
+    def trending(self):
+        response = self.client.get(reverse('post-trending'))
+        self.assertEqual(response.status_code, 200)
+        return [item['content_id'] for item in response.json()]
+
+    def test_engagement_reorders_and_unpublishing_removes(self):
+        old, new = str(self.old.content_id), str(self.new.content_id)
+        self.assertEqual(self.trending(), [new, old])
+
+        # ln(1 + 1 + 2) - ln 2 > ln 1
+        Hype.objects.create(user=self.fans[0], post=self.old)
+        Comment.objects.create(user=self.fans[0], post=self.old, text='first')
+        self.assertEqual(self.trending(), [old, new])
+
+        # ln(1 + 2) > ln 2
+        for fan in self.fans:
+            Hype.objects.create(user=fan, post=self.new)
+        self.assertEqual(self.trending(), [new, old])
+
+        # The incremental scores match a recomputation from the counters
+        scores = dict(PostScore.objects.values_list('post_id', 'score'))
+        refresh_post_scores()
+        for post_id, score in PostScore.objects.values_list('post_id', 'score'):
+            self.assertAlmostEqual(score, scores[post_id])
+
+        self.new.is_published = False
+        self.new.save(update_fields=['is_published'])
+        self.assertEqual(self.trending(), [old])
+        self.assertFalse(PostScore.objects.filter(post=self.new).exists())
+
+
+class RankingTests(TestCase):
+    """?order=ranked scores candidates in bulk and spreads the top of the feed across creators."""
+
+    def setUp(self):
+        self.viewer = User.objects.create_user(email='viewer@example.com', username='viewer', password=PASSWORD)
+        StudentProfile.objects.create(user=self.viewer, college_university='MIT', department='CSE', feed_types=['CSE'])
+        self.prolific = User.objects.create_user(email='prolific@example.com', username='prolific', password=PASSWORD)
+        self.other = User.objects.create_user(email='other@example.com', username='other', password=PASSWORD)
+        self.flood = [
+            Post.objects.create(creator=self.prolific, content_type='TEXT', text_content=f"flood {n}", feed_types=['CSE'])
+            for n in range(4)
+        ]
+        self.quiet = Post.objects.create(creator=self.other, content_type='TEXT', text_content='quiet', feed_types=['ART'])
+        self.hidden = Post.objects.create(creator=self.other, content_type='TEXT', text_content='hidden', is_published=False)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f"Bearer {RefreshToken.for_user(self.viewer).access_token}"
+
+    def test_ranked_feed_limits_and_diversifies(self):
+        response = self.client.get(reverse('post-list-create'), {'order': 'ranked', 'limit': 3})
+        ids = [post['content_id'] for post in response.json()]
+        self.assertEqual(len(ids), 3)
+        self.assertIn(str(self.quiet.content_id), ids)
+        self.assertNotIn(str(self.hidden.content_id), ids)
+
+    def test_followed_tags_and_engagement_raise_the_score(self):
+        Post.objects.filter(pk=self.flood[0].pk).update(hype_count=50, comment_count=10)
+        response = self.client.get(reverse('post-list-create'), {'order': 'ranked'})
+        ids = [post['content_id'] for post in response.json()]
+        self.assertEqual(ids[0], str(self.flood[0].content_id))
+        self.assertEqual(len(ids), 5)
+
+
+class SimilarPostsTests(TestCase):
+    """compute_similar_posts folds new hypes into PostSimilarity, which the similar endpoint serves."""
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(email=f"fan{n}@example.com", username=f"fan{n}", password=PASSWORD)
+            for n in range(3)
+        ]
+        author = self.users[0]
+        self.a, self.b, self.c, self.d = [
+            Post.objects.create(creator=author, content_type='TEXT', text_content=f"post {n}") for n in range(4)
+        ]
+        for user in self.users[:2]:
+            Hype.objects.create(user=user, post=self.a)
+            Hype.objects.create(user=user, post=self.b)
+        Hype.objects.create(user=self.users[2], post=self.c)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f"Bearer {RefreshToken.for_user(author).access_token}"
+
+    def similar(self, post):
+        response = self.client.get(reverse('post-similar', kwargs={'content_id': post.content_id}))
+        return [item['content_id'] for item in response.json()]
+
+    def run_job(self, **kwargs):
+        # Every hype counts as settled
+        return compute_similar_posts(now=timezone.now() + timedelta(minutes=5), **kwargs)
+
+    def test_co_hyped_posts_are_similar(self):
+        self.assertEqual(self.run_job(), (5, 3, 0))
+        self.assertEqual(self.similar(self.a), [str(self.b.content_id)])
+        self.assertEqual(self.similar(self.c), [])
+
+    def test_incremental_run_only_recomputes_affected_posts(self):
+        self.run_job()
+        for user in self.users[1:]:
+            Hype.objects.get_or_create(user=user, post=self.d)
+        Hype.objects.create(user=self.users[1], post=self.c)
+        PostSimilarity.objects.filter(post=self.b).update(score=0.5)
+
+        read, recomputed, _ = self.run_job()
+        self.assertEqual((read, recomputed), (3, 4))  # fan1 and fan2 hyped a, b, c and d between them
+        self.assertEqual(set(self.similar(self.d)), {str(self.c.content_id)})
+        self.assertEqual(PostSimilarity.objects.get(post=self.b).score, 1.0)
+
+
+class RelatedTagsTests(TestCase):
+    """build_tag_cooccurrence counts tag pairs incrementally and the related-tags endpoint serves them."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(email='tagger@example.com', username='tagger', password=PASSWORD)
+        for tags in (['CSE', 'AI'], ['CSE', 'AI'], ['CSE', 'ART'], ['MUSIC']):
+            self.post(tags)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f"Bearer {RefreshToken.for_user(self.user).access_token}"
+
+    def post(self, tags):
+        return Post.objects.create(creator=self.user, content_type='TEXT', text_content='tagged', feed_types=tags)
+
+    def related(self, tag):
+        return self.client.get(reverse('feed-tag-related', kwargs={'tag': tag})).json()['related']
+
+    def run_job(self, **kwargs):
+        return build_tag_cooccurrence(now=timezone.now() + timedelta(minutes=5), **kwargs)
+
+    def test_pairs_seen_on_enough_posts_become_related(self):
+        self.assertEqual(self.run_job(), (4, 4))
+        self.assertEqual([item['tag'] for item in self.related('cse')], ['AI'])
+        self.assertEqual(self.related('MUSIC'), [])
+        self.assertEqual(self.client.get(reverse('feed-tag-related', kwargs={'tag': 'NOPE'})).status_code, 404)
+
+    def test_incremental_run_matches_full_rebuild(self):
+        self.run_job()
+        self.post(['ART', 'CSE', 'art'])
+        self.assertEqual(self.run_job()[0], 1)
+        incremental = {tag: self.related(tag) for tag in ('CSE', 'AI', 'ART')}
+        self.assertEqual([item['tag'] for item in incremental['ART']], ['CSE'])
+
+        self.run_job(full=True)
+        self.assertEqual({tag: self.related(tag) for tag in ('CSE', 'AI', 'ART')}, incremental)
+
+
+class MediaBlobTests(TestCase):
+    """Identical uploads are stored once, reference-counted, and can be skipped by sending their hash."""
+
+    POSTER = b'campus poster ' * 1000
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.user = User.objects.create_user(email='poster@example.com', username='poster', password=PASSWORD)
+        StudentProfile.objects.create(user=self.user)
+        self.client.defaults['HTTP_AUTHORIZATION'] = f"Bearer {RefreshToken.for_user(self.user).access_token}"
+        self.sha256 = hashlib.sha256(self.POSTER).hexdigest()
+
+    def upload(self, filename):
+        return self.client.post(reverse('post-list-create'), {
+            'content_type': 'IMAGE', 'media_file': SimpleUploadedFile(filename, self.POSTER),
+        })
+
+    def test_duplicate_uploads_share_one_blob(self):
+        self.assertEqual(self.client.get(reverse('media-blob', kwargs={'sha256': self.sha256})).status_code, 404)
+        self.assertEqual(self.upload('poster.PNG').status_code, 201)
+        self.assertEqual(self.upload('copy.png').status_code, 201)
+
+        blob = MediaBlob.objects.get()
+        self.assertEqual((blob.sha256, blob.size, blob.refcount), (self.sha256, len(self.POSTER), 2))
+        self.assertEqual(set(Post.objects.values_list('media_file', flat=True)), {blob.name})
+        self.assertEqual(os.listdir(os.path.dirname(os.path.join(self.media_root, blob.name))), [os.path.basename(blob.name)])
+
+        listed = self.client.get(reverse('user-post-list')).json()
+        self.assertEqual({post['media_sha256'] for post in listed}, {self.sha256})
+
+    def test_hash_instead_of_upload(self):
+        self.upload('poster.png')
+        found = self.client.get(reverse('media-blob', kwargs={'sha256': self.sha256.upper()}))
+        self.assertEqual(found.json()['size'], len(self.POSTER))
+
+        created = self.client.post(
+            reverse('post-list-create'), {'content_type': 'IMAGE', 'media_sha256': self.sha256}, content_type='application/json',
+        )
+        self.assertEqual(created.status_code, 201)
+        unknown = self.client.post(
+            reverse('post-list-create'), {'content_type': 'IMAGE', 'media_sha256': '0' * 64}, content_type='application/json',
+        )
+        self.assertEqual(unknown.status_code, 400)
+
+        profile = self.client.patch(
+            reverse('user_profile_update'), {'profile_image_sha256': self.sha256}, content_type='application/json',
+        )
+        self.assertEqual(profile.json()['profile_image_sha256'], self.sha256)
+        self.assertEqual(MediaBlob.objects.get().refcount, 3)
+
+    def test_unreferenced_blobs_are_collected(self):
+        self.upload('poster.png')
+        blob = MediaBlob.objects.get()
+        Post.objects.get().delete()
+        self.assertEqual(MediaBlob.objects.get().refcount, 0)
+
+        self.assertEqual(collect_unreferenced_blobs(), 0)  # still within the grace period
+        self.assertEqual(collect_unreferenced_blobs(now=timezone.now() + timedelta(days=2)), 1)
+        self.assertFalse(MediaBlob.objects.exists())
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, blob.name)))
+
+    def test_grace_period_runs_from_the_last_reference(self):
+        self.upload('poster.png')
+        MediaBlob.objects.update(created_at=timezone.now() - timedelta(days=30))
+        self.assertIsNone(MediaBlob.objects.get().unreferenced_since)
+
+        Post.objects.get().delete()
+        later = timezone.now() + timedelta(hours=20)
+        self.assertEqual(collect_unreferenced_blobs(now=later), 0)
+
+        # A hash lookup restarts the grace period for the post about to be saved with it
+        MediaBlob.objects.update(unreferenced_since=timezone.now() - timedelta(days=3))
+        self.assertEqual(self.client.get(reverse('media-blob', kwargs={'sha256': self.sha256})).status_code, 200)
+        self.assertEqual(collect_unreferenced_blobs(now=later), 0)
+        created = self.client.post(
+            reverse('post-list-create'), {'content_type': 'IMAGE', 'media_sha256': self.sha256}, content_type='application/json',
+        )
+        self.assertEqual(created.status_code, 201)
+        blob = MediaBlob.objects.get()
+        self.assertEqual((blob.refcount, blob.unreferenced_since), (1, None))
+        self.assertEqual(collect_unreferenced_blobs(now=timezone.now() + timedelta(days=5)), 0)
@@ -0,0 +1,421 @@
+import datetime
+import gzip
+import json
+import sys
+import uuid
+from contextlib import contextmanager
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from accounts.models import User, StudentProfile
+from .models import Post, Hype, Comment, Feed
+
+# ----------------------------------------------------------------------
+# Streaming NDJSON export/import of users and content
+# (used by `manage.py export_content` and `manage.py import_content`)
+#
+# Every line is one JSON object: a header line {"format": ..., "version": ...}
+# followed by {"model": <name>, "fields": {...}} rows. Models are written in
+# dependency order so an import never needs to look ahead, and foreign keys
+# are written as public identifiers (user_is / content_id) instead of pks.
+# Comments are the exception: they have no public id, so they keep their pk
+# and point at their parent by pk.
+# ----------------------------------------------------------------------
+
+FORMAT_NAME = 'turnin-content'
+FORMAT_VERSION = 1
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# model name -> (export queryset factory, {json field: ORM lookup})
+EXPORT_SPECS = {
+    'user': (
+        lambda: User.objects.order_by('pk'),
+        {
+            'user_is': 'user_is',
+            'email': 'email',
+            'username': 'username',
+            'password': 'password',
+            'first_name': 'first_name',
+            'last_name': 'last_name',
+            'is_active': 'is_active',
+            'is_staff': 'is_staff',
+            'is_superuser': 'is_superuser',
+            'date_joined': 'date_joined',
+            'last_login': 'last_login',
+        },
+    ),
+    'studentprofile': (
+        lambda: StudentProfile.objects.order_by('pk'),
+        {
+            'user': 'user__user_is',
+            'profile_image': 'profile_image',
+            'college_university': 'college_university',
+            'department': 'department',
+            'course': 'course',
+            'current_year': 'current_year',
+            'feed_types': 'feed_types',
+        },
+    ),
+    'feed': (
+        lambda: Feed.objects.order_by('pk'),
+        {
+            'tag': 'tag',
+            'total_used': 'total_used',
+            'Rank': 'Rank',
+            'created_at': 'created_at',
+            'last_used_at': 'last_used_at',
+        },
+    ),
+    'post': (
+        lambda: Post.objects.order_by('pk'),
+        {
+            'content_id': 'content_id',
+            'creator': 'creator__user_is',
+            'content_type': 'content_type',
+            'text_content': 'text_content',
+            'media_file': 'media_file',
+            'posted_by': 'posted_by',
+            'description': 'description',
+            'feed_types': 'feed_types',
+            'created_at': 'created_at',
+            'is_published': 'is_published',
+            'updated': 'updated',
+            'updated_at': 'updated_at',
+            'hype_count': 'hype_count',
+            'comment_count': 'comment_count',
+        },
+    ),
+    'hype': (
+        lambda: Hype.objects.order_by('pk'),
+        {
+            'user': 'user__user_is',
+            'post': 'post__content_id',
+            'created_at': 'created_at',
+        },
+    ),
+    'comment': (
+        # Ordered by pk, so a parent always precedes its replies
+        lambda: Comment.objects.order_by('pk'),
+        {
+            'id': 'id',
+            'user': 'user__user_is',
+            'post': 'post__content_id',
+            'parent_comment': 'parent_comment_id',
+            'text': 'text',
+            'created_at': 'created_at',
+        },
+    ),
+}
+
+MODEL_ORDER = list(EXPORT_SPECS)
+
+
+class ExportJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder truncates datetimes to milliseconds; keep the full precision."""
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def open_stream(path, mode):
+    """Opens a (gzip-compressed unless the path ends in .ndjson) text stream; '-' is stdin/stdout."""
+    if path == '-':
+        return sys.stdin if mode == 'r' else sys.stdout
+    if path.endswith('.ndjson'):
+        return open(path, mode + 't', encoding='utf-8')
+    return gzip.open(path, mode + 't', encoding='utf-8')
+
+
+# ----------------------------------------------------------------------
+# 1. Export
+# ----------------------------------------------------------------------
+
+def export_content(stream, models=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Writes the selected models to the stream as NDJSON and returns {model: rows}.
+    Runs in one REPEATABLE READ transaction so all models come from the same
+    snapshot, and reads every table through a server-side cursor.
+    """
+    encoder = ExportJSONEncoder(separators=(',', ':'))
+    counts = {}
+
+    stream.write(encoder.encode({'format': FORMAT_NAME, 'version': FORMAT_VERSION}) + '\n')
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+
+        for model_name in MODEL_ORDER:
+            if models and model_name not in models:
+                continue
+
+            queryset_factory, field_map = EXPORT_SPECS[model_name]
+            json_fields = list(field_map)
+            rows = queryset_factory().values_list(*field_map.values()).iterator(chunk_size=chunk_size)
+
+            count = 0
+            for row in rows:
+                stream.write(encoder.encode({'model': model_name, 'fields': dict(zip(json_fields, row))}))
+                stream.write('\n')
+                count += 1
+            counts[model_name] = count
+
+    return counts
+
+
+# ----------------------------------------------------------------------
+# 2. Import
+# ----------------------------------------------------------------------
+
+@contextmanager
+def preserve_timestamps(*models):
+    """Temporarily disables auto_now/auto_now_add so imported timestamps are kept as-is."""
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+def _user_ids(rows, key='user'):
+    """Maps the user_is values referenced by a batch to local user pks (one query)."""
+    keys = {row[key] for row in rows}
+    return dict(User.objects.filter(user_is__in=keys).values_list('user_is', 'pk'))
+
+
+def _post_ids(rows, key='post'):
+    """Maps the content_id values referenced by a batch to local post pks (one query)."""
+    keys = {row[key] for row in rows}
+    return dict(Post.objects.filter(content_id__in=keys).values_list('content_id', 'pk'))
+
+
+def _import_users(rows, state):
+    User.objects.bulk_create([User(**row) for row in rows], ignore_conflicts=True)
+    return len(rows), 0
+
+
+def _import_profiles(rows, state):
+    user_ids = _user_ids(rows)
+    profiles = []
+    for row in rows:
+        user_id = user_ids.get(_uuid(row.pop('user')))
+        if user_id is not None:
+            profiles.append(StudentProfile(user_id=user_id, **row))
+    StudentProfile.objects.bulk_create(profiles, ignore_conflicts=True)
+    return len(profiles), 0
+
+
+def _import_feeds(rows, state):
+    Feed.objects.bulk_create(
+        [Feed(**row) for row in rows],
+        update_conflicts=True,
+        unique_fields=['tag'],
+        update_fields=['total_used', 'Rank', 'last_used_at'],
+    )
+    return len(rows), 0
+
+
+def _import_posts(rows, state):
+    user_ids = _user_ids(rows, key='creator')
+    posts = []
+    for row in rows:
+        creator_id = user_ids.get(_uuid(row.pop('creator')))
+        if creator_id is not None:
+            posts.append(Post(creator_id=creator_id, **row))
+    Post.objects.bulk_create(posts, ignore_conflicts=True)
+    return len(posts), 0
+
+
+def _import_hypes(rows, state):
+    user_ids = _user_ids(rows)
+    post_ids = _post_ids(rows)
+    hypes = []
+    for row in rows:
+        user_id = user_ids.get(_uuid(row['user']))
+        post_id = post_ids.get(_uuid(row['post']))
+        if user_id is not None and post_id is not None:
+            hypes.append(Hype(user_id=user_id, post_id=post_id, created_at=row['created_at']))
+    Hype.objects.bulk_create(hypes, ignore_conflicts=True)
+    return len(hypes), 0
+
+
+def _insert_comments(comments):
+    """Inserts the comments with their exported ids; returns the ids actually inserted (not taken already)."""
+    if not comments:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {Comment._meta.db_table} (id, user_id, post_id, parent_comment_id, text, created_at, path, depth, reply_count)
+            SELECT c.*, '', 0, 0
+            FROM unnest(%s::bigint[], %s::bigint[], %s::bigint[], %s::bigint[], %s::text[], %s::timestamptz[])
+                AS c(id, user_id, post_id, parent_comment_id, text, created_at)
+            ON CONFLICT (id) DO NOTHING
+            RETURNING id
+            """,
+            [
+                [comment.id for comment in comments],
+                [comment.user_id for comment in comments],
+                [comment.post_id for comment in comments],
+                [comment.parent_comment_id for comment in comments],
+                [comment.text for comment in comments],
+                [comment.created_at for comment in comments],
+            ],
+        )
+        return [comment_id for comment_id, in cursor.fetchall()]
+
+
+def _place_imported_comments(comment_ids):
+    """
+    Fills path/depth of the inserted comments from their parents (inserted
+    by this or an earlier batch) and adds them to their parents' reply_count.
+    """
+    if not comment_ids:
+        return
+    table = Comment._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH RECURSIVE tree(id, path, depth) AS (
+                SELECT c.id, COALESCE(p.path || p.id || '/', ''), COALESCE(p.depth + 1, 0)
+                FROM {table} c LEFT JOIN {table} p ON p.id = c.parent_comment_id
+                WHERE c.id = ANY(%(ids)s)
+                  AND (c.parent_comment_id IS NULL OR NOT c.parent_comment_id = ANY(%(ids)s))
+                UNION ALL
+                SELECT c.id, t.path || t.id || '/', t.depth + 1
+                FROM {table} c JOIN tree t ON c.parent_comment_id = t.id
+                WHERE c.id = ANY(%(ids)s)
+            )
+            UPDATE {table} c SET path = tree.path, depth = tree.depth
+            FROM tree WHERE c.id = tree.id
+            """,
+            {'ids': comment_ids},
+        )
+        cursor.execute(
+            f"""
+            UPDATE {table} c SET reply_count = c.reply_count + r.n
+            FROM (
+                SELECT parent_comment_id, COUNT(*) AS n FROM {table}
+                WHERE id = ANY(%s) AND parent_comment_id IS NOT NULL GROUP BY parent_comment_id
+            ) r
+            WHERE c.id = r.parent_comment_id
+            """,
+            [comment_ids],
+        )
+
+
+def _import_comments(rows, state):
+    """
+    Comments keep their exported ids. A row whose id is taken in this database
+    is skipped, and so is everything below it (its replies would otherwise
+    hang under the comment that owns the id); state['dropped_comments'] carries
+    the skipped and unresolved ids over to later batches.
+    """
+    dropped = state.setdefault('dropped_comments', set())
+    user_ids = _user_ids(rows)
+    post_ids = _post_ids(rows)
+    taken = set(Comment.objects.filter(pk__in=[row['id'] for row in rows]).values_list('pk', flat=True))
+    comments = []
+    resolved = 0
+    # Parents first (a reply always has a higher id than its parent)
+    for row in sorted(rows, key=lambda row: row['id']):
+        user_id = user_ids.get(_uuid(row['user']))
+        post_id = post_ids.get(_uuid(row['post']))
+        if user_id is None or post_id is None:
+            dropped.add(row['id'])
+            continue
+        resolved += 1
+        if row['id'] in taken or row['parent_comment'] in dropped:
+            dropped.add(row['id'])
+            continue
+        comments.append(Comment(
+            id=row['id'],
+            user_id=user_id,
+            post_id=post_id,
+            parent_comment_id=row['parent_comment'],
+            text=row['text'],
+            created_at=row['created_at'],
+        ))
+    inserted = _insert_comments(comments)
+    if len(inserted) < len(comments):
+        # Lost a race with a concurrent insert: later batches must not attach replies to those ids
+        dropped.update({comment.id for comment in comments} - set(inserted))
+    _place_imported_comments(inserted)
+    return resolved, resolved - len(inserted)
+
+
+IMPORTERS = {
+    'user': _import_users,
+    'studentprofile': _import_profiles,
+    'feed': _import_feeds,
+    'post': _import_posts,
+    'hype': _import_hypes,
+    'comment': _import_comments,
+}
+
+
+def _uuid(value):
+    # The lookup dicts are keyed by real UUIDs, not their string form
+    return value if isinstance(value, uuid.UUID) else uuid.UUID(value)
+
+
+def import_content(stream, batch_size=DEFAULT_CHUNK_SIZE, log=None):
+    """
+    Reads an export stream and bulk-inserts it batch by batch, committing each
+    batch on its own. Only one batch is held in memory at a time. Rows whose
+    user/post cannot be resolved are skipped; rows that already exist are left
+    untouched (Feed rows are updated). Returns {model: (read, resolved,
+    skipped)}, where skipped counts the resolved comments that were not
+    inserted because their id was taken (or their parent was skipped).
+    """
+    header = json.loads(stream.readline() or '{}')
+    if header.get('format') != FORMAT_NAME or header.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Not a {FORMAT_NAME} v{FORMAT_VERSION} export (header: {header!r}).")
+
+    counts = {}
+    state = {}
+    batch_model = None
+    batch = []
+
+    def flush():
+        if not batch:
+            return
+        with transaction.atomic():
+            resolved, skipped = IMPORTERS[batch_model](batch, state)
+        read, total, total_skipped = counts.get(batch_model, (0, 0, 0))
+        counts[batch_model] = (read + len(batch), total + resolved, total_skipped + skipped)
+        if log:
+            log(f"{batch_model}: {counts[batch_model][0]} read, {counts[batch_model][1]} resolved, {counts[batch_model][2]} skipped")
+        batch.clear()
+
+    with preserve_timestamps(User, Feed, Post, Hype, Comment):
+        for line in stream:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            model_name = record['model']
+            if model_name not in IMPORTERS:
+                raise ValueError(f"Unknown model {model_name!r} in export stream.")
+
+            if model_name != batch_model or len(batch) >= batch_size:
+                flush()
+                batch_model = model_name
+            batch.append(record['fields'])
+        flush()
+
+    if 'comment' in counts:
+        # Comments were inserted with explicit ids; move the sequence past them.
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Comment]):
+                cursor.execute(sql)
+
+    return counts
@@ -0,0 +1,297 @@
+import math
+from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import Sum, Q, F, FloatField, ExpressionWrapper, Value
+from django.db.models.functions import Coalesce, Greatest, Sqrt
+from django.utils import timezone
+from .models import Post, PostScore, TagUsageBucket
+
+# ----------------------------------------------------------------------
+# Trending Windows
+# ----------------------------------------------------------------------
+
+# window key -> (window length, baseline length the window is compared against)
+TRENDING_WINDOWS = {
+    '1h': (timedelta(hours=1), timedelta(hours=24)),
+    '24h': (timedelta(hours=24), timedelta(days=7)),
+    '7d': (timedelta(days=7), timedelta(days=28)),
+}
+DEFAULT_TRENDING_WINDOW = '24h'
+
+# HOUR buckets older than this are rolled up into DAY buckets.
+HOURLY_RETENTION = timedelta(hours=48)
+
+# DAY buckets older than this are dropped (must cover the longest window + baseline).
+DAILY_RETENTION = timedelta(days=40)
+
+# ----------------------------------------------------------------------
+# Hot Post Scoring
+# ----------------------------------------------------------------------
+
+# score = ln(1 + HYPE_WEIGHT * hypes + COMMENT_WEIGHT * comments)
+#         + ln(2) * created_at_epoch_seconds / HALF_LIFE_SECONDS
+#
+# Every HOT_HALF_LIFE of age costs a post half of its weighted engagement.
+# Because the decay term only depends on created_at, the relative order of two
+# scores never changes as time passes, so a stored score stays correct until
+# the post's own counters change.
+HOT_HYPE_WEIGHT = 1.0
+HOT_COMMENT_WEIGHT = 2.0
+HOT_HALF_LIFE = timedelta(hours=12)
+
+# Posts older than this drop out of the hot list (and the score table).
+HOT_POSTS_MAX_AGE = timedelta(days=7)
+
+_DECAY_PER_SECOND = math.log(2) / HOT_HALF_LIFE.total_seconds()
+
+
+# ----------------------------------------------------------------------
+# 1. Write Path (called from the post_save signal)
+# ----------------------------------------------------------------------
+
+def record_tag_usage(tags, used_at=None):
+    """
+    Adds one use of each tag to its current hourly bucket.
+    All tags of a post are upserted in a single INSERT ... ON CONFLICT statement.
+    """
+    used_at = used_at or timezone.now()
+    bucket_start = used_at.replace(minute=0, second=0, microsecond=0)
+    add_tag_usage({(tag, bucket_start): 1 for tag in set(tags)})
+
+
+def add_tag_usage(counts):
+    """
+    Adds {(tag, hourly bucket_start): uses} to the hourly buckets in one statement.
+    Used directly by bulk writers (e.g. seed_content) that bypass the signals.
+    """
+    if not counts:
+        return
+
+    table = TagUsageBucket._meta.db_table
+    rows = sorted(counts.items())
+    values_sql = ', '.join(['(%s, %s, %s, %s)'] * len(rows))
+    params = []
+    for (tag, bucket_start), count in rows:
+        params.extend([tag, 'HOUR', bucket_start, count])
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {table} (tag, granularity, bucket_start, count)
+            VALUES {values_sql}
+            ON CONFLICT (tag, granularity, bucket_start)
+            DO UPDATE SET count = {table}.count + EXCLUDED.count
+            """,
+            params,
+        )
+
+
+# ----------------------------------------------------------------------
+# 2. Read Path (used by TrendingFeedListView)
+# ----------------------------------------------------------------------
+
+def trending_tags(window=DEFAULT_TRENDING_WINDOW, limit=20, now=None):
+    """
+    Returns the tags used most above their own baseline rate within the window.
+
+    velocity = (window_count - expected) / sqrt(expected + 1), where 'expected'
+    is the tag's baseline count scaled down to the window length. Tags with
+    no baseline therefore rank by raw count, and habitually popular tags only
+    trend when they spike.
+    """
+    window_length, baseline_length = TRENDING_WINDOWS[window]
+    now = now or timezone.now()
+    window_start = now - window_length
+    baseline_start = window_start - baseline_length
+    scale = window_length / baseline_length
+
+    window_count = Coalesce(Sum('count', filter=Q(bucket_start__gte=window_start)), 0)
+    baseline_count = Coalesce(Sum('count', filter=Q(bucket_start__lt=window_start)), 0)
+
+    return (
+        TagUsageBucket.objects
+        .filter(bucket_start__gte=baseline_start, bucket_start__lte=now)
+        .values('tag')
+        .annotate(window_count=window_count, baseline_count=baseline_count)
+        .filter(window_count__gt=0)
+        .annotate(
+            expected=ExpressionWrapper(F('baseline_count') * Value(scale), output_field=FloatField()),
+        )
+        .annotate(
+            velocity=ExpressionWrapper(
+                (F('window_count') - F('expected')) / Sqrt(F('expected') + Value(1.0)),
+                output_field=FloatField(),
+            ),
+        )
+        .order_by('-velocity', '-window_count', 'tag')[:limit]
+    )
+
+
+# ----------------------------------------------------------------------
+# 3. Maintenance (run periodically via `manage.py rollup_tag_usage`)
+# ----------------------------------------------------------------------
+
+def rollup_tag_buckets(now=None):
+    """
+    Folds HOUR buckets from fully elapsed days older than HOURLY_RETENTION into
+    DAY buckets and drops DAY buckets past DAILY_RETENTION.
+    Returns (rolled_up_hours, pruned_days).
+    """
+    now = now or timezone.now()
+    hourly_cutoff = (now - HOURLY_RETENTION).replace(hour=0, minute=0, second=0, microsecond=0)
+    daily_cutoff = now - DAILY_RETENTION
+    table = TagUsageBucket._meta.db_table
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Move and aggregate in one statement so no usage is lost or double counted.
+            cursor.execute(
+                f"""
+                WITH moved AS (
+                    DELETE FROM {table}
+                    WHERE granularity = 'HOUR' AND bucket_start < %s
+                    RETURNING tag, bucket_start, count
+                ), inserted AS (
+                    INSERT INTO {table} (tag, granularity, bucket_start, count)
+                    SELECT tag, 'DAY', date_trunc('day', bucket_start), SUM(count)
+                    FROM moved
+                    GROUP BY tag, date_trunc('day', bucket_start)
+                    ON CONFLICT (tag, granularity, bucket_start)
+                    DO UPDATE SET count = {table}.count + EXCLUDED.count
+                )
+                SELECT COUNT(*) FROM moved
+                """,
+                [hourly_cutoff],
+            )
+            rolled_up = cursor.fetchone()[0]
+
+        pruned, _ = TagUsageBucket.objects.filter(
+            granularity='DAY', bucket_start__lt=daily_cutoff
+        ).delete()
+
+    return rolled_up, pruned
+
+
+# ----------------------------------------------------------------------
+# 4. Hot Posts: Incremental Write Path (called from the Hype/Comment signals)
+# ----------------------------------------------------------------------
+
+_SCORE_SQL = (
+    "LN(1 + p.hype_count * %s + p.comment_count * %s) "
+    "+ EXTRACT(EPOCH FROM p.created_at) * %s"
+)
+
+
+def _score_params():
+    return [HOT_HYPE_WEIGHT, HOT_COMMENT_WEIGHT, _DECAY_PER_SECOND]
+
+
+def bump_post_counters(post_id, hypes=0, comments=0, rescore=True):
+    """
+    Atomically applies counter deltas to a post and rescores it, in one statement.
+    The score row is only written while the post is published and recent enough.
+    Pass rescore=False when the post may be deleted in the same transaction.
+    """
+    post_table = Post._meta.db_table
+    score_table = PostScore._meta.db_table
+
+    if not rescore:
+        Post.objects.filter(pk=post_id).update(
+            hype_count=Greatest(F('hype_count') + hypes, 0),
+            comment_count=Greatest(F('comment_count') + comments, 0),
+        )
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH p AS (
+                UPDATE {post_table}
+                SET hype_count = GREATEST(hype_count + %s, 0),
+                    comment_count = GREATEST(comment_count + %s, 0)
+                WHERE id = %s
+                RETURNING id, hype_count, comment_count, created_at, is_published
+            )
+            INSERT INTO {score_table} (post_id, score, updated_at)
+            SELECT p.id, {_SCORE_SQL}, NOW()
+            FROM p
+            WHERE p.is_published AND p.created_at >= %s
+            ON CONFLICT (post_id)
+            DO UPDATE SET score = EXCLUDED.score, updated_at = EXCLUDED.updated_at
+            """,
+            [hypes, comments, post_id, *_score_params(), timezone.now() - HOT_POSTS_MAX_AGE],
+        )
+
+
+def refresh_post_scores(post_ids=None):
+    """
+    Recomputes scores from the stored counters (no COUNT(*) over Hype/Comment)
+    for the given posts, or for every recent published post when post_ids is None.
+    Posts that are unpublished or too old lose their score row.
+    Returns the number of scores written.
+    """
+    post_table = Post._meta.db_table
+    score_table = PostScore._meta.db_table
+    cutoff = timezone.now() - HOT_POSTS_MAX_AGE
+
+    id_filter = ''
+    id_params = []
+    if post_ids is not None:
+        post_ids = list(post_ids)
+        if not post_ids:
+            return 0
+        id_filter = 'AND p.id = ANY(%s)'
+        id_params = [post_ids]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            INSERT INTO {score_table} (post_id, score, updated_at)
+            SELECT p.id, {_SCORE_SQL}, NOW()
+            FROM {post_table} p
+            WHERE p.is_published AND p.created_at >= %s {id_filter}
+            ON CONFLICT (post_id)
+            DO UPDATE SET score = EXCLUDED.score, updated_at = EXCLUDED.updated_at
+            """,
+            [*_score_params(), cutoff, *id_params],
+        )
+        written = cursor.rowcount
+
+    stale = PostScore.objects.filter(Q(post__is_published=False) | Q(post__created_at__lt=cutoff))
+    if post_ids is not None:
+        stale = stale.filter(post_id__in=post_ids)
+    stale.delete()
+
+    return written
+
+
+# ----------------------------------------------------------------------
+# 5. Hot Posts: Read Path and Maintenance
+# ----------------------------------------------------------------------
+
+def hot_posts():
+    """
+    Published posts ordered by stored hot score (an index scan on PostScore.score).
+    Slice the result to the number of posts wanted.
+    """
+    return (
+        Post.objects
+        .filter(is_published=True, hot_score__isnull=False)
+        .select_related('creator')
+        .order_by('-hot_score__score')
+    )
+
+
+def decay_post_scores():
+    """
+    Periodic job (`manage.py decay_post_scores`): rescores every tracked post
+    with the current weights/half-life and prunes posts that went stale.
+    Returns (rescored, pruned).
+    """
+    cutoff = timezone.now() - HOT_POSTS_MAX_AGE
+    with transaction.atomic():
+        pruned, _ = PostScore.objects.filter(
+            Q(post__is_published=False) | Q(post__created_at__lt=cutoff)
+        ).delete()
+        rescored = refresh_post_scores()
+    return rescored, pruned
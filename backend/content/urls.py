@@ -2,13 +2,22 @@ from django.urls import path
 from .views import (
     PostListCreateView, 
     HypeToggleView,
+    SyncView,
     UserPostListView, 
     PublicUserPostListView,
     FeedListView,
+    TrendingFeedListView,
+    RelatedTagsView,
     PostDetailView,         
+    PostBatchView,
+    PostChangesView,
+    MediaBlobView,
     PostListByfeed_typesView,  
+    HotPostListView,
+    PostSimilarView,
     CommentListCreateView, 
     CommentDestroyView,   
+    CommentRepliesView,
 )
 
 urlpatterns = [
@@ -24,18 +33,38 @@ urlpatterns = [
     # Endpoint: /api/content/user/<user_is>/
     path('user/<uuid:user_is>/', PublicUserPostListView.as_view(), name='public-user-post-list'),
 
-    # 4. Content Detail by ID (Retrieve single post)
+    # 4. Content Detail by ID (Retrieve single post / PATCH to edit it)
     # Endpoint: /api/content/<content_id>/
     path('<uuid:content_id>/', PostDetailView.as_view(), name='post-detail'), 
     
+    # 4b. Several posts at once, in the requested order
+    # Endpoint: /api/content/batch/?ids=<uuid>,<uuid>,...
+    path('batch/', PostBatchView.as_view(), name='post-batch'),
+
+    # 4c. What changed since the client's token (delta sync)
+    # Endpoint: /api/content/changes/?since=<token>&posts=<uuid>,...
+    path('changes/', PostChangesView.as_view(), name='post-changes'),
+
+    # 4d. Is this file already stored? (skip the upload, send its sha256)
+    # Endpoint: /api/content/media/<sha256>/
+    path('media/<str:sha256>/', MediaBlobView.as_view(), name='media-blob'),
+
     # 5. Filter by feed_types 
     # Endpoint: /api/content/filter-by-feed_types/?feed_types=tag1,tag2
     path('filter-by-feed_types/', PostListByfeed_typesView.as_view(), name='post-list-by-feed_types'),
     
+    # 5b. Posts hyped by the same users (co-hype recommendations)
+    # Endpoint: /api/content/<content_id>/similar/
+    path('<uuid:content_id>/similar/', PostSimilarView.as_view(), name='post-similar'),
+
     # 6. Interaction (Hype Toggle)
     # Endpoint: /api/content/<content_id>/hype/
     path('<uuid:content_id>/hype/', HypeToggleView.as_view(), name='post-hype-toggle'),
 
+    # 6b. Offline actions (hype/unhype/comment) applied as one batch
+    # Endpoint: /api/content/sync/
+    path('sync/', SyncView.as_view(), name='post-sync'),
+
     # 7. Comment Endpoints (NEW)
     # Endpoint: /api/content/<content_id>/comments/
     path(
@@ -52,7 +81,27 @@ urlpatterns = [
         name='comment-delete'
     ),
     
+    # 8b. A comment's replies, one page at a time
+    # Endpoint: /api/content/<content_id>/comments/<pk>/replies/?cursor=...
+    path(
+        '<uuid:content_id>/comments/<int:pk>/replies/',
+        CommentRepliesView.as_view(),
+        name='comment-replies'
+    ),
+
     # 9. Feed/feed_types List (Ranked/Sorted feed_types)
     # Endpoint: /api/content/feed_types/
     path('feed_types/', FeedListView.as_view(), name='feed-tag-list'), 
-]
\ No newline at end of file
+
+    # 10. Trending feed_types over a sliding window (1h / 24h / 7d)
+    # Endpoint: /api/content/feed_types/trending/?window=24h
+    path('feed_types/trending/', TrendingFeedListView.as_view(), name='feed-tag-trending'),
+
+    # 10b. Tags most often used together with a tag
+    # Endpoint: /api/content/feed_types/<tag>/related/
+    path('feed_types/<str:tag>/related/', RelatedTagsView.as_view(), name='feed-tag-related'),
+
+    # 11. Hot/Trending Posts (time-decayed hype/comment score)
+    # Endpoint: /api/content/trending/?limit=50
+    path('trending/', HotPostListView.as_view(), name='post-trending'),
+]
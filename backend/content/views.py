@@ -1,15 +1,32 @@
+import uuid
+from functools import reduce
+from operator import or_
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import NotFound, PermissionDenied, ValidationError
+from rest_framework.pagination import Cursor, CursorPagination
 from rest_framework.response import Response
-from django.db.models import Q 
+from django.db.models import F, Q, Exists, OuterRef, Prefetch, Window
+from django.http import Http404
+from django.db.models.functions import RowNumber
+from django.urls import reverse
 from django.utils import timezone 
 from accounts.models import User 
 from .models import Post, Hype, Feed, Comment
 from .serializers import ( 
                             PostListSerializer, 
                             PostCreateSerializer, 
+                            PostUpdateSerializer,
                             FeedSerializer,
-                            CommentSerializer
+                            CommentSerializer,
+                            TrendingTagSerializer,
+                            post_comment_previews,
                         )
+from .trending import trending_tags, hot_posts, TRENDING_WINDOWS, DEFAULT_TRENDING_WINDOW
+from .sync import apply_sync_actions, SYNC_MAX_ACTIONS
+from .changes import changes_since, current_seq, make_token, read_token
+from .archive import find_archived_post, archived_posts_by_creator, hydrate_posts
+from .ranking import ranked_post_ids
+from .media import find_blob, media_storage
 
 # ----------------------------------------------------------------------
 # HELPER FUNCTION FOR FEED RANKING (Defined here for utility, executed by signal)
@@ -31,6 +48,112 @@ def calculate_and_update_rank(feed_instance):
     Feed.objects.filter(pk=feed_instance.pk).update(Rank=new_rank)
 
 
+# ----------------------------------------------------------------------
+# HELPER FUNCTIONS FOR CONSTANT-QUERY SERIALIZATION
+# ----------------------------------------------------------------------
+
+def with_post_relations(queryset, request):
+    """
+    Loads everything PostListSerializer reads in bulk, so serializing a page of
+    posts costs the same number of queries whatever its length: creator and
+    profile are joined, is_hyped is an EXISTS annotation and the comment
+    previews of all posts come from one bounded prefetch. Hype/comment counts
+    are columns on Post.
+    """
+    queryset = queryset.select_related('creator__studentprofile').prefetch_related(
+        Prefetch('comments', queryset=post_comment_previews(), to_attr='thread_comments'),
+    )
+
+    user = request.user
+    if user.is_authenticated:
+        queryset = queryset.annotate(
+            is_hyped_by_user=Exists(Hype.objects.filter(post=OuterRef('pk'), user=user))
+        )
+    return queryset
+
+
+# ----------------------------------------------------------------------
+# HELPER FUNCTIONS FOR PAGINATED COMMENT THREADS
+#
+# Top-level comments (and the replies of one comment) are served a page at a
+# time. Every comment on a page brings a preview of its replies: at most
+# COMMENT_REPLY_PREVIEW per comment, COMMENT_PREVIEW_LEVELS levels deep, all
+# loaded in one query through the materialized Comment.path. Whatever does not
+# fit is linked through 'replies_next' to the replies endpoint.
+# ----------------------------------------------------------------------
+
+COMMENT_PAGE_SIZE = 20
+COMMENT_REPLY_PREVIEW = 3
+COMMENT_PREVIEW_LEVELS = 2
+
+
+class CommentCursorPagination(CursorPagination):
+    """Top-level comments, newest first."""
+    page_size = COMMENT_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+
+
+class ReplyCursorPagination(CommentCursorPagination):
+    """Replies of one comment, oldest first."""
+    ordering = ('created_at', 'id')
+
+
+def replies_page_url(request, content_id, comment, shown):
+    """Replies endpoint URL of the comment, positioned after the replies already shown."""
+    url = request.build_absolute_uri(reverse('comment-replies', kwargs={'content_id': content_id, 'pk': comment.pk}))
+    if not shown:
+        return url
+    # Same marker as the paginator's own next links: filter past the newest shown
+    # timestamp that differs from the last one, then skip the replies sharing it
+    last = shown[-1].created_at
+    tied = [reply for reply in shown if reply.created_at == last]
+    earlier = [reply.created_at for reply in shown if reply.created_at != last]
+    position = str(earlier[-1]) if earlier else None
+    paginator = ReplyCursorPagination()
+    paginator.base_url = url
+    return paginator.encode_cursor(Cursor(offset=len(tied), reverse=False, position=position))
+
+
+def comment_thread_context(comments, request, content_id):
+    """
+    Loads the reply previews below a page of comments (all of the same depth)
+    in one ordered query. Returns the CommentSerializer context entries: the
+    children map and the 'replies_next' link of every comment with more replies.
+    """
+    children = {}
+    replies_next = {}
+    if not comments:
+        return {'comment_children': children, 'replies_next': replies_next}
+
+    sibling_rank = Window(
+        RowNumber(), partition_by=[F('parent_comment_id')], order_by=[F('created_at').asc(), F('id').asc()],
+    )
+    previews = (
+        Comment.objects
+        .filter(reduce(or_, (Q(path__startswith=comment.subtree_prefix) for comment in comments)))
+        .filter(depth__lte=comments[0].depth + COMMENT_PREVIEW_LEVELS)
+        .annotate(sibling_rank=sibling_rank)
+        .filter(sibling_rank__lte=COMMENT_REPLY_PREVIEW)
+        .select_related('user__studentprofile')
+        .order_by('depth', 'created_at', 'id')
+    )
+
+    # Parents come first (ordered by depth); a reply whose parent was cut off is dropped
+    shown = {comment.pk: comment for comment in comments}
+    for reply in previews:
+        if reply.parent_comment_id in shown:
+            shown[reply.pk] = reply
+            children.setdefault(reply.parent_comment_id, []).append(reply)
+
+    for comment in shown.values():
+        loaded = children.get(comment.pk, [])
+        if comment.reply_count > len(loaded):
+            replies_next[comment.pk] = replies_page_url(request, content_id, comment, loaded)
+    return {'comment_children': children, 'replies_next': replies_next}
+
+
 # ----------------------------------------------------------------------
 # 1. Post Feed (List) and Post Creation (Create) Endpoint
 # ----------------------------------------------------------------------
@@ -49,7 +172,13 @@ class PostListCreateView(generics.ListCreateAPIView):
             return PostCreateSerializer
         return PostListSerializer
 
+    def get_queryset(self):
+        return with_post_relations(super().get_queryset(), self.request)
+
     def list(self, request, *args, **kwargs):
+        if request.query_params.get('order') == 'ranked':
+            return self.ranked(request)
+
         queryset = self.filter_queryset(self.get_queryset())
         
         page = self.paginate_queryset(queryset)
@@ -60,6 +189,19 @@ class PostListCreateView(generics.ListCreateAPIView):
         serializer = self.get_serializer(queryset, many=True, context={'request': request})
         return Response(serializer.data)
 
+    def ranked(self, request):
+        """?order=ranked: the top `limit` posts for this user from content.ranking, unpaginated."""
+        try:
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), 200)
+        except ValueError:
+            limit = 50
+
+        ids = ranked_post_ids(request.user, limit)
+        posts = with_post_relations(Post.objects.filter(pk__in=ids), request).in_bulk()
+        ranked = [posts[pk] for pk in ids if pk in posts]
+        serializer = self.get_serializer(ranked, many=True, context={'request': request})
+        return Response(serializer.data)
+
     def perform_create(self, serializer):
         """
         Injects the current user as the creator and sets the posted_by status.
@@ -90,7 +232,8 @@ class UserPostListView(generics.ListAPIView):
 
     def get_queryset(self):
         user = self.request.user
-        return Post.objects.filter(creator=user).select_related('creator').order_by('-created_at')
+        queryset = Post.objects.filter(creator=user).order_by('-created_at')
+        return with_post_relations(queryset, self.request)
 
     def get_serializer_context(self):
         return {'request': self.request}
@@ -103,6 +246,7 @@ class UserPostListView(generics.ListAPIView):
 class PublicUserPostListView(generics.ListAPIView):
     """
     Returns a list of published posts created by a specific user (identified by user_is UUID).
+    Posts moved to the archive tier (content/archive.py) follow the live ones.
     """
     serializer_class = PostListSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -114,33 +258,224 @@ class PublicUserPostListView(generics.ListAPIView):
         try:
             creator_user = User.objects.get(user_is=user_uuid)
         except User.DoesNotExist:
+            self.creator_user = None
             return Post.objects.none() 
 
-        return Post.objects.filter(
+        self.creator_user = creator_user
+        queryset = Post.objects.filter(
             creator=creator_user, 
             is_published=True
-        ).select_related('creator').order_by('-created_at')
+        ).order_by('-created_at')
+        return with_post_relations(queryset, self.request)
+
+    def list(self, request, *args, **kwargs):
+        posts = list(self.get_queryset())
+        if self.creator_user is not None:
+            # Segment copies of posts still in the database are skipped by the archive
+            posts += hydrate_posts(archived_posts_by_creator(self.creator_user.pk))
+            posts.sort(key=lambda post: post.created_at, reverse=True)
+        return Response(self.get_serializer(posts, many=True).data)
         
     def get_serializer_context(self):
         return {'request': self.request}
 
 
 # ----------------------------------------------------------------------
-# 4. Post Detail Endpoint (GET /api/content/<content_id>/)
+# 4. Post Detail (GET) and Partial Update (PATCH) Endpoint (/api/content/<content_id>/)
 # ----------------------------------------------------------------------
 
-class PostDetailView(generics.RetrieveAPIView):
+class PostDetailView(generics.RetrieveUpdateAPIView):
     """
-    Retrieves a single published post by its content_id (UUID).
+    GET retrieves a single published post by its content_id (UUID).
+    PATCH lets the creator (or staff) edit its text, description, feed_types and
+    publish state; only the changed columns are written.
     """
     queryset = Post.objects.filter(is_published=True).select_related('creator')
     serializer_class = PostListSerializer
     permission_classes = [permissions.IsAuthenticated]
     lookup_field = 'content_id' 
+    http_method_names = ['get', 'patch', 'head', 'options']
+
+    def get_queryset(self):
+        if self.request.method == 'PATCH':
+            # Creators may edit (and republish) their own unpublished posts
+            user = self.request.user
+            if user.is_staff:
+                return Post.objects.all()
+            return Post.objects.filter(Q(is_published=True) | Q(creator=user))
+        return with_post_relations(super().get_queryset(), self.request)
+
+    def get_serializer_class(self):
+        if self.request.method == 'PATCH':
+            return PostUpdateSerializer
+        return PostListSerializer
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            # Old posts live on (read-only) in the archive tier
+            document = find_archived_post(self.kwargs['content_id'])
+            posts = hydrate_posts([document]) if document is not None else []
+            if not posts:
+                raise
+            return Response(self.get_serializer(posts[0]).data)
     
     def get_serializer_context(self):
         return {'request': self.request}
 
+    def partial_update(self, request, *args, **kwargs):
+        post = self.get_object()
+        if post.creator_id != request.user.pk and not request.user.is_staff:
+            raise PermissionDenied("You do not have permission to edit this post.")
+
+        serializer = self.get_serializer(post, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+
+        # Respond with the full post representation, loaded the same way as GET
+        post = with_post_relations(Post.objects.filter(pk=post.pk), request).get()
+        return Response(PostListSerializer(post, context=self.get_serializer_context()).data)
+
+
+# ----------------------------------------------------------------------
+# 4b. Batch Post Hydration Endpoint (GET /api/content/batch/?ids=<uuid>,<uuid>,...)
+# ----------------------------------------------------------------------
+
+# Maximum number of ids accepted by one batch request
+POST_BATCH_MAX_IDS = 100
+
+
+class PostBatchView(generics.GenericAPIView):
+    """
+    Returns the requested posts in the requested order, serialized like the
+    feed, in a fixed number of queries however many ids are asked for.
+    Ids that do not exist (or are malformed) are listed under 'missing' and
+    unpublished posts under 'unpublished' instead of failing the request.
+    """
+    serializer_class = PostListSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_serializer_context(self):
+        return {'request': self.request}
+
+    def get(self, request, *args, **kwargs):
+        raw_ids = [value.strip() for value in request.query_params.get('ids', '').split(',') if value.strip()]
+        raw_ids = list(dict.fromkeys(raw_ids))
+        if not raw_ids:
+            raise ValidationError({'ids': "Provide a comma-separated list of content ids."})
+        if len(raw_ids) > POST_BATCH_MAX_IDS:
+            raise ValidationError({'ids': f"At most {POST_BATCH_MAX_IDS} ids can be requested at once."})
+
+        requested = []
+        missing = []
+        for value in raw_ids:
+            try:
+                requested.append(uuid.UUID(value))
+            except ValueError:
+                missing.append(value)
+
+        posts = {
+            post.content_id: post
+            for post in with_post_relations(Post.objects.filter(content_id__in=requested), request)
+        }
+
+        ordered = []
+        unpublished = []
+        for content_id in requested:
+            post = posts.get(content_id)
+            if post is None:
+                missing.append(str(content_id))
+            elif not post.is_published:
+                unpublished.append(str(content_id))
+            else:
+                ordered.append(post)
+
+        return Response({
+            'results': self.get_serializer(ordered, many=True).data,
+            'missing': missing,
+            'unpublished': unpublished,
+        })
+
+
+# ----------------------------------------------------------------------
+# 4c. Delta Sync Endpoint (GET /api/content/changes/?since=<token>&posts=<uuid>,...)
+# ----------------------------------------------------------------------
+
+class PostChangesView(generics.GenericAPIView):
+    """
+    Returns what changed in the feed since the client's token: posts created
+    or edited (serialized like the feed), posts unpublished or deleted
+    (tombstones) and, for the posts listed in 'posts', new hype/comment counts.
+    Without 'since' only a starting token is returned. Each response carries
+    the token to send next; keep following it while 'has_more' is true.
+    """
+    serializer_class = PostListSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_serializer_context(self):
+        return {'request': self.request}
+
+    def get(self, request, *args, **kwargs):
+        token = request.query_params.get('since')
+        if not token:
+            return Response({'changes': [], 'next': make_token(current_seq()), 'has_more': False})
+
+        since = read_token(token)
+        if since is None:
+            raise ValidationError({'since': "Invalid or expired token."})
+
+        held = set()
+        for value in request.query_params.get('posts', '').split(','):
+            try:
+                held.add(uuid.UUID(value.strip()))
+            except ValueError:
+                continue
+
+        rows, next_seq, has_more = changes_since(since)
+
+        changes = []
+        edited = []
+        counted = []
+        for row in rows:
+            entry = {'content_id': str(row['content_id'])}
+            if row['state'] == 'DELETED':
+                entry['change'] = 'deleted'
+            elif row['state'] == 'HIDDEN':
+                entry['change'] = 'unpublished'
+            elif row['content_seq'] > since:
+                entry['change'] = 'created' if row['created_seq'] > since else 'edited'
+                edited.append(row['post_id'])
+            elif row['content_id'] in held:
+                entry['change'] = 'counts'
+                counted.append(row['post_id'])
+            else:
+                continue
+            changes.append((row['post_id'], entry))
+
+        posts = {}
+        if edited:
+            edited_posts = list(with_post_relations(Post.objects.filter(pk__in=edited, is_published=True), request))
+            serialized = self.get_serializer(edited_posts, many=True).data
+            posts.update((post.pk, data) for post, data in zip(edited_posts, serialized))
+        if counted:
+            posts.update(
+                (post['pk'], {'hype_count': post['hype_count'], 'comment_count': post['comment_count']})
+                for post in Post.objects.filter(pk__in=counted).values('pk', 'hype_count', 'comment_count')
+            )
+
+        results = []
+        for post_id, entry in changes:
+            if entry['change'] in ('created', 'edited'):
+                if post_id not in posts:
+                    continue  # unpublished or deleted since; its tombstone follows on the next poll
+                entry['post'] = posts[post_id]
+            elif entry['change'] == 'counts':
+                entry.update(posts.get(post_id, {}))
+            results.append(entry)
+
+        return Response({'changes': results, 'next': make_token(next_seq), 'has_more': has_more})
+
 
 # ----------------------------------------------------------------------
 # 5. Post List By feed_types Endpoint (GET /api/content/filter-by-feed_types/?feed_types=tag1,tag2,...)
@@ -154,7 +489,7 @@ class PostListByfeed_typesView(generics.ListAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        queryset = Post.objects.filter(is_published=True).select_related('creator')
+        queryset = with_post_relations(Post.objects.filter(is_published=True), self.request)
         feed_types_param = self.request.query_params.get('feed_types')
         
         if feed_types_param:
@@ -169,6 +504,79 @@ class PostListByfeed_typesView(generics.ListAPIView):
         return {'request': self.request}
 
 
+# ----------------------------------------------------------------------
+# 5b. Hot Posts Endpoint (GET /api/content/trending/?limit=50)
+# ----------------------------------------------------------------------
+
+class HotPostListView(generics.ListAPIView):
+    """
+    Returns the currently hottest published posts, ranked by their time-decayed
+    hype/comment score. Scores are maintained incrementally, so this is a single
+    ordered index scan rather than a recount.
+    """
+    serializer_class = PostListSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        try:
+            limit = min(max(int(self.request.query_params.get('limit', 50)), 1), 200)
+        except ValueError:
+            limit = 50
+
+        return with_post_relations(hot_posts(), self.request)[:limit]
+
+    def get_serializer_context(self):
+        return {'request': self.request}
+
+
+# ----------------------------------------------------------------------
+# 4d. Stored Media Lookup (GET /api/content/media/<sha256>/)
+# ----------------------------------------------------------------------
+
+class MediaBlobView(generics.GenericAPIView):
+    """
+    Tells a client about to upload a file whether it is already stored: 200
+    with its size and URL (send media_sha256 / profile_image_sha256 instead of
+    the file) or 404 (upload it).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        blob = find_blob(self.kwargs['sha256'])
+        if blob is None:
+            raise NotFound("No stored file has this sha256.")
+        name, size = blob
+        return Response({
+            'sha256': self.kwargs['sha256'].strip().lower(),
+            'size': size,
+            'url': request.build_absolute_uri(media_storage().url(name)),
+        })
+
+
+# ----------------------------------------------------------------------
+# 5c. Similar Posts Endpoint (GET /api/content/<content_id>/similar/)
+# ----------------------------------------------------------------------
+
+class PostSimilarView(generics.ListAPIView):
+    """
+    Returns the published posts most often hyped by the same users as the given
+    post, best first, from the PostSimilarity table (content/similar.py). The
+    lookup is one query over the table's primary key; an unknown, archived or
+    too old post simply has no similar posts.
+    """
+    serializer_class = PostListSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = Post.objects.filter(
+            is_published=True, similar_to__post__content_id=self.kwargs['content_id'],
+        ).order_by('-similar_to__score', '-pk')
+        return with_post_relations(queryset, self.request)
+
+    def get_serializer_context(self):
+        return {'request': self.request}
+
+
 # ----------------------------------------------------------------------
 # 6. Hype (Like) Toggle Endpoint (POST /api/content/<content_id>/hype/)
 # ----------------------------------------------------------------------
@@ -189,10 +597,37 @@ class HypeToggleView(generics.UpdateAPIView):
         
         if hype_qs.exists():
             hype_qs.delete()
-            return Response({'hyped': False, 'hype_count': post.Hypes.count()}, status=status.HTTP_200_OK)
+            post.refresh_from_db(fields=['hype_count'])
+            return Response({'hyped': False, 'hype_count': post.hype_count}, status=status.HTTP_200_OK)
         else:
             Hype.objects.create(user=user, post=post)
-            return Response({'hyped': True, 'hype_count': post.Hypes.count()}, status=status.HTTP_201_CREATED)
+            post.refresh_from_db(fields=['hype_count'])
+            return Response({'hyped': True, 'hype_count': post.hype_count}, status=status.HTTP_201_CREATED)
+
+
+# ----------------------------------------------------------------------
+# 6b. Offline Sync Endpoint (POST /api/content/sync/)
+# ----------------------------------------------------------------------
+
+class SyncView(generics.GenericAPIView):
+    """
+    Applies an ordered batch of queued hype/unhype/comment actions in one
+    transaction. Each action carries a client-generated 'id'; an id that was
+    already applied returns its original result, so a batch can be retried
+    safely. Responds with one result per action and the final counters of
+    the posts involved.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        actions = request.data.get('actions') if isinstance(request.data, dict) else None
+        if not isinstance(actions, list) or not actions:
+            raise ValidationError({'actions': "Provide a non-empty list of actions."})
+        if len(actions) > SYNC_MAX_ACTIONS:
+            raise ValidationError({'actions': f"At most {SYNC_MAX_ACTIONS} actions can be synced at once."})
+
+        results, posts = apply_sync_actions(request.user, actions)
+        return Response({'results': results, 'posts': posts}, status=status.HTTP_200_OK)
 
 
 # ----------------------------------------------------------------------
@@ -223,15 +658,64 @@ class FeedListView(generics.ListAPIView):
         order_field = sort_mapping.get(sort_by, '-Rank')
         
         return queryset.order_by(order_field)
+
+
+# ----------------------------------------------------------------------
+# 7b. Trending Tags Endpoint (GET /api/content/feed_types/trending/?window=24h)
+# ----------------------------------------------------------------------
+
+class TrendingFeedListView(generics.ListAPIView):
+    """
+    Returns the tags trending within a sliding window ('1h', '24h' or '7d'),
+    ranked by usage velocity against each tag's own baseline.
+    """
+    serializer_class = TrendingTagSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        window = self.request.query_params.get('window', DEFAULT_TRENDING_WINDOW).lower()
+        if window not in TRENDING_WINDOWS:
+            window = DEFAULT_TRENDING_WINDOW
+
+        try:
+            limit = min(max(int(self.request.query_params.get('limit', 20)), 1), 100)
+        except ValueError:
+            limit = 20
+
+        return trending_tags(window=window, limit=limit)
+
+
+# ----------------------------------------------------------------------
+# 7c. Related Tags Endpoint (GET /api/content/feed_types/<tag>/related/)
+# ----------------------------------------------------------------------
+
+class RelatedTagsView(generics.GenericAPIView):
+    """
+    Returns the tags most often used together with the given tag, best first,
+    as precomputed on its Feed row by `manage.py build_tag_cooccurrence`
+    (content/related_tags.py). Suggested when a user picks a tag to filter by
+    or edits their profile's feed_types.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, *args, **kwargs):
+        tag = self.kwargs['tag'].strip().upper()
+        related = Feed.objects.filter(tag=tag).values_list('related_tags', flat=True).first()
+        if related is None:
+            raise NotFound(f"Unknown tag '{tag}'.")
+        return Response({'tag': tag, 'related': related})
     
 # 8. Comment Endpoints (GET list, POST create)
 class CommentListCreateView(generics.ListCreateAPIView):
     """
     Handles listing comments for a specific post and creating a new comment 
     (either top-level or a reply).
+    GET returns a page of top-level comments (newest first, ?cursor= for the
+    next page), each with a bounded preview of its replies.
     """
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CommentCursorPagination
 
     def get_queryset(self):
         post_id = self.kwargs.get('content_id')
@@ -240,17 +724,52 @@ class CommentListCreateView(generics.ListCreateAPIView):
         return Comment.objects.filter(
             post__content_id=post_id,
             parent_comment__isnull=True
-        ).select_related('user').prefetch_related('replies').order_by('-created_at')
+        ).select_related('user__studentprofile')
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        context = self.get_serializer_context()
+        context.update(comment_thread_context(page, request, self.kwargs.get('content_id')))
+        serializer = self.get_serializer(page, many=True, context=context)
+        return self.get_paginated_response(serializer.data)
 
     def perform_create(self, serializer):
         post_id = self.kwargs.get('content_id')
         try:
             post = Post.objects.get(content_id=post_id)
         except Post.DoesNotExist:
-            raise status.HTTP_404_NOT_FOUND("Post not found.")
+            raise NotFound("Post not found.")
+
+        parent = serializer.validated_data.get('parent_comment')
+        if parent is not None and parent.post_id != post.pk:
+            raise ValidationError({'parent_comment': "The parent comment belongs to another post."})
         
         # The serializer handles validation of 'parent_comment' (if it's a reply)
         serializer.save(user=self.request.user, post=post)
+
+
+# 8b. Comment Replies Endpoint (GET /api/content/<content_id>/comments/<pk>/replies/?cursor=...)
+class CommentRepliesView(generics.ListAPIView):
+    """
+    Returns a page of a comment's direct replies (oldest first), each with a
+    bounded preview of its own replies. 'replies_next' links point here.
+    """
+    serializer_class = CommentSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ReplyCursorPagination
+
+    def get_queryset(self):
+        return Comment.objects.filter(
+            post__content_id=self.kwargs.get('content_id'),
+            parent_comment_id=self.kwargs.get('pk'),
+        ).select_related('user__studentprofile')
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(self.get_queryset())
+        context = self.get_serializer_context()
+        context.update(comment_thread_context(page, request, self.kwargs.get('content_id')))
+        serializer = self.get_serializer(page, many=True, context=context)
+        return self.get_paginated_response(serializer.data)
         
         
 # 9. Comment Detail/Delete Endpoint
@@ -265,13 +784,13 @@ class CommentDestroyView(generics.DestroyAPIView):
     def get_object(self):
         obj = super().get_object()
         # Ensure the comment belongs to the correct post ID
-        if str(obj.post.content_id) != self.kwargs.get('content_id'):
-            raise status.HTTP_404_NOT_FOUND("Comment not found on this post.")
+        if str(obj.post.content_id) != str(self.kwargs.get('content_id')):
+            raise NotFound("Comment not found on this post.")
         return obj
 
     def perform_destroy(self, instance):
         # Basic ownership check
         if instance.user != self.request.user and not self.request.user.is_staff and not self.request.user.is_superuser:
-            raise permissions.PermissionDenied("You do not have permission to delete this comment.")
+            raise PermissionDenied("You do not have permission to delete this comment.")
         
         instance.delete()
\ No newline at end of file
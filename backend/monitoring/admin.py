@@ -0,0 +1,34 @@
+from django.contrib import admin
+from django.utils.html import format_html
+from .models import SlowQuery
+
+# ----------------------------------------------------------------------
+# 1. Slow Query Admin (read-only, filled by the slow query sampler)
+# ----------------------------------------------------------------------
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    """Slow statements aggregated by fingerprint, worst total time first."""
+    list_display = ('sql_preview', 'count', 'total_ms', 'p95_ms', 'max_ms', 'last_view', 'last_seen')
+    list_filter = ('last_view',)
+    search_fields = ('normalized_sql', 'last_view', 'last_location')
+    ordering = ('-total_ms',)
+    exclude = ('samples', 'explain_plan')
+    readonly_fields = (
+        'fingerprint', 'normalized_sql', 'example_sql', 'count', 'total_ms', 'max_ms', 'p95_ms',
+        'last_view', 'last_location', 'formatted_plan', 'explained_at', 'first_seen', 'last_seen',
+    )
+
+    def sql_preview(self, obj):
+        return obj.normalized_sql[:120] + '...' if len(obj.normalized_sql) > 120 else obj.normalized_sql
+    sql_preview.short_description = 'Statement'
+
+    def formatted_plan(self, obj):
+        return format_html('<pre>{}</pre>', obj.explain_plan or 'Not captured (only SELECTs are explained).')
+    formatted_plan.short_description = 'EXPLAIN (ANALYZE, BUFFERS)'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
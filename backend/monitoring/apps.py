@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        """
+        Hook DRF serializers so their .data time is attributed to the request timings.
+        """
+        from .timing import install_serializer_timing
+        install_serializer_timing()
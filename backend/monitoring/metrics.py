@@ -0,0 +1,118 @@
+import bisect
+import threading
+
+# ----------------------------------------------------------------------
+# In-process metrics registry rendered in the Prometheus text format.
+#
+# Each worker process keeps its own registry; Prometheus aggregates across
+# workers when every worker is scraped (or use a single-process server).
+# ----------------------------------------------------------------------
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Histogram:
+    """Cumulative-bucket histogram (per label set) with Prometheus semantics."""
+
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe store of per-endpoint request histograms and counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}        # (endpoint, method, status) -> count
+        self.durations = {}       # (endpoint, method) -> Histogram
+        self.phases = {}          # (endpoint, method, phase) -> Histogram
+        self.queries = {}         # (endpoint, method) -> Histogram
+
+    def observe_request(self, endpoint, method, status, timings):
+        key = (endpoint, method)
+        with self._lock:
+            status_key = (endpoint, method, str(status))
+            self.requests[status_key] = self.requests.get(status_key, 0) + 1
+
+            self._histogram(self.durations, key, DURATION_BUCKETS).observe(timings.total)
+            self._histogram(self.queries, key, QUERY_COUNT_BUCKETS).observe(timings.sql_count)
+            for phase, seconds, _ in timings.phases():
+                if phase != 'total':
+                    self._histogram(self.phases, key + (phase,), DURATION_BUCKETS).observe(seconds)
+
+    @staticmethod
+    def _histogram(store, key, buckets):
+        histogram = store.get(key)
+        if histogram is None:
+            histogram = store[key] = Histogram(buckets)
+        return histogram
+
+    def reset(self):
+        with self._lock:
+            self.requests.clear()
+            self.durations.clear()
+            self.phases.clear()
+            self.queries.clear()
+
+    # --- Prometheus text exposition format (version 0.0.4) ---
+
+    def render(self):
+        with self._lock:
+            lines = [
+                '# HELP http_requests_total Requests handled, by endpoint, method and status.',
+                '# TYPE http_requests_total counter',
+            ]
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(
+                    f'http_requests_total{_labels(endpoint=endpoint, method=method, status=status)} {count}'
+                )
+
+            _render_histograms(
+                lines, 'http_request_duration_seconds', 'Total request time.',
+                self.durations, ('endpoint', 'method'),
+            )
+            _render_histograms(
+                lines, 'http_request_phase_seconds',
+                'Request time by phase (db, view, ser = serializers, render); phases overlap.',
+                self.phases, ('endpoint', 'method', 'phase'),
+            )
+            _render_histograms(
+                lines, 'http_request_sql_queries', 'SQL statements executed per request.',
+                self.queries, ('endpoint', 'method'),
+            )
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _render_histograms(lines, name, help_text, store, label_names):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} histogram')
+    for key, histogram in sorted(store.items()):
+        labels = dict(zip(label_names, key))
+        cumulative = 0
+        for bound, count in zip(histogram.buckets + ('+Inf',), histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(**labels, le=bound)} {cumulative}')
+        lines.append(f'{name}_sum{_labels(**labels)} {histogram.sum}')
+        lines.append(f'{name}_count{_labels(**labels)} {histogram.count}')
+
+
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,124 @@
+from time import perf_counter
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+from .metrics import REGISTRY
+from .profiling import ProfileStore, SQLProfile, profiling_trigger, profile_report, start_profiler
+from .slow_queries import submit_slow_queries, slow_query_threshold
+from .timing import start_request_timings, end_request_timings, current_timings
+
+
+class RequestTimingMiddleware:
+    """
+    Measures SQL count/time (via connection.execute_wrapper), view, serializer
+    and render time for every request, adds them as a Server-Timing header and
+    records them in the per-endpoint histograms served at /metrics.
+
+    The hooks only add counters and perf_counter() calls, so it is cheap enough
+    to leave enabled in production. Place it first in MIDDLEWARE so 'total'
+    covers the rest of the middleware stack.
+
+    Statements slower than SLOW_QUERY_THRESHOLD_MS are queued for the slow
+    query sampler's background thread once the response has been built.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings, token = start_request_timings(slow_query_threshold())
+        try:
+            with connection.execute_wrapper(timings):
+                response = self.get_response(request)
+        finally:
+            end_request_timings(token)
+
+        timings.finish()
+        response['Server-Timing'] = timings.server_timing_header()
+        REGISTRY.observe_request(endpoint_label(request), request.method, response.status_code, timings)
+        if timings.slow_queries:
+            submit_slow_queries(endpoint_label(request), timings.slow_queries)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = current_timings()
+        if timings is not None:
+            timings.view_start = perf_counter()
+        return None
+
+    def process_template_response(self, request, response):
+        # Called after the view returned and right before the response is rendered
+        timings = current_timings()
+        if timings is not None:
+            timings.view_end = perf_counter()
+            response.add_post_render_callback(lambda rendered: _mark_render_end(timings))
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a request with cProfile and records its slowest SQL statements when
+    a staff user asks for it (X-Profile: 1 header or ?_profile=1) or when it is
+    sampled (PROFILING_SAMPLE_RATE). Results go to the on-disk ProfileStore and
+    are listed at /admin/monitoring/profiles/; the response carries the id in
+    an X-Profile-Id header.
+
+    Requests that are not profiled pass straight through. Place it after
+    AuthenticationMiddleware so admin session users can trigger it as well.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = profiling_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+
+        profiler = start_profiler()
+        if profiler is None:
+            return self.get_response(request)
+
+        sql = SQLProfile(keep=getattr(settings, 'PROFILING_SLOW_QUERIES', 10))
+        started_at = timezone.now()
+        start = perf_counter()
+        try:
+            with connection.execute_wrapper(sql):
+                response = self.get_response(request)
+                if hasattr(response, 'render') and not response.is_rendered:
+                    response.render()  # include rendering in the profile
+        finally:
+            profiler.disable()
+        elapsed = perf_counter() - start
+
+        user = getattr(request, 'user', None)
+        response['X-Profile-Id'] = ProfileStore().save({
+            'started_at': started_at.isoformat(),
+            'trigger': trigger,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'endpoint': endpoint_label(request),
+            'status': response.status_code,
+            'user': str(user) if user is not None and user.is_authenticated else None,
+            'duration_ms': round(elapsed * 1000, 3),
+            'sql_count': sql.count,
+            'sql_ms': round(sql.total * 1000, 3),
+            'slow_sql': sql.slowest(),
+            'profile': profile_report(profiler),
+        })
+        return response
+
+
+def _mark_render_end(timings):
+    timings.render_end = perf_counter()
+
+
+def endpoint_label(request):
+    """
+    The url name of the matched route (or its pattern), so labels stay bounded
+    no matter which ids appear in the path.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route or 'unmatched'
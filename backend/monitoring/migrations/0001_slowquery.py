@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-19 00:23
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=40, unique=True)),
+                ('normalized_sql', models.TextField()),
+                ('example_sql', models.TextField(help_text='Last slow occurrence, with its parameters.')),
+                ('count', models.PositiveBigIntegerField(default=0)),
+                ('total_ms', models.FloatField(default=0.0)),
+                ('max_ms', models.FloatField(default=0.0)),
+                ('p95_ms', models.FloatField(default=0.0, help_text='Over the most recent samples.')),
+                ('samples', django.contrib.postgres.fields.ArrayField(base_field=models.FloatField(), blank=True, default=list, help_text='Most recent durations (ms).', size=None)),
+                ('last_view', models.CharField(blank=True, max_length=255)),
+                ('last_location', models.CharField(blank=True, help_text='Innermost project frame that ran it.', max_length=500)),
+                ('explain_plan', models.TextField(blank=True)),
+                ('explained_at', models.DateTimeField(blank=True, null=True)),
+                ('first_seen', models.DateTimeField(auto_now_add=True)),
+                ('last_seen', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Slow queries',
+                'ordering': ['-total_ms'],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+from django.contrib.postgres.fields import ArrayField
+from django.db import models
+
+# ----------------------------------------------------------------------
+# 1. Slow Query Aggregates
+# ----------------------------------------------------------------------
+
+class SlowQuery(models.Model):
+    """
+    One row per normalized SQL statement (fingerprint) that has exceeded
+    SLOW_QUERY_THRESHOLD_MS. Written by monitoring.slow_queries on a separate
+    database connection, so the request's own transaction is never involved.
+    """
+    fingerprint = models.CharField(max_length=40, unique=True)
+    normalized_sql = models.TextField()
+    example_sql = models.TextField(help_text="Last slow occurrence, with its parameters.")
+
+    count = models.PositiveBigIntegerField(default=0)
+    total_ms = models.FloatField(default=0.0)
+    max_ms = models.FloatField(default=0.0)
+    p95_ms = models.FloatField(default=0.0, help_text="Over the most recent samples.")
+    samples = ArrayField(models.FloatField(), default=list, blank=True, help_text="Most recent durations (ms).")
+
+    last_view = models.CharField(max_length=255, blank=True)
+    last_location = models.CharField(max_length=500, blank=True, help_text="Innermost project frame that ran it.")
+
+    explain_plan = models.TextField(blank=True)
+    explained_at = models.DateTimeField(null=True, blank=True)
+
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-total_ms']
+        verbose_name_plural = 'Slow queries'
+
+    def __str__(self):
+        return f"{self.fingerprint[:10]} ({self.count}x, p95 {self.p95_ms:.1f} ms)"
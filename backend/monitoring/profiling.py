@@ -0,0 +1,163 @@
+import cProfile
+import heapq
+import io
+import json
+import os
+import pstats
+import random
+import tempfile
+import time
+import uuid
+from pathlib import Path
+from time import perf_counter
+from django.conf import settings
+
+# ----------------------------------------------------------------------
+# On-demand request profiling
+#
+# A request is profiled when a staff user asks for it (X-Profile: 1 header or
+# ?_profile=1) or when it is picked by PROFILING_SAMPLE_RATE. Each profile
+# (cProfile output + the slowest SQL statements) is written as one JSON file
+# to PROFILING_DIR, which keeps only the newest PROFILING_MAX_ENTRIES files.
+# ----------------------------------------------------------------------
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_QUERY_PARAM = '_profile'
+
+# Functions listed in the stored cProfile report (sorted by cumulative time)
+PROFILE_TOP_FUNCTIONS = 60
+
+
+def profiling_trigger(request):
+    """
+    Returns why the request should be profiled ('requested' or 'sampled'), or None.
+    Requests without the flag only cost a header lookup and a random() call.
+    """
+    flag = request.META.get(PROFILE_HEADER) or request.GET.get(PROFILE_QUERY_PARAM)
+    if flag and flag not in ('0', 'false') and is_staff_request(request):
+        return 'requested'
+
+    rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+    if rate and random.random() < rate:
+        return 'sampled'
+    return None
+
+
+def is_staff_request(request):
+    """True for a staff session user (admin) or a valid staff JWT access token."""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user.is_staff
+
+    from rest_framework.exceptions import APIException
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except APIException:
+        return False
+    return result is not None and result[0].is_staff
+
+
+class SQLProfile:
+    """connection.execute_wrapper hook keeping the N slowest statements of a request."""
+
+    def __init__(self, keep):
+        self.keep = keep
+        self.count = 0
+        self.total = 0.0
+        self._slowest = []  # min-heap of (seconds, order, sql, params)
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - start
+            self.count += 1
+            self.total += elapsed
+            entry = (elapsed, self.count, sql, repr(params)[:500])
+            if len(self._slowest) < self.keep:
+                heapq.heappush(self._slowest, entry)
+            elif elapsed > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def slowest(self):
+        return [
+            {'ms': round(seconds * 1000, 3), 'order': order, 'sql': sql, 'params': params}
+            for seconds, order, sql, params in sorted(self._slowest, reverse=True)
+        ]
+
+
+def profile_report(profiler):
+    stream = io.StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.strip_dirs().sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+    return stream.getvalue()
+
+
+def start_profiler():
+    """Returns an enabled cProfile.Profile, or None if another profiler is already active."""
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return None
+    return profiler
+
+
+# ----------------------------------------------------------------------
+# Ring buffer on disk
+# ----------------------------------------------------------------------
+
+class ProfileStore:
+    """
+    Bounded directory of profile JSON files. File names start with a
+    nanosecond timestamp, so sorting them gives the order they were taken in;
+    every write removes the oldest files beyond max_entries.
+    """
+
+    def __init__(self, directory=None, max_entries=None):
+        self.directory = Path(directory or settings.PROFILING_DIR)
+        self.max_entries = max_entries or getattr(settings, 'PROFILING_MAX_ENTRIES', 100)
+
+    def _files(self):
+        if not self.directory.is_dir():
+            return []
+        return sorted(self.directory.glob('*.json'))
+
+    def save(self, record):
+        """Writes the record atomically and returns its id."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile_id = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}"
+        record = {'id': profile_id, **record}
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            json.dump(record, fh)
+        os.replace(tmp_path, self.directory / f"{profile_id}.json")
+
+        for stale in self._files()[:-self.max_entries]:
+            stale.unlink(missing_ok=True)
+        return profile_id
+
+    def get(self, profile_id):
+        path = self.directory / f"{profile_id}.json"
+        # Ids come from URLs; never let one point outside the directory
+        if path.parent != self.directory or not path.is_file():
+            return None
+        with open(path, encoding='utf-8') as fh:
+            return json.load(fh)
+
+    def list(self):
+        """All stored records, newest first (without the cProfile report)."""
+        records = []
+        for path in reversed(self._files()):
+            try:
+                with open(path, encoding='utf-8') as fh:
+                    record = json.load(fh)
+            except (OSError, ValueError):
+                continue  # removed or half-written by a concurrent worker
+            record.pop('profile', None)
+            records.append(record)
+        return records
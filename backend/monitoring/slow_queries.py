@@ -0,0 +1,232 @@
+import hashlib
+import logging
+import queue
+import random
+import re
+import sys
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils import timezone
+from .models import SlowQuery
+
+logger = logging.getLogger(__name__)
+
+# ----------------------------------------------------------------------
+# Slow query sampler
+#
+# RequestTimings (the SQL execute_wrapper of RequestTimingMiddleware) keeps
+# every statement slower than SLOW_QUERY_THRESHOLD_MS together with the
+# project frame that ran it. After the response is built the middleware hands
+# a sample of them (SLOW_QUERY_SAMPLE_RATE of the requests) to
+# submit_slow_queries(), which queues them for a background thread; it runs
+# record_slow_queries(), which aggregates them by fingerprint and runs EXPLAIN
+# (ANALYZE, BUFFERS) for fingerprints without a recent plan. Both happen on a
+# separate connection, outside the request and its transaction, and a failure
+# is only logged.
+# ----------------------------------------------------------------------
+
+# Durations kept per fingerprint for the p95 estimate
+SAMPLES_KEPT = 200
+
+# Requests whose statements may wait for the recorder thread; more are dropped
+QUEUE_SIZE = 1000
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'(?<![\w"])-?\d+(?:\.\d+)?(?![\w"])')
+_IN_LIST_RE = re.compile(r'\bIN \(\?(?:, \?)*\)', re.IGNORECASE)
+_VALUES_LIST_RE = re.compile(r'\((\?(?:, \?)*)\)(?:\s*,\s*\(\1\))+')
+
+_PROJECT_ROOT = str(settings.BASE_DIR)
+_PROJECT_SKIPPED = ('site-packages', '/monitoring/', '/manage.py', '/wsgi.py', '/asgi.py')
+_LIBRARY_SKIPPED = ('/django/', '/monitoring/', '/threading.py', '/socketserver.py', '/wsgiref/')
+
+
+def slow_query_threshold():
+    """Threshold in seconds, or None when slow query sampling is disabled."""
+    threshold_ms = getattr(settings, 'SLOW_QUERY_THRESHOLD_MS', None)
+    return None if threshold_ms is None else threshold_ms / 1000
+
+
+def normalize_sql(sql):
+    """
+    Reduces a statement to its shape: literals and placeholders become '?',
+    and IN lists / multi-row VALUES collapse so their length does not matter.
+    """
+    sql = _WHITESPACE_RE.sub(' ', sql).strip()
+    sql = sql.replace('%s', '?')
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _VALUES_LIST_RE.sub(r'(\1), ...', sql)
+    return sql
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode('utf-8')).hexdigest()
+
+
+def caller_location():
+    """
+    'file:line in function' of the innermost project frame (outside monitoring),
+    or of the innermost non-Django library frame (e.g. a DRF generic view) when
+    the query was run entirely by library code.
+    """
+    fallback = ''
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(_PROJECT_ROOT) and not any(part in filename for part in _PROJECT_SKIPPED):
+            relative = filename[len(_PROJECT_ROOT):].lstrip('/')
+            return f"{relative}:{frame.f_lineno} in {frame.f_code.co_name}"
+        if not fallback and 'site-packages' in filename and not any(part in filename for part in _LIBRARY_SKIPPED):
+            relative = filename.split('site-packages/', 1)[1]
+            fallback = f"{relative}:{frame.f_lineno} in {frame.f_code.co_name}"
+        frame = frame.f_back
+    return fallback
+
+
+def _explainable(sql, many):
+    # EXPLAIN ANALYZE executes the statement, so only plain reads qualify
+    statement = sql.lstrip().upper()
+    return not many and statement.startswith('SELECT') and 'FOR UPDATE' not in statement
+
+
+def _explain(cursor, sql, params):
+    """EXPLAIN (ANALYZE, BUFFERS) inside a transaction that is always rolled back."""
+    timeout_ms = int(getattr(settings, 'SLOW_QUERY_EXPLAIN_TIMEOUT_MS', 5000))
+    cursor.execute('BEGIN')
+    try:
+        cursor.execute(f"SET LOCAL statement_timeout = {timeout_ms}")
+        cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", params)
+        return '\n'.join(row[0] for row in cursor.fetchall())
+    except Exception as exc:  # a plan is best effort
+        return f"EXPLAIN failed: {exc}"
+    finally:
+        cursor.execute('ROLLBACK')
+
+
+def record_slow_queries(view, statements, alias=DEFAULT_DB_ALIAS):
+    """
+    Aggregates [(seconds, sql, params, many, location), ...] into SlowQuery rows
+    (count, total, max, recent samples -> p95) and captures plans that are
+    missing or older than SLOW_QUERY_EXPLAIN_INTERVAL.
+    """
+    if not statements:
+        return
+
+    table = SlowQuery._meta.db_table
+    now = timezone.now()
+    explain_before = now - timedelta(seconds=getattr(settings, 'SLOW_QUERY_EXPLAIN_INTERVAL', 3600))
+
+    grouped = {}
+    for seconds, sql, params, many, location in statements:
+        normalized = normalize_sql(sql)
+        key = fingerprint(normalized)
+        entry = grouped.setdefault(key, {
+            'normalized': normalized, 'samples': [], 'sql': sql, 'params': params,
+            'many': many, 'location': location,
+        })
+        entry['samples'].append(seconds * 1000)
+        if seconds * 1000 >= max(entry['samples']):
+            entry.update(sql=sql, params=params, many=many, location=location)
+
+    # A fresh connection: not wrapped by the request hooks and not in its transaction
+    connection = connections.create_connection(alias)
+    try:
+        with connection.cursor() as cursor:
+            for key, entry in grouped.items():
+                samples = entry['samples']
+                cursor.execute(
+                    f"""
+                    INSERT INTO {table} (
+                        fingerprint, normalized_sql, example_sql, count, total_ms, max_ms, p95_ms,
+                        samples, last_view, last_location, explain_plan, first_seen, last_seen
+                    )
+                    VALUES (%s, %s, %s, %s, %s, %s, 0, %s, %s, %s, '', %s, %s)
+                    ON CONFLICT (fingerprint) DO UPDATE SET
+                        example_sql = EXCLUDED.example_sql,
+                        count = {table}.count + EXCLUDED.count,
+                        total_ms = {table}.total_ms + EXCLUDED.total_ms,
+                        max_ms = GREATEST({table}.max_ms, EXCLUDED.max_ms),
+                        samples = ({table}.samples || EXCLUDED.samples)[
+                            GREATEST(1, cardinality({table}.samples) + cardinality(EXCLUDED.samples) - %s + 1):
+                        ],
+                        last_view = EXCLUDED.last_view,
+                        last_location = EXCLUDED.last_location,
+                        last_seen = EXCLUDED.last_seen
+                    RETURNING id, explained_at
+                    """,
+                    [
+                        key, entry['normalized'], f"{entry['sql']} -- params: {entry['params']!r}"[:10000],
+                        len(samples), sum(samples), max(samples), samples,
+                        view[:255], entry['location'][:500], now, now, SAMPLES_KEPT,
+                    ],
+                )
+                row_id, explained_at = cursor.fetchone()
+                cursor.execute(
+                    f"""
+                    UPDATE {table} SET p95_ms = (
+                        SELECT percentile_cont(0.95) WITHIN GROUP (ORDER BY s) FROM unnest(samples) s
+                    )
+                    WHERE id = %s
+                    """,
+                    [row_id],
+                )
+
+                if (explained_at is None or explained_at < explain_before) and _explainable(entry['sql'], entry['many']):
+                    plan = _explain(cursor, entry['sql'], entry['params'])
+                    cursor.execute(
+                        f"UPDATE {table} SET explain_plan = %s, explained_at = %s WHERE id = %s",
+                        [plan, now, row_id],
+                    )
+    finally:
+        connection.close()
+
+
+class SlowQueryRecorder:
+    """A daemon thread (started on first use) that records the submitted statements."""
+
+    def __init__(self, maxsize=QUEUE_SIZE):
+        self.queue = queue.Queue(maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, view, statements):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='slow-queries', daemon=True)
+                self._thread.start()
+        try:
+            self.queue.put_nowait((view, statements))
+        except queue.Full:
+            logger.warning("Slow query queue is full; dropped %d statement(s) of %s", len(statements), view)
+
+    def _run(self):
+        while True:
+            view, statements = self.queue.get()
+            try:
+                record_slow_queries(view, statements)
+            except Exception:
+                logger.exception("Could not record %d slow statement(s) of %s", len(statements), view)
+            finally:
+                self.queue.task_done()
+
+    def join(self):
+        """Waits until everything submitted so far is recorded."""
+        self.queue.join()
+
+
+recorder = SlowQueryRecorder()
+
+
+def submit_slow_queries(view, statements):
+    """Called by the middleware: queues a sample of the requests' slow statements; never raises."""
+    try:
+        rate = getattr(settings, 'SLOW_QUERY_SAMPLE_RATE', 1.0)
+        if statements and (rate >= 1 or random.random() < rate):
+            recorder.submit(view, statements)
+    except Exception:
+        logger.exception("Could not queue slow statements of %s", view)
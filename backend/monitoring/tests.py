@@ -0,0 +1,104 @@
+import tempfile
+from unittest import mock
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+from accounts.models import User
+from .models import SlowQuery
+from .profiling import ProfileStore
+from .slow_queries import normalize_sql, recorder
+
+
+class ProfilingMiddlewareTests(TestCase):
+    """Profiles are only taken when a staff user asks for them (or when sampled)."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        settings_override = override_settings(PROFILING_DIR=self.directory.name, PROFILING_MAX_ENTRIES=3)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.staff = User.objects.create_user(
+            email='staff@example.com', username='staff', password='x', is_staff=True,
+        )
+        self.user = User.objects.create_user(email='user@example.com', username='user', password='x')
+        self.url = reverse('feed-tag-list')
+
+    def get(self, user, **extra):
+        token = RefreshToken.for_user(user).access_token
+        return self.client.get(self.url, HTTP_AUTHORIZATION=f"Bearer {token}", **extra)
+
+    def test_not_profiled_unless_requested(self):
+        response = self.get(self.staff)
+        self.assertNotIn('X-Profile-Id', response)
+        self.assertEqual(ProfileStore().list(), [])
+
+    def test_non_staff_cannot_request_a_profile(self):
+        response = self.get(self.user, HTTP_X_PROFILE='1')
+        self.assertNotIn('X-Profile-Id', response)
+
+    def test_staff_request_is_profiled_and_listed(self):
+        response = self.get(self.staff, HTTP_X_PROFILE='1')
+        record = ProfileStore().get(response['X-Profile-Id'])
+        self.assertEqual(record['endpoint'], 'feed-tag-list')
+        self.assertEqual(record['trigger'], 'requested')
+        self.assertGreater(record['sql_count'], 0)
+        self.assertIn('cumulative', record['profile'])
+
+        self.client.force_login(self.staff)
+        page = self.client.get(reverse('monitoring_profile_detail', args=[record['id']]))
+        self.assertContains(page, 'Slowest SQL')
+
+    @override_settings(PROFILING_SAMPLE_RATE=1.0)
+    def test_sampled_profiles_are_a_bounded_ring_buffer(self):
+        ids = [self.client.get(self.url)['X-Profile-Id'] for _ in range(5)]
+        stored = [record['id'] for record in ProfileStore().list()]
+        self.assertEqual(stored, ids[:-4:-1])
+
+
+class SlowQuerySamplerTests(TransactionTestCase):
+    """Slow statements are aggregated by fingerprint on a separate connection."""
+
+    def test_normalize_sql_collapses_literals_and_lists(self):
+        self.assertEqual(
+            normalize_sql("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x'  AND n > 10"),
+            normalize_sql("SELECT * FROM t WHERE id IN (%s) AND name = 'y' AND n > 2"),
+        )
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_statements_over_threshold_are_recorded_with_plan(self):
+        user = User.objects.create_user(email='user@example.com', username='user', password='x')
+        token = RefreshToken.for_user(user).access_token
+        for _ in range(2):
+            self.client.get(reverse('feed-tag-list'), HTTP_AUTHORIZATION=f"Bearer {token}")
+            self.client.get(reverse('user-post-list'), HTTP_AUTHORIZATION=f"Bearer {token}")
+        recorder.join()
+
+        feed_query = SlowQuery.objects.get(normalized_sql__contains='FROM "content_feed"')
+        self.assertEqual(feed_query.count, 2)
+        self.assertEqual(feed_query.last_view, 'feed-tag-list')
+        self.assertIn('rest_framework/', feed_query.last_location)
+        self.assertIn('Execution Time', feed_query.explain_plan)
+        self.assertGreaterEqual(feed_query.p95_ms, 0)
+
+        post_query = SlowQuery.objects.get(normalized_sql__startswith='SELECT', normalized_sql__contains='FROM "content_post"')
+        self.assertEqual(post_query.last_view, 'user-post-list')
+
+    def feed_tag_list(self):
+        user = User.objects.create_user(email='user@example.com', username='user', password='x')
+        token = RefreshToken.for_user(user).access_token
+        response = self.client.get(reverse('feed-tag-list'), HTTP_AUTHORIZATION=f"Bearer {token}")
+        recorder.join()
+        return response
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_recorded(self):
+        self.assertEqual(self.feed_tag_list().status_code, 200)
+        self.assertFalse(SlowQuery.objects.exists())
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0)
+    def test_recording_failures_are_logged_not_raised(self):
+        with mock.patch('monitoring.slow_queries.record_slow_queries', side_effect=RuntimeError('db down')), \
+                self.assertLogs('monitoring.slow_queries', 'ERROR'):
+            self.assertEqual(self.feed_tag_list().status_code, 200)
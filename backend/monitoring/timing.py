@@ -0,0 +1,134 @@
+import contextvars
+import functools
+from time import perf_counter
+from .slow_queries import caller_location
+
+# ----------------------------------------------------------------------
+# Per-request timing state
+#
+# The middleware puts a RequestTimings object into a context variable for the
+# duration of a request; the SQL execute_wrapper and the serializer hook add
+# to it. Outside a request (shell, management commands) nothing is recorded.
+# ----------------------------------------------------------------------
+
+_current_timings = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Accumulates where the time of a single request went (all values in seconds)."""
+
+    __slots__ = (
+        'start', 'view_start', 'view_end', 'render_end', 'total',
+        'sql_count', 'sql_time', 'serializer_time', '_serializer_depth',
+        'slow_threshold', 'slow_queries',
+    )
+
+    def __init__(self, slow_threshold=None):
+        self.start = perf_counter()
+        self.view_start = self.view_end = self.render_end = None
+        self.total = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+        self._serializer_depth = 0
+        # Statements slower than this (seconds) are kept for the slow query sampler
+        self.slow_threshold = slow_threshold
+        self.slow_queries = []
+
+    # --- connection.execute_wrapper hook ---
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - start
+            self.sql_time += elapsed
+            self.sql_count += 1
+            if self.slow_threshold is not None and elapsed >= self.slow_threshold:
+                self.slow_queries.append((elapsed, sql, params, many, caller_location()))
+
+    def finish(self):
+        end = perf_counter()
+        self.total = end - self.start
+        if self.view_start is not None and self.view_end is None:
+            # Not a template/DRF response, so there was no separate render step
+            self.view_end = end
+
+    @property
+    def view_time(self):
+        if self.view_start is None:
+            return 0.0
+        return self.view_end - self.view_start
+
+    @property
+    def render_time(self):
+        if self.render_end is None or self.view_end is None:
+            return 0.0
+        return self.render_end - self.view_end
+
+    def phases(self):
+        """(name, seconds, description) for every measured phase, in Server-Timing order."""
+        return [
+            ('db', self.sql_time, f"{self.sql_count} queries"),
+            ('view', self.view_time, None),
+            ('ser', self.serializer_time, None),
+            ('render', self.render_time, None),
+            ('total', self.total, None),
+        ]
+
+    def server_timing_header(self):
+        entries = []
+        for name, seconds, description in self.phases():
+            entry = f"{name};dur={seconds * 1000:.2f}"
+            if description:
+                entry += f';desc="{description}"'
+            entries.append(entry)
+        return ', '.join(entries)
+
+
+def start_request_timings(slow_threshold=None):
+    timings = RequestTimings(slow_threshold)
+    return timings, _current_timings.set(timings)
+
+
+def end_request_timings(token):
+    _current_timings.reset(token)
+
+
+def current_timings():
+    return _current_timings.get()
+
+
+# ----------------------------------------------------------------------
+# Serializer hook
+# ----------------------------------------------------------------------
+
+def _timed_data_property(prop):
+    """Wraps a serializer 'data' property so only the outermost evaluation is timed."""
+    fget = prop.fget
+
+    @functools.wraps(fget)
+    def data(serializer):
+        timings = _current_timings.get()
+        if timings is None or timings._serializer_depth:
+            return fget(serializer)
+
+        timings._serializer_depth += 1
+        start = perf_counter()
+        try:
+            return fget(serializer)
+        finally:
+            timings.serializer_time += perf_counter() - start
+            timings._serializer_depth -= 1
+
+    data._request_timed = True
+    return property(data)
+
+
+def install_serializer_timing():
+    from rest_framework import serializers
+
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        prop = cls.__dict__['data']
+        if not getattr(prop.fget, '_request_timed', False):
+            cls.data = _timed_data_property(prop)
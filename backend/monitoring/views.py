@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.contrib import admin
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.template.response import TemplateResponse
+from .metrics import REGISTRY
+from .profiling import ProfileStore
+
+
+def metrics_view(request):
+    """
+    Exposes the request histograms in the Prometheus text format (GET /metrics).
+    Only reachable from the addresses in METRICS_ALLOWED_IPS (empty = anyone).
+    """
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', [])
+    if allowed and request.META.get('REMOTE_ADDR') not in allowed:
+        return HttpResponseForbidden("Metrics are not available from this address.")
+
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def profile_list_view(request):
+    """Staff-only admin page listing the stored request profiles, newest first."""
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Request profiles',
+        'profiles': ProfileStore().list(),
+        'sample_rate': getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0),
+    }
+    return TemplateResponse(request, 'monitoring/profile_list.html', context)
+
+
+def profile_detail_view(request, profile_id):
+    """Staff-only admin page showing one profile: slowest SQL and the cProfile report."""
+    record = ProfileStore().get(profile_id)
+    if record is None:
+        raise Http404("Profile not found (it may have been rotated out).")
+
+    context = {
+        **admin.site.each_context(request),
+        'title': f"Profile of {record['method']} {record['path']}",
+        'record': record,
+    }
+    return TemplateResponse(request, 'monitoring/profile_detail.html', context)
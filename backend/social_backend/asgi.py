@@ -13,4 +13,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'social_backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Real-time feed push (WebSocket /ws/content/ and SSE /api/content/stream/)
+from content.streaming import realtime_router  # noqa: E402  (needs the app registry)
+
+application = realtime_router(django_application)
@@ -32,15 +32,18 @@ INSTALLED_APPS = [
     'corsheaders', # To allow Flutter to connect
     'accounts',
     'content',
+    'monitoring', # Request timings, /metrics
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.RequestTimingMiddleware', # Keep first: Server-Timing + /metrics histograms
     'corsheaders.middleware.CorsMiddleware', 
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'monitoring.middleware.ProfilingMiddleware', # No-op unless a staff user / sampling asks for a profile
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -212,4 +215,64 @@ DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
 
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
\ No newline at end of file
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Post.media_file and StudentProfile.profile_image are stored once per distinct
+# content under MEDIA_ROOT/blobs/ (content/media.py)
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'media': {'BACKEND': 'content.media.ContentAddressedStorage'},
+}
+
+
+# DELTA SYNC (GET /api/content/changes/)
+# Log entries younger than this are held back, so a token never skips a change
+# whose transaction took an earlier sequence number but had not committed yet.
+CONTENT_CHANGES_SETTLE_SECONDS = 2
+
+
+# ARCHIVE TIER (manage.py archive_posts)
+# Published posts older than this are moved to segment files in CONTENT_ARCHIVE_DIR
+# and served read-only from there by the post detail and public user post endpoints.
+CONTENT_ARCHIVE_AFTER_DAYS = 365
+CONTENT_ARCHIVE_DIR = os.environ.get('CONTENT_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archive'))
+
+
+# RANKED FEED (GET /api/content/?order=ranked, content.ranking)
+# Candidate generators to union (names from content.ranking.CANDIDATE_GENERATORS)
+# and per-feature weights overriding content.ranking.DEFAULT_WEIGHTS.
+FEED_RANKING_GENERATORS = ['recent', 'followed_tags', 'same_college', 'trending']
+FEED_RANKING_WEIGHTS = {}
+
+
+# REAL-TIME PUSH (content.streaming, served by the ASGI application)
+# Broker carrying events between workers (None disables publishing and the endpoints).
+REALTIME_BROKER = 'content.realtime.PostgresBroker'
+# A post's hype/comment counts are pushed at most once per interval (seconds).
+REALTIME_COUNTS_INTERVAL = 1.0
+REALTIME_HEARTBEAT_SECONDS = 15
+REALTIME_MAX_CHANNELS = 100
+
+
+# PERFORMANCE MONITORING
+# Addresses allowed to scrape /metrics (empty list = no restriction).
+METRICS_ALLOWED_IPS = ['127.0.0.1', '::1']
+
+# On-demand profiling (monitoring.middleware.ProfilingMiddleware)
+# Fraction of all requests profiled without being asked for (0 = only on request).
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+# Profiles are kept as JSON files here; only the newest PROFILING_MAX_ENTRIES are kept.
+PROFILING_DIR = os.environ.get('PROFILING_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILING_MAX_ENTRIES = 100
+# Slowest SQL statements stored per profile.
+PROFILING_SLOW_QUERIES = 10
+
+# Slow query sampler (monitoring.slow_queries): statements slower than this are
+# aggregated by fingerprint in monitoring.SlowQuery (None disables sampling).
+SLOW_QUERY_THRESHOLD_MS = 100
+# Fraction of the requests with slow statements whose statements are recorded.
+SLOW_QUERY_SAMPLE_RATE = float(os.environ.get('SLOW_QUERY_SAMPLE_RATE', 1))
+# A fingerprint's EXPLAIN (ANALYZE, BUFFERS) plan is refreshed at most this often (seconds).
+SLOW_QUERY_EXPLAIN_INTERVAL = 3600
+SLOW_QUERY_EXPLAIN_TIMEOUT_MS = 5000
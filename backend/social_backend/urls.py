@@ -6,6 +6,8 @@ from django.conf.urls.static import static
 # Import JWT Views for refresh/verify tokens
 from rest_framework_simplejwt.views import TokenRefreshView, TokenVerifyView
 
+from monitoring.views import metrics_view, profile_list_view, profile_detail_view
+
 # --- Custom Accounts Views ---
 from accounts.views import (
     MyTokenObtainPairView,  
@@ -16,6 +18,14 @@ from accounts.views import (
 )
 
 urlpatterns = [
+    # Staff-only request profiles (listed before the admin site so its catch-all does not swallow them)
+    path('admin/monitoring/profiles/', admin.site.admin_view(profile_list_view), name='monitoring_profiles'),
+    path(
+        'admin/monitoring/profiles/<str:profile_id>/',
+        admin.site.admin_view(profile_detail_view),
+        name='monitoring_profile_detail',
+    ),
+
     # Django Admin Site
     path('admin/', admin.site.urls),
 
@@ -45,6 +55,14 @@ urlpatterns = [
     
     # Placeholder for the content app
     path('api/content/', include('content.urls')), 
+
+
+    # =================================================================
+    # 3. MONITORING
+    # =================================================================
+
+    # Prometheus scrape endpoint (per-endpoint request histograms)
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Serve media files (like profile pictures) during development
@@ -170,7 +170,7 @@ class AuthService {
 
 
   // --- NEW: FETCH COMMENTS API (UNCHANGED) ---
-  /// Fetches all comments for a given content post.
+  /// Fetches the first page of top-level comments for a given content post.
   /// GET /api/content/{content_id}/comments/
   Future<List<CommentModel>> fetchCommentsForContent(String contentId) async {
     final token = await _tokenService.getAccessToken();
@@ -191,7 +191,9 @@ class AuthService {
       );
 
       if (response.statusCode == 200) {
-        final List<dynamic> jsonList = json.decode(response.body);
+        // The endpoint returns a page: {"next": ..., "previous": ..., "results": [...]}
+        final Map<String, dynamic> page = json.decode(response.body);
+        final List<dynamic> jsonList = page['results'] as List<dynamic>? ?? [];
         // Map the JSON list to a list of CommentModel objects
         return jsonList.map((json) => CommentModel.fromJson(json)).toList();
       } else if (response.statusCode == 401) {